@@ -3,13 +3,22 @@ from flask import Flask
 from flask import Flask, render_template
 from flask_login import LoginManager
 
-from .db import db, migrate
+from .db import init_db
 from .models import User
-from .auth import auth_bp
+from .auth import auth_bp, load_session_user
 from .recommend import rec_bp
 from .api import api_bp
 from config import Config
-from .images import images_bp
+from .images import images_bp, init_note_image_index
+from .suggest import suggest_bp
+from .http_utils import OrjsonProvider, init_compression
+from .composer import composer_cli
+from .neighbors import neighbors_cli
+from .embeddings import embeddings_cli
+from .retrieval_service import retrieval_cli
+from .taste import taste_cli
+from .weather_snapshot import weather_snapshot_cli
+from .metrics import init_metrics
 
 
 def create_app():
@@ -32,9 +41,13 @@ def create_app():
     app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
     app.config.setdefault("SECRET_KEY", os.environ.get("SECRET_KEY", "dev-secret-change-me"))
 
-    # 3) DB & 마이그레이션 초기화
-    db.init_app(app)
-    migrate.init_app(app, db)
+    # JSON 직렬화(orjson) & 응답 압축(gzip/br)
+    app.json = OrjsonProvider(app)
+    init_compression(app)
+    init_metrics(app)  # /metrics (METRICS_ENABLED=0 이면 비활성)
+
+    # 3) DB & 마이그레이션 초기화 (파일 SQLite 면 WAL/풀 튜닝, SQLITE_PROFILE=default 로 끔)
+    init_db(app)
 
     # 4) 로그인 매니저
     login_manager = LoginManager(app)
@@ -42,16 +55,20 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_session_user(int(user_id))  # SESSION_USER_TTL 초 캐시
 
     # 5) 블루프린트 등록
     app.register_blueprint(api_bp)   # /weather 등
     app.register_blueprint(auth_bp)  # /auth/*
     app.register_blueprint(images_bp)
+    init_note_image_index(app)       # 노트 이미지 slug 인덱스 1회 빌드
     app.register_blueprint(rec_bp)   # /, /recommend, /history
-    
-    # (선택) 노트 이미지 정적 라우트 블루프린트가 있다면 등록
-    # from .images import images_bp
-    # app.register_blueprint(images_bp)
+    app.register_blueprint(suggest_bp)  # /suggest
+    app.cli.add_command(composer_cli)  # flask composer build
+    app.cli.add_command(neighbors_cli)  # flask neighbors build
+    app.cli.add_command(embeddings_cli)  # flask embeddings build
+    app.cli.add_command(retrieval_cli)  # flask retrieval serve
+    app.cli.add_command(taste_cli)  # flask taste backfill
+    app.cli.add_command(weather_snapshot_cli)  # flask weather-snapshot build|run
 
     return app
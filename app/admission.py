@@ -0,0 +1,394 @@
+# app/admission.py
+"""
+비싼 엔드포인트(/recommend, /generate-custom-fragrance) 입장 제어.
+
+  @admission("recommend")
+    1) 토큰 버킷 (사용자별, <NAME>_RATE 개/초, <NAME>_BURST 개까지 몰아쓰기) → 초과 시 429 + Retry-After.
+       동일 요청을 공유받는 요청도 토큰 1개를 쓴다 (같은 요청 연타로 제한을 우회하지 못함)
+    2) 같은 사용자의 동일 요청(본문/쿼리스트링까지 같음)이 처리 중이면 그 결과를 기다렸다가 공유
+       (더블클릭 → 계산 1회, 이력 저장도 1회). 끝난 직후 ADMISSION_DEDUP_TTL 초 동안 온 것도 공유.
+       기다리는 요청은 대기열 자리를 차지하고, 리더가 살아 있는 동안(최대 ADMISSION_LEASE 초) 기다린다
+    3) 동시 실행 슬롯 (<NAME>_CONCURRENCY, 모든 워커 합계) + 대기열 (<NAME>_QUEUE 명, 최대
+       <NAME>_MAX_WAIT 초) → 대기열이 꽉 찼거나 시간 안에 못 들어가면 503 + Retry-After
+       → 싼 라우트(/note-img, /weather, /suggest)용 워커 스레드가 항상 남는다
+
+상태는 워커 프로세스들이 공유하는 로컬 SQLite 파일(WAL)에 둔다 (ADMISSION_DB, 기본 instance/admission.sqlite).
+슬롯은 임대 시간(ADMISSION_LEASE)이 지나거나 보유 프로세스가 죽으면 회수된다.
+저장소 오류 시에는 제한 없이 통과시킨다 (fail-open).
+"""
+from __future__ import annotations
+import hashlib
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache, wraps
+from typing import Optional, Tuple
+
+from flask import current_app, jsonify, make_response, request
+from flask_login import current_user
+
+from .metrics import Counter, register_metric, stage
+
+ADMISSION_ENABLED   = os.getenv("ADMISSION_ENABLED", "1") not in ("0", "false", "False")
+ADMISSION_LEASE     = float(os.getenv("ADMISSION_LEASE", "120"))    # 슬롯/진행 중 표시 최대 보유 시간(초)
+ADMISSION_DEDUP_TTL = float(os.getenv("ADMISSION_DEDUP_TTL", "2"))  # 끝난 결과를 공유하는 시간(초)
+ADMISSION_POLL_MAX  = 0.05                                          # 대기 중 재확인 간격 상한(초)
+
+ADMISSION_EVENTS = register_metric(Counter("perfume_admission_total",
+                                           "Admission decisions by endpoint and result"))
+
+
+@dataclass(frozen=True)
+class Policy:
+    concurrency: int     # 동시 실행 (전체 워커 합계), 0 = 제한 없음
+    queue: int           # 대기열 길이
+    max_wait: float      # 대기 최대 시간(초)
+    rate: float          # 사용자별 초당 토큰, 0 = 제한 없음
+    burst: float         # 버킷 크기
+
+    @classmethod
+    def from_env(cls, prefix: str, concurrency: int, queue: int, max_wait: float,
+                 rate: float, burst: float) -> "Policy":
+        env = lambda k, d: os.getenv(f"{prefix}_{k}", str(d))
+        return cls(int(env("CONCURRENCY", concurrency)), int(env("QUEUE", queue)),
+                   float(env("MAX_WAIT", max_wait)), float(env("RATE", rate)), float(env("BURST", burst)))
+
+
+POLICIES = {
+    # 모델 추론 + 번역/날씨 외부 호출
+    "recommend": Policy.from_env("RECOMMEND", concurrency=4, queue=8, max_wait=3.0, rate=0.5, burst=5),
+    # LLM 호출 (스트리밍이면 응답이 끝날 때까지 슬롯 보유)
+    "fragrance": Policy.from_env("FRAGRANCE", concurrency=4, queue=8, max_wait=5.0, rate=0.2, burst=3),
+    # 노트 이미지 스프라이트 (로그인 불필요 → IP 별 토큰). 새 조합은 디스크에 WEBP 를 만든다
+    "note_bulk": Policy.from_env("NOTE_BULK", concurrency=0, queue=8, max_wait=2.0, rate=5, burst=30),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slots   (holder TEXT PRIMARY KEY, endpoint TEXT NOT NULL, pid INTEGER, expires REAL);
+CREATE TABLE IF NOT EXISTS waiters (seq INTEGER PRIMARY KEY AUTOINCREMENT, holder TEXT UNIQUE,
+                                    endpoint TEXT NOT NULL, expires REAL);
+CREATE TABLE IF NOT EXISTS followers(holder TEXT PRIMARY KEY, endpoint TEXT NOT NULL, expires REAL);
+CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL);
+CREATE TABLE IF NOT EXISTS inflight(key TEXT PRIMARY KEY, owner TEXT, pid INTEGER, expires REAL,
+                                    status INTEGER, mimetype TEXT, body BLOB);
+CREATE INDEX IF NOT EXISTS slots_endpoint ON slots(endpoint);
+CREATE INDEX IF NOT EXISTS waiters_endpoint ON waiters(endpoint, seq);
+"""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # 권한 없음 = 살아 있음
+    return True
+
+
+class AdmissionStore:
+    """공유 SQLite 상태. 연결은 프로세스별 풀(LIFO)로 재사용 — 요청마다 connect 하지 않는다."""
+
+    def __init__(self, path: str, pool_size: int = 8):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._pid = os.getpid()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        if self._pid != os.getpid():  # fork 된 자식: 부모의 연결은 쓰지 않음
+            self._pool, self._pid = queue.LifoQueue(maxsize=self.pool_size), os.getpid()
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        broken = False
+        try:
+            yield conn
+        except sqlite3.Error:
+            broken = True
+            raise
+        finally:  # 어떤 예외든 연결은 풀로 돌려주거나 닫는다 (트랜잭션이 열린 채면 닫음)
+            if broken or conn.in_transaction:
+                conn.close()
+            else:
+                try:
+                    self._pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+    @contextmanager
+    def _tx(self):
+        """BEGIN IMMEDIATE 트랜잭션 (쓰기 잠금을 먼저 잡아 읽고-쓰기 사이 경합 없음)."""
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # ---------- 토큰 버킷 ----------
+    def take_token(self, key: str, rate: float, burst: float) -> float:
+        """토큰 1개 사용. 성공이면 0, 아니면 다음 토큰까지 남은 초."""
+        with self._tx() as c:
+            now = time.time()
+            row = c.execute("SELECT tokens, updated FROM buckets WHERE key=?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            if tokens < 1.0:
+                c.execute("UPDATE buckets SET tokens=?, updated=? WHERE key=?", (tokens, now, key))
+                return (1.0 - tokens) / rate
+            c.execute("INSERT OR REPLACE INTO buckets(key, tokens, updated) VALUES (?, ?, ?)",
+                      (key, tokens - 1.0, now))
+            return 0.0
+
+    # ---------- 동시 실행 슬롯 ----------
+    def _reap(self, c: sqlite3.Connection, endpoint: str, now: float) -> None:
+        c.execute("DELETE FROM slots WHERE expires < ?", (now,))
+        c.execute("DELETE FROM waiters WHERE expires < ?", (now,))
+        c.execute("DELETE FROM followers WHERE expires < ?", (now,))
+        for (pid,) in c.execute("SELECT DISTINCT pid FROM slots WHERE endpoint=?", (endpoint,)).fetchall():
+            if pid != os.getpid() and not _pid_alive(pid):
+                c.execute("DELETE FROM slots WHERE pid=?", (pid,))  # 죽은 워커가 남긴 슬롯
+
+    def acquire(self, endpoint: str, policy: Policy) -> Tuple[Optional[str], str]:
+        """(슬롯 holder, 결과). 결과: admitted | queued(대기 후 입장) | full | timeout."""
+        holder = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+        deadline = time.monotonic() + policy.max_wait
+        delay, queued = 0.002, False
+        while True:
+            with self._tx() as c:
+                now = time.time()
+                self._reap(c, endpoint, now)
+                running = c.execute("SELECT COUNT(*) FROM slots WHERE endpoint=?", (endpoint,)).fetchone()[0]
+                if queued:
+                    ahead = c.execute("SELECT COUNT(*) FROM waiters WHERE endpoint=? AND seq < "
+                                      "(SELECT seq FROM waiters WHERE holder=?)", (endpoint, holder)).fetchone()[0]
+                else:
+                    ahead = c.execute("SELECT COUNT(*) FROM waiters WHERE endpoint=?", (endpoint,)).fetchone()[0]
+                if running + ahead < policy.concurrency:  # 먼저 기다린 요청이 우선 (새치기 없음)
+                    c.execute("DELETE FROM waiters WHERE holder=?", (holder,))
+                    c.execute("INSERT INTO slots(holder, endpoint, pid, expires) VALUES (?, ?, ?, ?)",
+                              (holder, endpoint, os.getpid(), now + ADMISSION_LEASE))
+                    return holder, "queued" if queued else "admitted"
+                remaining = deadline - time.monotonic()
+                if not queued:
+                    if ahead + self._followers(c, endpoint) >= policy.queue or remaining <= 0:
+                        return None, "full"
+                    c.execute("INSERT INTO waiters(holder, endpoint, expires) VALUES (?, ?, ?)",
+                              (holder, endpoint, now + remaining + 1.0))
+                    queued = True
+                elif remaining <= 0:
+                    c.execute("DELETE FROM waiters WHERE holder=?", (holder,))
+                    return None, "timeout"
+            time.sleep(min(delay, max(0.0, remaining)))
+            delay = min(delay * 2, ADMISSION_POLL_MAX)
+
+    def release(self, holder: str) -> None:
+        with self._tx() as c:
+            c.execute("DELETE FROM slots WHERE holder=?", (holder,))
+
+    # ---------- 동일 요청 공유 (single-flight) ----------
+    @staticmethod
+    def _followers(c: sqlite3.Connection, endpoint: str) -> int:
+        return c.execute("SELECT COUNT(*) FROM followers WHERE endpoint=? AND expires >= ?",
+                         (endpoint, time.time())).fetchone()[0]
+
+    @staticmethod
+    def _shared_state(row, now: float):
+        """inflight 행 -> ("done", 결과) | ("wait", None) | (None, None: 없음/만료/리더 죽음)."""
+        if row is None:
+            return None, None
+        pid, expires, status, mimetype, body = row
+        if expires < now:
+            return None, None
+        if status is not None:
+            return "done", (status, mimetype, body)
+        if pid == os.getpid() or _pid_alive(pid):
+            return "wait", None
+        return None, None
+
+    def lead_or_follow(self, key: str, owner: str, endpoint: str, policy: Policy):
+        """
+        ("lead", None)  직접 계산 (진행 중 표시를 남김)
+        ("done", (status, mimetype, body))  끝난 결과 사용
+        ("wait", follower id)  다른 요청이 계산 중 → 리더 임대가 끝날 때까지 대기열 자리 1개를 잡고
+                               wait_shared 로 기다림
+        ("full", None)  계산 중이지만 대기열이 꽉 참
+        """
+        with self._tx() as c:
+            now = time.time()
+            row = c.execute("SELECT pid, expires, status, mimetype, body FROM inflight WHERE key=?",
+                            (key,)).fetchone()
+            state, shared = self._shared_state(row, now)
+            if state == "done":
+                return state, shared
+            if state == "wait":
+                self._reap(c, endpoint, now)
+                waiting = c.execute("SELECT COUNT(*) FROM waiters WHERE endpoint=?", (endpoint,)).fetchone()[0]
+                if waiting + self._followers(c, endpoint) >= policy.queue:
+                    return "full", None
+                fid = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+                c.execute("INSERT INTO followers(holder, endpoint, expires) VALUES (?, ?, ?)",
+                          (fid, endpoint, row[1] + 1.0))
+                return "wait", fid
+            c.execute("INSERT OR REPLACE INTO inflight(key, owner, pid, expires) VALUES (?, ?, ?, ?)",
+                      (key, owner, os.getpid(), now + ADMISSION_LEASE))
+            c.execute("DELETE FROM inflight WHERE expires < ?", (now,))
+            return "lead", None
+
+    def wait_shared(self, key: str, follower: str):
+        """
+        리더 결과를 기다림 (읽기 전용 조회로 폴링 — 쓰기 잠금을 잡지 않음). 리더가 살아 있는 동안은
+        max_wait 를 넘겨도 계속 기다린다 — 계산이 이미 진행 중이니 과부하로 거절할 이유가 없다.
+        리더 임대(ADMISSION_LEASE)가 끝나거나 리더 프로세스가 죽으면 _shared_state 가 None → "gone".
+        ("done", 결과) | ("gone", None: 리더가 공유 없이 끝남/죽음/임대 만료)
+        """
+        delay = 0.005
+        try:
+            while True:
+                with self._conn() as c:  # autocommit → SELECT 하나가 곧 읽기 트랜잭션
+                    row = c.execute("SELECT pid, expires, status, mimetype, body FROM inflight WHERE key=?",
+                                    (key,)).fetchone()
+                state, shared = self._shared_state(row, time.time())
+                if state == "done":
+                    return state, shared
+                if state is None:
+                    return "gone", None
+                time.sleep(delay)
+                delay = min(delay * 2, ADMISSION_POLL_MAX)
+        finally:
+            with self._tx() as c:
+                c.execute("DELETE FROM followers WHERE holder=?", (follower,))
+
+    def finish(self, key: str, owner: str, result: Optional[Tuple[int, str, bytes]]) -> None:
+        """리더가 결과 저장 (None 이면 공유 불가 → 표시 삭제, 기다리던 요청은 직접 계산)."""
+        with self._tx() as c:
+            if result is None:
+                c.execute("DELETE FROM inflight WHERE key=? AND owner=?", (key, owner))
+            else:
+                c.execute("UPDATE inflight SET status=?, mimetype=?, body=?, expires=? WHERE key=? AND owner=?",
+                          (*result, time.time() + ADMISSION_DEDUP_TTL, key, owner))
+
+
+def admission_db_path(app) -> str:
+    path = app.config.get("ADMISSION_DB") or os.path.join(app.instance_path, "admission.sqlite")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+@lru_cache(maxsize=1)
+def get_admission_store() -> AdmissionStore:
+    return AdmissionStore(admission_db_path(current_app))
+
+
+def _client_key() -> str:
+    if current_user and current_user.is_authenticated:
+        return f"user:{current_user.get_id()}"
+    return f"ip:{request.remote_addr or '-'}"
+
+
+def _reject(status: int, error: str, retry_after: float):
+    seconds = max(1, math.ceil(retry_after))
+    resp = jsonify(error=error, retry_after=seconds)
+    resp.status_code = status
+    resp.headers["Retry-After"] = str(seconds)
+    return resp
+
+
+def admission(name: str):
+    """엔드포인트 데코레이터 (@login_required 보다 안쪽에 둔다 → 사용자별 키)."""
+    def deco(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            policy = POLICIES.get(name)
+            if not ADMISSION_ENABLED or policy is None:
+                return view(*args, **kwargs)
+            owner = holder = None  # owner: 이 요청이 남긴 진행 중 표시 (리더일 때만)
+            try:
+                store = get_admission_store()
+                client = _client_key()
+                digest = hashlib.sha1(b"\0".join([name.encode(), client.encode(),
+                                                  request.full_path.encode(),
+                                                  (request.headers.get("Accept") or "").encode(),
+                                                  request.get_data()])).hexdigest()
+                with stage("admission"):
+                    if policy.rate > 0:  # 공유받을 요청도 먼저 토큰을 쓴다
+                        wait = store.take_token(f"{name}:{client}", policy.rate, policy.burst)
+                        if wait > 0:
+                            ADMISSION_EVENTS.inc(endpoint=name, result="rate_limited")
+                            return _reject(429, "rate_limited", wait)
+                    lead = uuid.uuid4().hex
+                    state, shared = store.lead_or_follow(digest, lead, name, policy)
+                    if state == "wait":
+                        state, shared = store.wait_shared(digest, shared)
+                    if state == "done":
+                        ADMISSION_EVENTS.inc(endpoint=name, result="deduped")
+                        status, mimetype, body = shared
+                        return current_app.response_class(body, status=status, mimetype=mimetype)
+                    if state == "full":
+                        ADMISSION_EVENTS.inc(endpoint=name, result=state)
+                        return _reject(503, "overloaded", max(1.0, policy.max_wait))
+                    if state == "lead":  # "gone" = 리더가 공유 없이 끝남 → 직접 처리 (토큰은 이미 사용)
+                        owner = lead
+                    if policy.concurrency > 0:
+                        holder, result = store.acquire(name, policy)
+                        ADMISSION_EVENTS.inc(endpoint=name, result=result)
+                        if holder is None:
+                            if owner:
+                                store.finish(digest, owner, None)
+                            return _reject(503, "overloaded", max(1.0, policy.max_wait))
+            except sqlite3.Error:
+                current_app.logger.warning("admission store unavailable, passing %s through", name,
+                                           exc_info=True)
+                try:
+                    if owner:  # 리더 표시를 남긴 뒤 실패 → 기다리는 요청이 직접 계산하도록 지움
+                        store.finish(digest, owner, None)
+                except sqlite3.Error:
+                    pass  # 진행 중 표시는 임대 만료로 정리됨
+                return view(*args, **kwargs)
+
+            def release():
+                try:
+                    if holder is not None:
+                        store.release(holder)
+                except sqlite3.Error:
+                    pass  # 임대 만료로 회수됨
+
+            def settle(result):
+                try:
+                    if owner:
+                        store.finish(digest, owner, result)
+                except sqlite3.Error:
+                    pass  # 진행 중 표시는 임대 만료로 정리됨
+
+            try:
+                resp = make_response(view(*args, **kwargs))
+            except BaseException:
+                release()
+                settle(None)
+                raise
+            if resp.is_streamed:
+                resp.call_on_close(release)  # 스트리밍은 응답이 끝날 때까지 슬롯 보유
+                settle(None)
+            else:
+                release()
+                settle((resp.status_code, resp.mimetype, resp.get_data()) if resp.status_code < 500 else None)
+            return resp
+        return wrapper
+    return deco
@@ -1,13 +1,16 @@
 # app/api.py
-import os
 import json
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
 from dotenv import load_dotenv
 
 from .weather_utils import get_weather, get_weather_data
+from .llm import build_prompt, cache_key, get_llm_client
+from .composer import get_composer
 from .recommend import recommend as recommend_view
 from .models import Recommendation
+from .metrics import stage
+from .admission import admission
 
 load_dotenv()
 
@@ -59,13 +62,62 @@ def weather():
     return jsonify(city="", temp="", description="", raw=str(w))
 
 
+# 로컬 조합기도 쓸 수 없을 때(통계 빌드 실패 등)의 최후 폴백
+MOCK_FRAGRANCE = """{
+  "name": "Citrus Veil",
+  "category": "시트러스",
+  "mood": "상큼하고 맑은 초여름 바람",
+  "top": ["Bergamot", "Grapefruit", "Lemon"],
+  "middle": ["Jasmine", "Neroli", "Lavender"],
+  "base": ["Musk", "Cedarwood", "Amber"],
+  "description": "시트러스 중심의 투명한 구조에 플로럴의 부드러움을 더해 산뜻하게 마무리됩니다."
+}"""
+
+
+def _local_fragrance(user_cat: str, user_note: str, weather: str, notes) -> tuple[str, str]:
+    """로컬 조합기 결과 (generated_note, source). 조합기를 못 쓰면 고정 목업."""
+    if current_app.config.get("FRAGRANCE_COMPOSER", "fallback") != "off":
+        composer = get_composer()
+        if composer is not None:
+            try:
+                with stage("composer"):
+                    return composer.compose_text(user_cat, user_note, weather, notes), "local"
+            except Exception:
+                current_app.logger.exception("local composer failed")
+    return MOCK_FRAGRANCE, "mock"
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _stream_fragrance(client, prompt: str, key: str, fallback):
+    """SSE: delta(텍스트 조각) 여러 번 → done(전체 결과 또는 폴백) 1번."""
+    pieces = []
+    try:
+        with stage("llm_stream"):
+            for text in client.stream(prompt, key=key):
+                pieces.append(text)
+                yield _sse("delta", {"text": text})
+        yield _sse("done", {"generated_note": "".join(pieces).strip(), "source": "llm"})
+    except Exception as e:
+        note, source = fallback()
+        yield _sse("done", {"generated_note": note, "source": source, "error": str(e)})
+
+
 @api_bp.route('/generate-custom-fragrance', methods=['POST'])
+@admission("fragrance")
 def generate_custom_fragrance():
     """
     요청 JSON:
       { "user_cat": str, "user_note": str, "weather": str, "notes": [str, ...] }
     응답 JSON:
-      { "generated_note": str }  # 프론트에서 이 문자열을 그대로 렌더
+      { "generated_note": str, "source": "llm" | "local" | "mock" }  # 프론트에서 이 문자열을 그대로 렌더
+    FRAGRANCE_COMPOSER=fast 이면 LLM 없이 로컬 조합기로 즉시 응답,
+    fallback(기본)이면 LLM 실패 시에만 로컬 조합기를 쓴다.
+    ?stream=1 또는 Accept: text/event-stream 이면 SSE로 스트리밍:
+      event: delta  data: { "text": str }            (여러 번)
+      event: done   data: { "generated_note": str }  (마지막 1번)
     """
     js = request.get_json() or {}
     user_cat  = (js.get('user_cat') or '').strip()
@@ -73,58 +125,38 @@ def generate_custom_fragrance():
     weather   = (js.get('weather')   or '').strip()
     notes     = js.get('notes') or []
 
-    prompt = f"""
-당신은 전문 조향사입니다. 아래 정보를 반영해 새로운 향수를 제안하세요.
-- 선호 카테고리: {user_cat}
-- 취향 노트: {user_note}
-- 현재 날씨: {weather}
-- 추천 목록에서 수집된 노트 후보: {notes}
-
-반드시 다음 JSON만 출력하세요 (코드펜스나 추가 설명 금지):
-{{
-  "name": "<짧은 한국어/영문 이름 1~2단어>",
-  "category": "<한국어 카테고리(예: 시트러스, 아로마틱, 우디, 플로럴, 머스크, 앰버리, 그린, 스파이시, 오리엔탈, 푸제르 등)>",
-  "mood": "<향의 분위기/컨셉(한국어)>",
-  "top": ["노트1","노트2","노트3"],
-  "middle": ["노트1","노트2","노트3"],
-  "base": ["노트1","노트2","노트3"],
-  "description": "<50~120자 정도 한국어 설명>"
-}}
-주의:
-- 가능한 한 제공된 notes에서 우선 선택하고, 부족하면 보완 노트를 소량 추가하세요.
-- top/middle/base는 각각 3~6개 사이.
-- 추가 설명 없이 JSON만 출력하세요.
-    """.strip()
-
-    api_key = os.getenv("GENAI_API_KEY")
+    wants_stream = (request.args.get('stream') == '1' or
+                    request.accept_mimetypes.best_match(
+                        ['application/json', 'text/event-stream']) == 'text/event-stream')
 
-    try:
-        if not api_key:
-            raise RuntimeError("GENAI_API_KEY not set")
+    def fallback():
+        return _local_fragrance(user_cat, user_note, weather, notes)
 
-        import google.generativeai as genai  # pip install google-generativeai
-        genai.configure(api_key=api_key)
-        # ✨ 수정: 1.5 → 2.5 (v1beta에서 1.5 일부 generateContent 미지원 404 방지)
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        resp = model.generate_content(prompt)
-        text = (resp.text or "").strip()
-        if not text:
-            raise RuntimeError("Empty model response")
+    if current_app.config.get("FRAGRANCE_COMPOSER", "fallback") == "fast":
+        note, source = fallback()
+        if wants_stream:
+            return Response(_sse("done", {"generated_note": note, "source": source}),
+                            mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+        return jsonify(generated_note=note, source=source), 200
 
-        return jsonify(generated_note=text), 200
+    prompt = build_prompt(user_cat, user_note, weather, notes)
+    key    = cache_key(user_cat, user_note, weather, notes)
+    client = get_llm_client()
 
+    if wants_stream:
+        return Response(
+            stream_with_context(_stream_fragrance(client, prompt, key, fallback)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+    try:
+        with stage("llm_generate"):
+            note = client.generate(prompt, key=key)
+        return jsonify(generated_note=note, source="llm"), 200
     except Exception as e:
-        # 폴백: 라이브러리/키/네트워크 문제 등에서도 프런트는 흐름 확인 가능
-        mock = """{
-  "name": "Citrus Veil",
-  "category": "시트러스",
-  "mood": "상큼하고 맑은 초여름 바람",
-  "top": ["Bergamot", "Grapefruit", "Lemon"],
-  "middle": ["Jasmine", "Neroli", "Lavender"],
-  "base": ["Musk", "Cedarwood", "Amber"],
-  "description": "시트러스 중심의 투명한 구조에 플로럴의 부드러움을 더해 산뜻하게 마무리됩니다."
-}"""
-        return jsonify(generated_note=mock, error=str(e)), 200
+        note, source = fallback()
+        return jsonify(generated_note=note, source=source, error=str(e)), 200
 
 
 @api_bp.route('/api/my-recommendations', methods=['GET'])
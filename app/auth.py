@@ -1,11 +1,69 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from flask_login import login_user, logout_user, login_required
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask_login import current_user, login_user, logout_user, login_required
+from sqlalchemy.orm import make_transient_to_detached
 from werkzeug.security import generate_password_hash, check_password_hash
 from .models import User
 from .db import db
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+
+class _SessionUserCache:
+    """user_id -> (만료 시각, 세션에 묶이지 않은 User 사본). 프로세스별, LRU."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int):
+        with self._lock:
+            hit = self._data.get(user_id)
+            if hit is None or hit[0] < time.monotonic():
+                return None
+            self._data.move_to_end(user_id)
+            return hit[1]
+
+    def set(self, user_id: int, user, ttl: float) -> None:
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + ttl, user)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def forget(self, user_id: int) -> None:
+        with self._lock:
+            self._data.pop(user_id, None)
+
+
+_session_users = _SessionUserCache()
+
+
+def load_session_user(user_id: int):
+    """
+    Flask-Login user_loader. SESSION_USER_TTL 초 동안 사용자 행을 캐시해 인증 요청마다의 SELECT 를 없앤다.
+    캐시 적중 시 merge(load=False) 로 요청 세션에 붙임 (SQL 없음, 관계/갱신도 평소처럼 동작).
+    캐시는 프로세스별이라 로그아웃/계정 변경의 forget() 은 그 워커에만 적용되고, 다른 워커는
+    최대 TTL 초 동안 이전 행을 본다 → SQLite 운영 프로필(단일 호스트, users SELECT 가 쓰기 락과 경합)
+    에서만 켜고 TTL 은 짧게 둔다. MySQL 등 다른 DB 는 항상 DB 조회.
+    """
+    ttl = float(current_app.config.get("SESSION_USER_TTL") or 0)
+    if ttl <= 0 or current_app.extensions.get("sqlite_profile") != "tuned":
+        return db.session.get(User, user_id)
+    cached = _session_users.get(user_id)
+    if cached is not None:
+        return db.session.merge(cached, load=False)
+    user = db.session.get(User, user_id)
+    if user is not None:
+        snapshot = User(id=user.id, email=user.email, password=user.password, created=user.created)
+        make_transient_to_detached(snapshot)
+        _session_users.set(user_id, snapshot, ttl)
+    return user
+
 @auth_bp.route('/register', methods=['GET','POST'])
 def register():
     if request.method == 'POST':
@@ -47,6 +105,7 @@ def login():
 @auth_bp.route('/logout')
 @login_required
 def logout():
+    _session_users.forget(current_user.id)
     logout_user()
     return redirect(url_for('recommend.home'))
 
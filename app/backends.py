@@ -0,0 +1,269 @@
+# app/backends.py
+"""
+추천 백엔드 경계.
+
+  LocalBackend  : 이 프로세스의 Recommender (모델/인덱스를 워커마다 보유)
+  RemoteBackend : 별도 검색 서비스(flask retrieval serve) 여러 개에 라운드로빈으로 요청.
+                  연결은 replica 별로 풀링(keep-alive)하고, 실패한 replica 는 잠시 제외,
+                  모두 실패하면 RETRIEVAL_FALLBACK=local 일 때 프로세스 내 추천으로 폴백.
+
+RETRIEVAL_URLS 가 비어 있으면 LocalBackend.
+  RETRIEVAL_URLS=unix:/tmp/perfume-retrieval.0.sock,unix:/tmp/perfume-retrieval.1.sock
+  RETRIEVAL_URLS=http://127.0.0.1:8765,http://127.0.0.1:8766
+"""
+from __future__ import annotations
+import http.client
+import itertools
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from .metrics import Counter, register_metric
+
+RETRIEVAL_URLS            = os.getenv("RETRIEVAL_URLS", "")
+RETRIEVAL_CONNECT_TIMEOUT = float(os.getenv("RETRIEVAL_CONNECT_TIMEOUT", "0.5"))
+RETRIEVAL_TIMEOUT         = float(os.getenv("RETRIEVAL_TIMEOUT", "5"))
+RETRIEVAL_POOL_SIZE       = int(os.getenv("RETRIEVAL_POOL_SIZE", "8"))     # replica 당 유휴 연결 수
+RETRIEVAL_COOLDOWN        = float(os.getenv("RETRIEVAL_COOLDOWN", "5"))    # 실패한 replica 제외 시간(초)
+RETRIEVAL_FALLBACK        = os.getenv("RETRIEVAL_FALLBACK", "local")       # local | error
+
+REMOTE_CALLS = register_metric(Counter("perfume_retrieval_calls_total",
+                                       "Remote retrieval calls by replica and result"))
+
+
+class BackendError(RuntimeError):
+    """원격 검색 서비스 호출 실패 (폴백 불가/비활성)."""
+
+
+class RequestRejected(BackendError):
+    """replica 는 정상인데 이 요청만 실패 (4xx/500). 다른 replica/폴백으로 재시도하지 않는다."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+# replica 자체 문제로 보는 HTTP 상태 (그 외 4xx/500 은 요청 문제 → 쿨다운 없이 호출 측으로)
+_REPLICA_DOWN_STATUSES = frozenset({502, 503, 504})
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class LocalBackend:
+    """프로세스 내 Recommender. 요청 형식은 검색 서비스와 동일."""
+
+    name = "local"
+
+    def recommend(self, query: str, weather_desc: str = "", k: Optional[int] = None,
+                  keyword_query: str = "", seed: Optional[int] = None,
+                  filters: Optional[Dict] = None, taste: Optional[List[float]] = None,
+                  observe: bool = False) -> Dict:
+        return self.recommend_batch([dict(query=query, weather_desc=weather_desc, k=k,
+                                          keyword_query=keyword_query, seed=seed, filters=filters,
+                                          taste=taste, observe=observe)])[0]
+
+    def recommend_batch(self, requests: List[Dict]) -> List[Dict]:
+        """
+        [{query, weather_desc, k, keyword_query, seed, filters, taste, observe}]
+          -> [{items, filters, observation?}]
+        taste: 사용자 취향 벡터(list), observe: 결과로 취향 관측값도 계산 (app/taste.py)
+        """
+        from .recommender import get_recommender
+        return recommend_batch(get_recommender(), requests)
+
+
+def recommend_batch(rec, requests: List[Dict]) -> List[Dict]:
+    """
+    요청 여러 건을 한 번에: 쿼리 임베딩은 한 번의 encode 로 묶고 이후 검색/MMR 은 건별.
+    (검색 서비스와 LocalBackend 공용)
+    쿼리가 1개면(/recommend 1건, 검색 서비스 요청 스레드 1개) rec.encode_query → BatchingEncoder 가
+    동시 요청들과 묶는다. 서로 다른 쿼리가 여러 개인 진짜 배치만 직접 한 번에 encode.
+    """
+    import numpy as np
+    from .filters import Constraints
+    from .metrics import stage
+    from .recommender import RETURN_K
+    from .taste import observe
+    queries = [(r.get("query") or "").strip() for r in requests]
+    texts = list(dict.fromkeys(q for q in queries if q))
+    embs = {}
+    if len(texts) == 1 and rec.model is not None:
+        embs = {texts[0]: rec.encode_query(texts[0])}
+    elif texts and rec.model is not None:
+        with stage("query_encode"):
+            embs = dict(zip(texts, np.asarray(rec._encode_batch(texts), dtype="float32")))
+    out = []
+    for r, q in zip(requests, queries):
+        keyword_query = r.get("keyword_query") or ""
+        constraints = rec.parse_constraints(keyword_query, q).merge(Constraints.from_dict(r.get("filters")))
+        taste = np.asarray(r["taste"], dtype="float32") if r.get("taste") else None
+        items = rec.recommend(q, r.get("weather_desc") or "", k=int(r.get("k") or RETURN_K),
+                              constraints=constraints, keyword_query=keyword_query,
+                              seed=r.get("seed"), q_emb=embs.get(q), taste=taste)
+        result = {"items": items, "filters": constraints.to_dict()}
+        if r.get("observe"):
+            result["observation"] = observe(rec, [it["id"] for it in items])
+        out.append(result)
+    return out
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(RETRIEVAL_CONNECT_TIMEOUT)
+        sock.connect(self.unix_path)
+        sock.settimeout(self.timeout)
+        self.sock = sock
+
+
+class _Replica:
+    """replica 1개: 유휴 연결 풀 + 실패 시 쿨다운."""
+
+    def __init__(self, url: str, timeout: float, pool_size: int):
+        self.url = url
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+        self.down_until = 0.0
+        parts = urlsplit(url)
+        if parts.scheme == "unix":
+            self._factory = lambda: _UnixHTTPConnection(parts.path, timeout)
+        else:
+            host, port = parts.hostname or "127.0.0.1", parts.port or 80
+            self._factory = lambda: _TCPConnection(host, port, timeout)
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def post(self, path: str, body: Dict) -> Dict:
+        payload = _dumps(body)
+        try:
+            conn, reused = self._idle.get_nowait(), True
+        except queue.Empty:
+            conn, reused = self._factory(), False
+        try:
+            resp, data = self._roundtrip(conn, path, payload)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+            # 서비스 재시작 등으로 끊긴 유휴 연결 → 새 연결로 한 번만 재시도
+            conn = self._factory()
+            try:
+                resp, data = self._roundtrip(conn, path, payload)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                raise
+        if resp.status in _REPLICA_DOWN_STATUSES:
+            conn.close()
+            raise BackendError(f"{self.url}{path}: HTTP {resp.status}")
+        if resp.status != 200:
+            self._release(conn)  # 본문까지 읽었으므로 연결은 재사용 가능
+            raise RequestRejected(f"{self.url}{path}: HTTP {resp.status}: {data[:200]!r}", resp.status)
+        self._release(conn)
+        return json.loads(data)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)  # keep-alive 재사용
+        except queue.Full:
+            conn.close()
+
+    @staticmethod
+    def _roundtrip(conn: http.client.HTTPConnection, path: str, payload: bytes):
+        conn.request("POST", path, body=payload, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        return resp, resp.read()
+
+
+class _TCPConnection(http.client.HTTPConnection):
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), RETRIEVAL_CONNECT_TIMEOUT)
+        self.sock.settimeout(self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class RemoteBackend:
+    """검색 서비스 replica 들에 라운드로빈. 실패 시 다음 replica, 전부 실패 시 폴백."""
+
+    name = "remote"
+
+    def __init__(self, urls: List[str], timeout: float = RETRIEVAL_TIMEOUT,
+                 pool_size: int = RETRIEVAL_POOL_SIZE, fallback: str = RETRIEVAL_FALLBACK):
+        if not urls:
+            raise ValueError("RemoteBackend needs at least one URL")
+        self.replicas = [_Replica(u, timeout, pool_size) for u in urls]
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+        self.fallback = LocalBackend() if fallback == "local" else None
+
+    def _order(self) -> List[_Replica]:
+        with self._lock:
+            start = next(self._rr) % len(self.replicas)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        live = [r for r in ordered if r.available()]
+        if live or self.fallback is not None:
+            return live  # 모두 쿨다운이면 곧바로 폴백 (죽은 replica 에 타임아웃을 매번 지불하지 않음)
+        return ordered  # 폴백이 없으면 그래도 한 번씩 시도
+
+    def _call(self, path: str, body: Dict):
+        """
+        연결/타임아웃/프로토콜 오류와 502/503/504 만 replica 쿨다운 + 다음 replica.
+        요청 자체의 실패(4xx/500)는 RequestRejected 로 바로 올림 — 나쁜 요청 하나가
+        replica 를 전부 빼고 웹 워커에서 모델을 로드하는 로컬 폴백으로 떨어지지 않게.
+        """
+        last_error: Optional[Exception] = None
+        for replica in self._order():
+            try:
+                result = replica.post(path, body)
+                REMOTE_CALLS.inc(replica=replica.url, result="ok")
+                return result
+            except RequestRejected:
+                REMOTE_CALLS.inc(replica=replica.url, result="rejected")
+                raise
+            except (OSError, http.client.HTTPException, BackendError, ValueError) as e:
+                replica.down_until = time.monotonic() + RETRIEVAL_COOLDOWN
+                REMOTE_CALLS.inc(replica=replica.url, result="error")
+                last_error = e
+        raise BackendError(f"all retrieval replicas failed: {last_error}")
+
+    def recommend(self, query: str, weather_desc: str = "", k: Optional[int] = None,
+                  keyword_query: str = "", seed: Optional[int] = None,
+                  filters: Optional[Dict] = None, taste: Optional[List[float]] = None,
+                  observe: bool = False) -> Dict:
+        body = dict(query=query, weather_desc=weather_desc, k=k, keyword_query=keyword_query,
+                    seed=seed, filters=filters, taste=taste, observe=observe)
+        try:
+            return self._call("/recommend", body)
+        except BackendError as e:
+            if self.fallback is None or isinstance(e, RequestRejected):
+                raise
+            REMOTE_CALLS.inc(replica="local", result="fallback")
+            return self.fallback.recommend(**body)
+
+    def recommend_batch(self, requests: List[Dict]) -> List[Dict]:
+        try:
+            return self._call("/recommend_batch", {"requests": requests})["results"]
+        except BackendError as e:
+            if self.fallback is None or isinstance(e, RequestRejected):
+                raise
+            REMOTE_CALLS.inc(replica="local", result="fallback")
+            return self.fallback.recommend_batch(requests)
+
+
+@lru_cache(maxsize=1)
+def get_backend():
+    """RETRIEVAL_URLS 가 있으면 원격 검색 서비스, 없으면 프로세스 내 추천기."""
+    urls = [u.strip() for u in RETRIEVAL_URLS.split(",") if u.strip()]
+    return RemoteBackend(urls) if urls else LocalBackend()
@@ -0,0 +1,110 @@
+# app/catalog.py
+"""
+per_data.csv 셀 파싱 공용 유틸 (무거운 의존성 없음).
+Note 셀은 {"top":[...],"middle":[...],"base":[...]} 또는 [...] JSON,
+Categorys 셀은 JSON 리스트 또는 "Citrus, Fresh, ..." 콤마 텍스트가 섞여 있다.
+"""
+from __future__ import annotations
+import csv
+import json
+import math
+import re
+from typing import Dict, Iterator, List, Optional
+
+NOTE_POSITIONS = ("top", "middle", "base")
+_NOTE_KEY_ALIASES = {
+    "top": ("top", "topNotes", "Top"),
+    "middle": ("middle", "middleNotes", "Heart", "Middle"),
+    "base": ("base", "baseNotes", "Base"),
+}
+
+
+# pandas.read_csv 기본 결측 문자열 — pandas 없이 읽어도 Recommender._load(pandas)와 같은 값을 만들기 위해
+NA_STRINGS = frozenset({"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+                        "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+                        "nan", "null"})
+
+
+def cell(row: Dict, key: str) -> Optional[str]:
+    """iter_catalog_rows 행의 셀. pandas 가 NaN 으로 읽을 값은 None."""
+    v = row.get(key)
+    return None if v is None or v in NA_STRINGS else v
+
+
+def _is_missing(val) -> bool:
+    return val is None or (isinstance(val, float) and math.isnan(val))
+
+
+def parse_listish(val):
+    """CSV 셀 -> dict / list / None. JSON이 아니면 콤마 등으로 나눈 list."""
+    if _is_missing(val):
+        return None
+    s = str(val).strip()
+    if not s:
+        return None
+    if s.startswith("{") or s.startswith("["):
+        try:
+            return json.loads(s)
+        except Exception:
+            pass
+    parts = [p.strip() for p in re.split(r"[,/|·]", s)]
+    return [p for p in parts if p and p.lower() != "null"]
+
+
+def norm_list_or_json(val) -> str:
+    """임베딩/BM25용 평문: dict면 top/middle/base 순으로, list면 그대로 이어붙임."""
+    s = "" if _is_missing(val) else str(val)
+    if s and (s.strip().startswith("{") or s.strip().startswith("[")):
+        try:
+            v = json.loads(s)
+            if isinstance(v, dict):
+                bag = []
+                for k in ("top","middle","base","middleNotes","baseNotes","topNotes","Categorys","Note"):
+                    if k in v and isinstance(v[k], list):
+                        bag += [str(x) for x in v[k]]
+                if not bag:
+                    for _, vv in v.items():
+                        if isinstance(vv, list): bag += [str(x) for x in vv]
+                return " ".join(bag)
+            if isinstance(v, list):
+                return " ".join([str(x) for x in v])
+        except Exception:
+            pass
+    return s
+
+
+def doc_text(categorys, note) -> str:
+    """임베딩/BM25 문서 텍스트: 카테고리 평문 + 노트 평문."""
+    return (norm_list_or_json(categorys) + " " + norm_list_or_json(note)).strip()
+
+
+def structure_notes(val) -> Dict[str, List[str]]:
+    """Note 셀 -> {"top": [...], "middle": [...], "base": [...], "flat": [...]}."""
+    v = parse_listish(val)
+    out: Dict[str, List[str]] = {"top": [], "middle": [], "base": [], "flat": []}
+    if isinstance(v, dict):
+        for pos, keys in _NOTE_KEY_ALIASES.items():
+            for k in keys:
+                if isinstance(v.get(k), list):
+                    out[pos] = [str(x) for x in v[k] if str(x).strip()]
+                    break
+        if not any(out[p] for p in NOTE_POSITIONS):
+            out["flat"] = [str(x) for vv in v.values() if isinstance(vv, list) for x in vv]
+    elif isinstance(v, list):
+        out["flat"] = [str(x) for x in v if str(x).strip()]
+    return out
+
+
+def parse_categories(val) -> List[str]:
+    """Categorys 셀 -> ["citrus", ...] (원문 대소문자 유지)."""
+    v = parse_listish(val)
+    if not isinstance(v, list):
+        return []
+    return [str(c) for c in v if not isinstance(c, (dict, list)) and str(c).strip()]
+
+
+def iter_catalog_rows(csv_path: str) -> Iterator[dict]:
+    """pandas 없이 CSV 행(dict)을 순회 — 통계/인덱스 빌드용."""
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row
@@ -0,0 +1,291 @@
+# app/composer.py
+"""
+로컬 "AI 향수" 조합기 (LLM 없이 수 ms, 결정적).
+
+per_data.csv 의 Note/Categorys 에서 미리 계산한 통계를 쓴다.
+  - freq:        노트별 등장 향수 수                (V,)   int32
+  - pos:         노트별 top/middle/base 등장 횟수    (V, 3) uint16
+  - cooc:        노트 x 노트 동시 등장 횟수          (V, V) uint16
+  - note_accord: 노트 x 어코드(Categorys) 동시 등장  (V, C) uint16
+
+  flask composer build   # per_data.composer.npz 미리 생성 (없으면 첫 호출 때 메모리에서 빌드)
+"""
+from __future__ import annotations
+import json
+import os
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import AppGroup
+
+from .catalog import NOTE_POSITIONS, iter_catalog_rows, parse_categories, structure_notes
+from .note_vocab import get_note_vocab
+from .weather_utils import weather_bucket, weather_tags
+
+COMPOSER_MIN_COUNT = 2       # 이보다 드문 노트는 어휘에서 제외 (오타/일회성 노트)
+COMPOSER_NOTES_PER_POS = 4   # 응답 스키마: 위치별 3~6개
+COMPOSER_RETRY_AFTER = float(os.getenv("COMPOSER_RETRY_AFTER", "30"))  # 로드 실패 후 재시도 간격(초)
+
+# 어코드 -> (한국어 카테고리, 무드)
+ACCORD_KO = {
+    "citrus":       ("시트러스", "상큼하고 맑은"),
+    "woody":        ("우디", "차분하고 단단한"),
+    "floral":       ("플로럴", "화사하고 부드러운"),
+    "white floral": ("플로럴", "우아하고 포근한"),
+    "rose":         ("플로럴", "로맨틱한"),
+    "sweet":        ("스위트", "달콤하고 다정한"),
+    "vanilla":      ("스위트", "따뜻하고 달콤한"),
+    "fresh spicy":  ("스파이시", "생기 있고 경쾌한"),
+    "warm spicy":   ("스파이시", "따뜻하고 관능적인"),
+    "spicy":        ("스파이시", "또렷하고 따뜻한"),
+    "aromatic":     ("아로마틱", "깨끗하고 허브 같은"),
+    "green":        ("그린", "싱그럽고 풋풋한"),
+    "fruity":       ("프루티", "밝고 발랄한"),
+    "powdery":      ("파우더리", "보송하고 포근한"),
+    "musky":        ("머스크", "살결처럼 포근한"),
+    "amber":        ("앰버리", "깊고 따뜻한"),
+    "balsamic":     ("앰버리", "그윽하고 따뜻한"),
+    "oriental":     ("오리엔탈", "이국적이고 깊은"),
+    "aquatic":      ("아쿠아틱", "시원하고 투명한"),
+    "marine":       ("아쿠아틱", "시원하고 투명한"),
+    "ozonic":       ("아쿠아틱", "공기처럼 가벼운"),
+    "fresh":        ("프레시", "산뜻하고 가벼운"),
+    "leather":      ("레더", "세련되고 묵직한"),
+    "smoky":        ("스모키", "짙고 신비로운"),
+    "earthy":       ("어시", "흙내음처럼 차분한"),
+    "herbal":       ("허벌", "맑고 고요한"),
+}
+_WEATHER_MOOD = {
+    "rain": "비 오는 날", "snow": "눈 내리는 날", "cloud": "흐린 날",
+    "clear": "맑은 날", "haze": "안개 낀 날",
+}
+
+
+class NoteStats:
+    def __init__(self, vocab: List[str], freq: np.ndarray, pos: np.ndarray,
+                 cooc: np.ndarray, accords: List[str], note_accord: np.ndarray):
+        self.vocab = vocab
+        self.freq = freq
+        self.pos = pos
+        self.cooc = cooc
+        self.accords = accords
+        self.note_accord = note_accord
+        self.index = {n.lower(): i for i, n in enumerate(vocab)}
+        self.accord_index = {a: i for i, a in enumerate(accords)}
+
+    @classmethod
+    def build(cls, csv_path: str, min_count: int = COMPOSER_MIN_COUNT, vocab=None) -> "NoteStats":
+        """vocab(NoteVocab): 표기 변형을 대표 표기로 합쳐 집계 (Cardamon + Cardamom)."""
+        rows = []
+        surface: Dict[str, Counter] = {}
+        for row in iter_catalog_rows(csv_path):
+            notes = structure_notes(row.get("Note"))
+            if vocab is not None:
+                notes = vocab.canonical_notes(notes)
+            keyed = {p: [n.strip() for n in notes[p] if n.strip()] for p in NOTE_POSITIONS + ("flat",)}
+            for names in keyed.values():
+                for n in names:
+                    surface.setdefault(n.lower(), Counter())[n] += 1
+            accords = sorted({c.lower() for c in parse_categories(row.get("Categorys"))})
+            rows.append((keyed, accords))
+
+        doc_freq = Counter()
+        for keyed, _ in rows:
+            doc_freq.update({n.lower() for names in keyed.values() for n in names})
+        keys = sorted(k for k, c in doc_freq.items() if c >= min_count)
+        idx = {k: i for i, k in enumerate(keys)}
+        accords = sorted({a for _, acc in rows for a in acc})
+        aidx = {a: i for i, a in enumerate(accords)}
+
+        V, C = len(keys), len(accords)
+        freq = np.zeros(V, dtype=np.int32)
+        pos = np.zeros((V, 3), dtype=np.int32)
+        cooc = np.zeros((V, V), dtype=np.int32)
+        note_accord = np.zeros((V, C), dtype=np.int32)
+        for keyed, acc in rows:
+            ids = sorted({idx[n.lower()] for names in keyed.values() for n in names if n.lower() in idx})
+            if not ids:
+                continue
+            ids = np.asarray(ids)
+            freq[ids] += 1
+            cooc[np.ix_(ids, ids)] += 1
+            for p, name in enumerate(NOTE_POSITIONS):
+                pids = {idx[n.lower()] for n in keyed[name] if n.lower() in idx}
+                if pids:
+                    pos[sorted(pids), p] += 1
+            if acc:
+                note_accord[np.ix_(ids, [aidx[a] for a in acc])] += 1
+        np.fill_diagonal(cooc, 0)
+
+        vocab = [surface[k].most_common(1)[0][0] for k in keys]
+        cap = np.iinfo(np.uint16).max
+        return cls(vocab, freq, np.minimum(pos, cap).astype(np.uint16),
+                   np.minimum(cooc, cap).astype(np.uint16), accords,
+                   np.minimum(note_accord, cap).astype(np.uint16))
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp, vocab=np.asarray(self.vocab), freq=self.freq, pos=self.pos, cooc=self.cooc,
+            accords=np.asarray(self.accords), note_accord=self.note_accord,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NoteStats":
+        with np.load(path, allow_pickle=False) as z:
+            return cls([str(x) for x in z["vocab"]], z["freq"], z["pos"], z["cooc"],
+                       [str(x) for x in z["accords"]], z["note_accord"])
+
+
+class FragranceComposer:
+    """추천 향수들의 노트로 top/middle/base 피라미드를 조합 (LLM 응답과 같은 JSON 스키마)."""
+
+    def __init__(self, stats: NoteStats):
+        self.stats = stats
+        f = stats.freq.astype(np.float32)
+        # 코사인 정규화한 동시 등장 (cooc / sqrt(freq_i * freq_j))
+        denom = np.sqrt(np.outer(f, f))
+        self._assoc = np.divide(stats.cooc, denom, out=np.zeros_like(denom), where=denom > 0)
+        pos = stats.pos.astype(np.float32)
+        tot = pos.sum(axis=1, keepdims=True)
+        self._pos_share = np.where(tot > 0, pos / np.maximum(tot, 1), 1.0 / 3)
+        acc = stats.note_accord.astype(np.float32)
+        self._accord_share = acc / np.maximum(f[:, None], 1)
+        self._pop = np.log1p(f) / max(1.0, float(np.log1p(f.max()))) if f.size else f
+        # 어코드 사전확률(√): woody 처럼 흔한 어코드가 카테고리를 독식하지 않게
+        prior = acc.sum(axis=0) / max(1.0, float(acc.sum()))
+        self._accord_damp = 1.0 / np.sqrt(np.maximum(prior, 1e-6))
+        self._accord_known = np.array([a in ACCORD_KO for a in stats.accords], dtype=bool)
+
+    def _seed_weights(self, notes) -> np.ndarray:
+        w = np.zeros(len(self.stats.vocab), dtype=np.float32)
+        stack = list(notes or [])
+        while stack:
+            n = stack.pop()
+            if isinstance(n, (list, tuple)):
+                stack.extend(n)
+                continue
+            i = self.stats.index.get(str(n).strip().lower())
+            if i is not None:
+                w[i] += 1.0  # 여러 추천 향수에 공통인 노트일수록 강하게
+        return w
+
+    def _accord_pref(self, text: str, weather: str) -> np.ndarray:
+        a = np.zeros(len(self.stats.accords), dtype=np.float32)
+        words = " " + " ".join((text or "").lower().split()) + " "
+        for name, j in self.stats.accord_index.items():
+            if f" {name} " in words:
+                a[j] += 1.0
+        for tag in weather_tags(weather):
+            for name, j in self.stats.accord_index.items():
+                if tag in name:
+                    a[j] += 0.5
+        return a
+
+    def compose(self, user_cat: str, user_note: str, weather: str, notes) -> Dict:
+        s = self.stats
+        V = len(s.vocab)
+        if V == 0:
+            raise RuntimeError("empty note vocabulary")
+
+        seeds = self._seed_weights(notes)
+        pref = self._accord_pref(f"{user_cat} {user_note}", weather)
+
+        score = 0.01 * self._pop
+        if seeds.any():
+            score = score + seeds @ self._assoc / seeds.sum() + 0.5 * seeds / seeds.max()
+            pref = pref + (seeds @ self._accord_share) / seeds.sum()
+        if pref.any():
+            score = score + 0.3 * (self._accord_share @ (pref / pref.max()))
+
+        # 위치별로 번갈아 가장 어울리는 노트를 뽑아 피라미드 구성 (동점은 인덱스 순 → 결정적)
+        picks: Dict[str, List[int]] = {p: [] for p in NOTE_POSITIONS}
+        used = np.zeros(V, dtype=bool)
+        for _ in range(COMPOSER_NOTES_PER_POS):
+            for p, name in enumerate(NOTE_POSITIONS):
+                cand = np.where(used, -np.inf, score * self._pos_share[:, p])
+                i = int(np.argmax(cand))
+                if not np.isfinite(cand[i]):
+                    break
+                picks[name].append(i)
+                used[i] = True
+
+        chosen = [i for p in NOTE_POSITIONS for i in picks[p]]
+        accord_score = (self._accord_share[chosen].sum(axis=0) + pref) * self._accord_damp
+        accord_score = np.where(self._accord_known, accord_score, 0.0)  # 한국어 라벨이 있는 어코드만
+        accord = s.accords[int(np.argmax(accord_score))] if accord_score.any() else ""
+        category, mood = ACCORD_KO.get(accord, (accord or "시그니처", "은은한"))
+        bucket = weather_bucket(weather)
+        if bucket:
+            mood = f"{_WEATHER_MOOD[bucket]}에 어울리는 {mood} 분위기"
+        else:
+            mood = f"{mood} 분위기"
+
+        top, middle, base = ([s.vocab[i] for i in picks[p]] for p in NOTE_POSITIONS)
+        name = " ".join(x.split()[0] for x in (top[:1] + base[:1])) or "Untitled"
+        description = (
+            f"{'·'.join(top[:2])}의 첫인상에서 {'·'.join(middle[:2])}의 {category} 하트로 이어지고, "
+            f"{'·'.join(base[:2])}가 잔향을 감싸는 {mood}의 향입니다."
+        )
+        return {
+            "name": name, "category": category, "mood": mood,
+            "top": top, "middle": middle, "base": base, "description": description,
+        }
+
+    def compose_text(self, user_cat: str, user_note: str, weather: str, notes) -> str:
+        """/generate-custom-fragrance 의 generated_note 와 같은 형태(JSON 문자열)."""
+        return json.dumps(self.compose(user_cat, user_note, weather, notes), ensure_ascii=False, indent=2)
+
+
+def _paths(app) -> tuple[str, str]:
+    csv_path = os.path.normpath(os.path.join(app.root_path, "..", "per_data.csv"))
+    stats_path = app.config.get("COMPOSER_STATS_PATH") or os.path.splitext(csv_path)[0] + ".composer.npz"
+    return csv_path, stats_path
+
+
+@lru_cache(maxsize=1)
+def _load_composer() -> FragranceComposer:
+    """통계 파일이 CSV보다 새로우면 로드, 아니면 메모리에서 빌드 (수백 ms). 실패는 예외 (캐시 안 됨)."""
+    csv_path, stats_path = _paths(current_app)
+    if os.path.exists(stats_path) and os.path.getmtime(stats_path) >= os.path.getmtime(csv_path):
+        return FragranceComposer(NoteStats.load(stats_path))
+    return FragranceComposer(NoteStats.build(csv_path, vocab=get_note_vocab()))
+
+
+_retry_at = 0.0
+
+
+def get_composer() -> Optional[FragranceComposer]:
+    """
+    성공한 조합기만 프로세스 수명 동안 캐시. 실패하면 None (호출 측은 고정 목업으로 폴백)을 돌려주고
+    COMPOSER_RETRY_AFTER 초 동안은 다시 빌드하지 않다가 그 뒤 첫 호출에서 재시도.
+    """
+    global _retry_at
+    if _load_composer.cache_info().currsize == 0 and time.monotonic() < _retry_at:
+        return None
+    try:
+        return _load_composer()
+    except Exception:
+        _retry_at = time.monotonic() + COMPOSER_RETRY_AFTER
+        current_app.logger.exception("composer stats unavailable, retrying in %.0fs", COMPOSER_RETRY_AFTER)
+        return None
+
+
+composer_cli = AppGroup("composer", help="로컬 향수 조합기 통계")
+
+
+@composer_cli.command("build")
+@click.option("--min-count", default=COMPOSER_MIN_COUNT, show_default=True)
+def build_command(min_count: int):
+    """per_data.csv → 노트 통계(npz) 생성."""
+    csv_path, stats_path = _paths(current_app)
+    stats = NoteStats.build(csv_path, min_count=min_count, vocab=get_note_vocab())
+    stats.save(stats_path)
+    click.echo(f"{len(stats.vocab)} notes x {len(stats.accords)} accords -> {stats_path} "
+               f"({os.path.getsize(stats_path) / 1024:.0f} KiB)")
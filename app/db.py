@@ -1,5 +1,68 @@
+import os
+import sqlite3
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import event
 
 db = SQLAlchemy()
 migrate = Migrate()
+
+# --- SQLite 운영 프로필 (MySQL 환경변수가 없을 때의 sqlite:///app.db 폴백용) ---
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE       = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 2 ** 20)))  # 읽기를 페이지 캐시에서 바로
+SQLITE_CACHE_KB        = int(os.getenv("SQLITE_CACHE_KB", "16384"))              # 연결당 페이지 캐시
+SQLITE_POOL_SIZE       = int(os.getenv("SQLITE_POOL_SIZE", "8"))                 # 워커 스레드 수에 맞춤
+SQLITE_MAX_OVERFLOW    = int(os.getenv("SQLITE_MAX_OVERFLOW", "8"))
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))         # 연결별 prepared statement
+
+
+def _is_sqlite_file(uri: str) -> bool:
+    return uri.startswith("sqlite:") and ":memory:" not in uri and uri.rstrip("/") != "sqlite:"
+
+
+def sqlite_engine_options(options: dict) -> dict:
+    """
+    파일 SQLite 용 엔진 옵션. 로컬 파일이라 pool_pre_ping(체크아웃마다 SELECT 1)과
+    pool_recycle(연결 재생성 → prepared statement 캐시 소실)은 뺀다.
+    """
+    out = {k: v for k, v in options.items() if k not in ("pool_pre_ping", "pool_recycle")}
+    out.update(pool_size=SQLITE_POOL_SIZE, max_overflow=SQLITE_MAX_OVERFLOW, pool_timeout=10)
+    out["connect_args"] = dict(options.get("connect_args") or {},
+                               timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False,  # 풀이 스레드 간에 연결을 넘김
+                               cached_statements=SQLITE_STATEMENT_CACHE)
+    return out
+
+
+def _apply_pragmas(dbapi_conn, _record) -> None:
+    if not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")     # 읽기가 쓰기(커밋)를 기다리지 않음 (파일에 영구 저장됨)
+    cur.execute("PRAGMA synchronous=NORMAL")   # WAL 에서는 체크포인트 때만 fsync (전원 장애 시 마지막 커밋만 유실 가능)
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cur.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
+
+def init_db(app) -> None:
+    """
+    create_app() 의 DB 초기화. SQLITE_PROFILE=tuned(기본)이고 파일 SQLite 면 위 풀 옵션 +
+    연결마다 PRAGMA(WAL, synchronous=NORMAL, busy_timeout, mmap) 적용. default 면 기존 설정 그대로.
+    """
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    tuned = app.config.get("SQLITE_PROFILE", "tuned") == "tuned" and _is_sqlite_file(uri)
+    if tuned:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_engine_options(
+            app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.extensions["sqlite_profile"] = "tuned" if tuned else "default"  # auth.load_session_user 가 참조
+    db.init_app(app)
+    migrate.init_app(app, db)
+    if tuned:
+        with app.app_context():
+            for engine in db.engines.values():
+                if engine.dialect.name == "sqlite":
+                    event.listen(engine, "connect", _apply_pragmas)
@@ -0,0 +1,215 @@
+# app/embeddings.py
+"""
+카탈로그 임베딩 오프라인 빌드 (대용량 CSV 용).
+
+  flask embeddings build [--chunk 1024] [--workers 4] [--threads 1] [--restart]
+    → per_data.embeddings.npy  (N, d) float32, 미리 할당한 memmap 에 청크 단위로 기록
+      per_data.embeddings.json 진행 상태/메타 (CSV 지문, 모델, 완료 청크 목록)
+
+CSV 는 pandas 없이 행 단위로 스트리밍하고, 청크 텍스트를 워커 프로세스(spawn, 모델 1회 로드,
+torch 스레드 고정)에 넘겨 인코딩한다. 기록은 부모 프로세스 하나만 하며 청크를 flush 한 뒤에
+완료로 표시 → 중단 후 다시 실행하면 남은 청크만 인코딩(이어하기).
+Recommender 는 완성된 파일이 CSV/모델과 일치하면 corpus encode 대신 이 파일을 읽는다.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import AppGroup
+
+from .catalog import cell, doc_text, iter_catalog_rows
+
+EMBED_CHUNK   = int(os.getenv("EMBED_CHUNK", "1024"))
+EMBED_BATCH   = int(os.getenv("EMBED_BATCH", "64"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0"))   # 0 = 코어 수 / EMBED_THREADS
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "1"))   # 워커당 torch 스레드
+
+
+def csv_fingerprint(csv_path: str) -> str:
+    """CSV 내용 해시 (복사/배포로 mtime 이 바뀌어도 같은 파일이면 같은 값)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def iter_text_chunks(csv_path: str, chunk: int) -> Iterator[Tuple[int, List[str]]]:
+    """(시작 행, 텍스트 목록) 청크 스트림 — CSV 전체를 메모리에 올리지 않는다."""
+    start, texts = 0, []
+    for row in iter_catalog_rows(csv_path):
+        texts.append(doc_text(cell(row, "Categorys"), cell(row, "Note")))
+        if len(texts) == chunk:
+            yield start, texts
+            start, texts = start + chunk, []
+    if texts:
+        yield start, texts
+
+
+def count_rows(csv_path: str) -> int:
+    return sum(1 for _ in iter_catalog_rows(csv_path))
+
+
+class EmbeddingStore:
+    """<prefix>.npy (memmap) + <prefix>.json (메타/진행 상태)."""
+
+    def __init__(self, prefix: str):
+        self.npy_path = prefix + ".npy"
+        self.meta_path = prefix + ".json"
+
+    def read_meta(self) -> Optional[Dict]:
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_meta(self, meta: Dict) -> None:
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)  # 중단돼도 메타가 반쯤 쓰인 상태로 남지 않게
+
+    def load(self, rows: int, model: str, fingerprint: Optional[str] = None) -> Optional[np.ndarray]:
+        """완성되고 카탈로그/모델과 일치하는 임베딩 (mmap, 읽기 전용). 아니면 None."""
+        meta = self.read_meta()
+        if not meta or not meta.get("complete") or meta.get("rows") != rows or meta.get("model") != model:
+            return None
+        if fingerprint is not None and meta.get("csv") != fingerprint:
+            return None
+        try:
+            emb = np.load(self.npy_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return emb if emb.shape == (rows, meta.get("dim")) else None
+
+
+# ---------------- 워커 프로세스 ----------------
+_worker_model = None
+
+
+def _init_worker(model_name: str, device: str, threads: int) -> None:
+    global _worker_model
+    from sentence_transformers import SentenceTransformer
+    from .encoder import configure_torch_threads
+    configure_torch_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device=device)
+
+
+def _encode_chunk(start: int, texts: List[str], batch_size: int) -> Tuple[int, np.ndarray]:
+    emb = _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False,
+                               normalize_embeddings=True)
+    return start, np.asarray(emb, dtype=np.float32)
+
+
+def _model_dim(model_name: str, device: str) -> int:
+    from sentence_transformers import SentenceTransformer
+    return int(SentenceTransformer(model_name, device=device).get_sentence_embedding_dimension())
+
+
+def build_embeddings(csv_path: str, prefix: str, model_name: str, device: str = "cpu",
+                     chunk: int = EMBED_CHUNK, workers: int = EMBED_WORKERS,
+                     threads: int = EMBED_THREADS, batch_size: int = EMBED_BATCH,
+                     restart: bool = False, progress=None) -> Dict:
+    """
+    CSV -> <prefix>.npy 임베딩 (이어하기 지원). progress(done_rows, total_rows, rows_per_sec) 콜백.
+    반환: 최종 메타 dict (+ encoded_rows, seconds).
+    """
+    store = EmbeddingStore(prefix)
+    fingerprint = csv_fingerprint(csv_path)
+    meta = None if restart else store.read_meta()
+    resumable = (meta is not None and meta.get("csv") == fingerprint and meta.get("model") == model_name
+                 and meta.get("chunk") == chunk and os.path.exists(store.npy_path))
+    if resumable:
+        out = np.lib.format.open_memmap(store.npy_path, mode="r+")
+    else:
+        rows = count_rows(csv_path)
+        dim = _model_dim(model_name, device)
+        meta = {"csv": fingerprint, "model": model_name, "rows": rows, "dim": dim,
+                "chunk": chunk, "done": [], "complete": False}
+        out = np.lib.format.open_memmap(store.npy_path, mode="w+", dtype=np.float32,
+                                        shape=(max(rows, 0), dim))
+        store.write_meta(meta)
+
+    rows, done = meta["rows"], set(meta["done"])
+    already = sum(min(chunk, rows - s) for s in done)
+    pending = ((s, t) for s, t in iter_text_chunks(csv_path, chunk) if s not in done)
+    workers = workers or max(1, (os.cpu_count() or 1) // max(1, threads))
+
+    t0 = time.perf_counter()
+    encoded = 0
+
+    def finish(start: int, emb: np.ndarray) -> None:
+        nonlocal encoded
+        out[start:start + len(emb)] = emb
+        out.flush()  # 데이터를 먼저 디스크에 → 그 다음 완료 표시
+        done.add(start)
+        meta["done"] = sorted(done)
+        store.write_meta(meta)
+        encoded += len(emb)
+        if progress:
+            progress(already + encoded, rows, encoded / max(1e-9, time.perf_counter() - t0))
+
+    if workers == 1:
+        _init_worker(model_name, device, threads)
+        for start, texts in pending:
+            finish(*_encode_chunk(start, texts, batch_size))
+    else:
+        # spawn: 부모가 import 한 torch 상태를 물려받지 않음. 제출은 워커 수 x 2 개까지만 (메모리 상한)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(model_name, device, threads)) as ex:
+            inflight = set()
+            for start, texts in pending:
+                inflight.add(ex.submit(_encode_chunk, start, texts, batch_size))
+                if len(inflight) >= workers * 2:
+                    finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        finish(*fut.result())
+            for fut in wait(inflight).done:
+                finish(*fut.result())
+
+    meta["complete"] = len(done) == -(-rows // chunk)  # 모든 청크 완료
+    store.write_meta(meta)
+    del out
+    return dict(meta, encoded_rows=encoded, seconds=time.perf_counter() - t0)
+
+
+def embeddings_prefix(app) -> str:
+    csv_path = os.path.normpath(os.path.join(app.root_path, "..", "per_data.csv"))
+    return app.config.get("EMBEDDINGS_PATH") or os.path.splitext(csv_path)[0] + ".embeddings"
+
+
+embeddings_cli = AppGroup("embeddings", help="카탈로그 임베딩 오프라인 빌드")
+
+
+@embeddings_cli.command("build")
+@click.option("--chunk", default=EMBED_CHUNK, show_default=True, help="청크당 행 수")
+@click.option("--workers", default=EMBED_WORKERS, help="인코딩 프로세스 수 (0 = 코어 수 / threads)")
+@click.option("--threads", default=EMBED_THREADS, show_default=True, help="워커당 torch 스레드")
+@click.option("--batch-size", default=EMBED_BATCH, show_default=True)
+@click.option("--restart", is_flag=True, help="진행 상태를 무시하고 처음부터")
+def build_command(chunk: int, workers: int, threads: int, batch_size: int, restart: bool):
+    """CSV 를 청크 단위로 스트리밍하며 병렬 인코딩 → memmap .npy (중단 후 재실행 시 이어서)."""
+    from .recommender import DEFAULT_MODEL, FORCE_DEVICE
+    csv_path = os.path.normpath(os.path.join(current_app.root_path, "..", "per_data.csv"))
+    prefix = embeddings_prefix(current_app)
+
+    def progress(done: int, total: int, rps: float) -> None:
+        click.echo(f"  {done}/{total} rows ({done / max(1, total):.0%}), {rps:.0f} rows/s")
+
+    meta = build_embeddings(csv_path, prefix, DEFAULT_MODEL, FORCE_DEVICE, chunk=chunk,
+                            workers=workers, threads=threads, batch_size=batch_size,
+                            restart=restart, progress=progress)
+    rate = meta["encoded_rows"] / max(1e-9, meta["seconds"])
+    click.echo(f"{meta['rows']} rows x {meta['dim']} -> {prefix}.npy "
+               f"({meta['encoded_rows']} encoded in {meta['seconds']:.1f}s, {rate:.0f} rows/s"
+               f"{'' if meta['complete'] else ', INCOMPLETE'})")
@@ -0,0 +1,113 @@
+# app/encoder.py
+"""
+공유 SentenceTransformer 용 쿼리 인코딩 마이크로 배칭.
+
+스레드 서버에서 요청마다 batch=1 로 encode 를 동시에 부르면 torch intra-op 스레드끼리
+CPU 를 나눠 먹어 지연이 튄다. 대신 요청 스레드는 큐에 넣고 기다리고, 디스패처 스레드 1개가
+ENCODE_BATCH_WINDOW_MS 동안 모인 쿼리를 한 번의 encode 로 처리한다.
+대기 중인 요청이 1건뿐이면 창을 기다리지 않고 바로 인코딩한다.
+
+  ENCODE_BATCH_WINDOW_MS=0   → 배칭 끔 (락으로 직렬화한 직접 호출)
+  ENCODE_TORCH_THREADS=N     → 워커 프로세스의 torch intra-op 스레드 수 고정
+"""
+from __future__ import annotations
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+from .metrics import Histogram, register_metric
+
+ENCODE_BATCH_WINDOW_MS = float(os.getenv("ENCODE_BATCH_WINDOW_MS", "3"))
+ENCODE_MAX_BATCH       = int(os.getenv("ENCODE_MAX_BATCH", "32"))
+ENCODE_TORCH_THREADS   = int(os.getenv("ENCODE_TORCH_THREADS", "0"))  # 0 = torch 기본값
+
+BATCH_SIZE = register_metric(Histogram("perfume_encode_batch_size", "Queries per batched encode call",
+                                       buckets=(1, 2, 4, 8, 16, 32, 64)))
+
+
+def configure_torch_threads(n: int = ENCODE_TORCH_THREADS) -> None:
+    """torch 스레드 수 고정 (n <= 0 이면 그대로). 워커 수 x n <= 코어 수가 되도록 잡는다."""
+    if n <= 0:
+        return
+    try:
+        import torch
+        torch.set_num_threads(n)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass  # torch 없음 / interop 스레드가 이미 시작됨
+
+
+class BatchingEncoder:
+    """encode_fn(list[str]) -> (n, d) 를 감싸 단건 encode(text) 를 묶어 처리."""
+
+    def __init__(self, encode_fn: Callable[[Sequence[str]], np.ndarray],
+                 window_ms: float = ENCODE_BATCH_WINDOW_MS, max_batch: int = ENCODE_MAX_BATCH):
+        self.encode_fn = encode_fn
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._pid = None
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+
+    def _ensure_worker(self) -> None:
+        # fork 된 자식에는 디스패처 스레드가 없으므로 프로세스마다 새로 띄운다
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._waiting = 0
+            threading.Thread(target=self._run, name="encode-batcher", daemon=True).start()
+            self._pid = os.getpid()
+
+    def encode(self, text: str) -> np.ndarray:
+        if self.window <= 0:
+            with self._lock:
+                return np.asarray(self.encode_fn([text])[0])
+        self._ensure_worker()
+        fut: Future = Future()
+        with self._lock:
+            self._waiting += 1
+        self._queue.put((text, fut))
+        return fut.result()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        with self._lock:
+            alone = self._waiting <= 1
+        if alone:
+            return batch  # 동시 요청이 없으면 창을 기다리지 않음
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            with self._lock:
+                self._waiting -= len(batch)
+            texts = list(dict.fromkeys(t for t, _ in batch))  # 같은 쿼리는 한 번만
+            BATCH_SIZE.observe(len(texts))
+            try:
+                emb = np.asarray(self.encode_fn(texts))
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            row = {t: emb[i] for i, t in enumerate(texts)}
+            for t, fut in batch:
+                fut.set_result(row[t])
@@ -0,0 +1,270 @@
+# app/filters.py
+"""
+구조화 필터: 브랜드/연도/카테고리(Categorys)/노트 역색인 + 쿼리 제약 파서.
+
+  "2010년 이후 우디 계열" → year >= 2010, category ∋ woody
+  "90년대 향수"           → 1990 <= year <= 1999
+  "패출리는 없는 향수"     → note ∌ patchouli
+  "바닐라 향 말고 달콤한 거" → note ∌ vanilla
+  "without rose and musk" → note ∌ rose, musk
+  "no patchouli, Chanel"  → note ∌ patchouli, brand = Chanel
+
+카테고리 포함 필터는 명시적 표현("우디 계열", "우디만", "only woody", "woody only")일 때만.
+"상큼한", "a fresh scent" 같은 형용사는 하드 필터가 아니라 검색 점수(W_KEYWORD)로 반영된다.
+
+카탈로그 로드 시 FilterIndex 를 1회 만들고, 검색 때 bool 마스크로 바꿔
+FAISS(IDSelectorBitmap)와 BM25 점수에 같이 적용한다.
+"""
+from __future__ import annotations
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from .catalog import NOTE_POSITIONS
+
+# 한국어 표기 -> 영문 카테고리(어코드) 토큰. 명시적 표현("~ 계열", "~만")이면 포함 필터가 된다.
+CATEGORY_ALIASES: Dict[str, str] = {
+    "우디": "woody", "시트러스": "citrus", "플로럴": "floral", "꽃": "floral",
+    "프루티": "fruity", "과일": "fruity", "스위트": "sweet", "달콤": "sweet",
+    "스파이시": "spicy", "아로마틱": "aromatic", "그린": "green", "파우더리": "powdery",
+    "머스키": "musky", "앰버리": "amber", "발사믹": "balsamic", "아쿠아틱": "aquatic",
+    "마린": "marine", "오존": "ozonic", "프레시": "fresh", "상큼": "fresh",
+    "레더": "leather", "가죽": "leather", "스모키": "smoky", "어시": "earthy",
+    "허브": "herbal", "허벌": "herbal", "오리엔탈": "oriental", "구르망": "gourmand",
+    "트로피컬": "tropical", "알데하이드": "aldehydic",
+}
+
+# 한국어 표기 -> 영문 노트 토큰. 제외 표현("~ 없는", "no ~")에만 쓰인다.
+NOTE_ALIASES: Dict[str, str] = {
+    "머스크": "musk", "패출리": "patchouli", "파출리": "patchouli", "바닐라": "vanilla",
+    "장미": "rose", "로즈": "rose", "앰버": "amber", "라벤더": "lavender",
+    "베르가못": "bergamot", "샌달우드": "sandalwood", "백단": "sandalwood",
+    "시더": "cedar", "시더우드": "cedarwood", "삼나무": "cedar", "레몬": "lemon",
+    "오렌지": "orange", "자몽": "grapefruit", "자스민": "jasmine", "재스민": "jasmine",
+    "오드": "oud", "우드오일": "oud", "아가우드": "agarwood", "베티버": "vetiver",
+    "통카": "tonka", "통카빈": "tonka", "아이리스": "iris", "바이올렛": "violet",
+    "튜베로즈": "tuberose", "네롤리": "neroli", "민트": "mint", "페퍼": "pepper",
+    "후추": "pepper", "시나몬": "cinnamon", "계피": "cinnamon", "카다멈": "cardamom",
+    "생강": "ginger", "진저": "ginger", "코코넛": "coconut", "커피": "coffee",
+    "꿀": "honey", "허니": "honey", "담배": "tobacco", "타바코": "tobacco",
+    "인센스": "incense", "라벤다": "lavender", "복숭아": "peach",
+    "사과": "apple", "배": "pear", "무화과": "fig", "차": "tea", "녹차": "tea",
+    "이끼": "oakmoss", "오크모스": "oakmoss", "만다린": "mandarin", "유자": "yuzu",
+    "라임": "lime", "블랙커런트": "blackcurrant", "작약": "peony", "피오니": "peony",
+    "은방울꽃": "lily", "릴리": "lily", "프리지아": "freesia", "목련": "magnolia",
+}
+
+# 쿼리 파싱/자동완성 공용
+KO_ALIASES: Dict[str, str] = {**NOTE_ALIASES, **CATEGORY_ALIASES}
+_CATEGORY_WORDS = frozenset(CATEGORY_ALIASES.values())
+
+_NEG_EN = re.compile(r"\b(?:no|without|not|except|minus)\s+([a-z][a-z\- ]{1,30}?)(?=[,.;!?]|\s+and\b|$)", re.I)
+# "rose and musk", "rose, musk or oud": 부정 뒤에 이어지는 노트 나열
+_NEG_EN_MORE = re.compile(r"\s*(?:,\s*(?:and\s+|or\s+)?|\s+and\s+|\s+or\s+|\s+nor\s+)(?:no\s+)?([a-z][a-z\-]+)", re.I)
+# 비탐욕 그룹 → "패출리는 없는" 에서 조사(은/는/이/가)가 단어에 붙지 않음.
+# 노트와 부정 사이의 띄어 쓴 "향"/"노트"(+조사)는 건너뜀 ("바닐라 향 말고" → 바닐라, "사향 말고" → 사향)
+_NEG_KO = re.compile(r"([가-힣a-zA-Z]+?)\s*(?:은|는|이|가)?(?:\s+(?:향|노트)(?:은|는|이|가)?)?\s*"
+                     r"(?:없는|없이|빼고|제외|말고|싫어|싫은|빼줘)")
+# 명시적 카테고리 포함: "우디 계열", "우디만", "우디 계열로만" / "only woody", "woody only", "woody family"
+_INCLUDE_KO = re.compile(r"([가-힣]+?)\s*(?:계열|만\b|만\s|만$|으로만|로만)")
+_INCLUDE_EN = re.compile(r"\b(?:only|just|strictly|must be)\s+([a-z]+)|\b([a-z]+)\s+(?:only|family|accords?)\b", re.I)
+_YEAR_MIN = re.compile(r"((?:19|20)\d{2})\s*년?\s*(?:이후|부터|이상|after|since|onwards?|\+)|(?:after|since)\s+((?:19|20)\d{2})", re.I)
+_YEAR_MAX = re.compile(r"((?:19|20)\d{2})\s*년?\s*(?:이전|까지|이하|before)|(?:before|until)\s+((?:19|20)\d{2})", re.I)
+_DECADE   = re.compile(r"(?<!\d)((?:19|20)?\d)0\s*(?:년대|s\b)", re.I)  # 1990s, 90년대, 2000년대, 10s
+
+_MIN_TOKEN = 3  # 토큰 역색인 최소 길이 (of/de 등 잡음 방지)
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.split(r"[^0-9a-z]+", text.lower()) if len(t) >= _MIN_TOKEN]
+
+
+@dataclass
+class Constraints:
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+    brands: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    exclude_categories: List[str] = field(default_factory=list)
+    exclude_notes: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return any(v not in (None, []) for v in asdict(self).values())
+
+    def merge(self, other: "Constraints") -> "Constraints":
+        def _u(a, b):
+            return list(dict.fromkeys(a + b))
+        return Constraints(
+            year_min=max([y for y in (self.year_min, other.year_min) if y is not None], default=None),
+            year_max=min([y for y in (self.year_max, other.year_max) if y is not None], default=None),
+            brands=_u(self.brands, other.brands),
+            categories=_u(self.categories, other.categories),
+            exclude_categories=_u(self.exclude_categories, other.exclude_categories),
+            exclude_notes=_u(self.exclude_notes, other.exclude_notes),
+        )
+
+    def to_dict(self) -> Dict:
+        return {k: v for k, v in asdict(self).items() if v not in (None, [])}
+
+    @classmethod
+    def from_dict(cls, d: Optional[Dict]) -> "Constraints":
+        """요청 JSON 의 "filters" 객체 -> Constraints (모르는 키/잘못된 값은 무시)."""
+        c = cls()
+        if not isinstance(d, dict):
+            return c
+        for key in ("year_min", "year_max"):
+            try:
+                if d.get(key) not in (None, ""):
+                    setattr(c, key, int(d[key]))
+            except (TypeError, ValueError):
+                pass
+        for key in ("brands", "categories", "exclude_categories", "exclude_notes"):
+            val = d.get(key)
+            if isinstance(val, str):
+                val = val.split(",")
+            if isinstance(val, list):
+                setattr(c, key, [str(v).strip().lower() for v in val if str(v).strip()])
+        return c
+
+
+class FilterIndex:
+    """
+    역색인(토큰 -> 정렬된 int32 문서 번호) + 연도 배열.
+    노트/카테고리는 단어 토큰 단위로 색인해 "patchouli" 가 "Patchouli Leaf" 도 잡는다.
+    """
+
+    def __init__(self, n_docs: int, years: np.ndarray, brands: Dict[str, np.ndarray],
+                 categories: Dict[str, np.ndarray], notes: Dict[str, np.ndarray],
+                 token_map: Optional[Dict[str, str]] = None):
+        self.n_docs = n_docs
+        self.token_map = token_map or {}  # 노트 표기 변형 -> 대표 토큰 (NoteVocab.token_map)
+        self.years = years            # (N,) int16, 연도 없음 = 0
+        self.brands = brands          # 소문자 브랜드명 -> ids
+        self.categories = categories  # 카테고리 토큰 -> ids
+        self.notes = notes            # 노트 토큰 -> ids
+
+    @classmethod
+    def from_docs(cls, docs, token_map: Optional[Dict[str, str]] = None) -> "FilterIndex":
+        def _post(table: Dict[str, Set[int]]) -> Dict[str, np.ndarray]:
+            return {k: np.fromiter(sorted(v), dtype=np.int32, count=len(v)) for k, v in table.items()}
+
+        brands: Dict[str, Set[int]] = {}
+        cats: Dict[str, Set[int]] = {}
+        notes: Dict[str, Set[int]] = {}
+        years = np.zeros(len(docs), dtype=np.int16)
+        for i, d in enumerate(docs):
+            if d.year:
+                years[i] = d.year
+            if d.brand:
+                brands.setdefault(d.brand.strip().lower(), set()).add(i)
+            for c in d.categories:
+                for t in _tokens(c):
+                    cats.setdefault(t, set()).add(i)
+            for p in NOTE_POSITIONS + ("flat",):
+                for n in d.notes.get(p, []):
+                    for t in _tokens(n):
+                        notes.setdefault((token_map or {}).get(t, t), set()).add(i)
+        return cls(len(docs), years, _post(brands), _post(cats), _post(notes), token_map)
+
+    # ---------- 쿼리 파싱 ----------
+    def _resolve_term(self, term: str) -> tuple[List[str], List[str]]:
+        """단어(한/영) -> (카테고리 토큰, 노트 토큰) 중 색인에 있는 것."""
+        term = KO_ALIASES.get(term.strip(), term.strip()).lower()
+        toks = [self.token_map.get(t, t) for t in _tokens(term)]  # "no vanille" → vanilla
+        return ([t for t in toks if t in self.categories], [t for t in toks if t in self.notes])
+
+    def parse(self, text: str) -> Constraints:
+        c = Constraints()
+        s = (text or "").strip()
+        if not s:
+            return c
+        low = s.lower()
+
+        for m in _YEAR_MIN.finditer(s):
+            y = int(m.group(1) or m.group(2))
+            c.year_min = max(c.year_min or y, y)
+        for m in _YEAR_MAX.finditer(s):
+            y = int(m.group(1) or m.group(2))
+            c.year_max = min(c.year_max or y, y)
+        m = _DECADE.search(s)
+        if m and c.year_min is None and c.year_max is None:
+            head = int(m.group(1))
+            if len(m.group(1)) == 1:  # 두 자리 연대: 00/10/20 → 2000년대, 30~90 → 1900년대
+                head += 200 if head <= 2 else 190
+            start = head * 10
+            c.year_min, c.year_max = start, start + 9
+
+        excluded: Set[str] = set()
+        negs = []
+        for m in _NEG_EN.finditer(low):
+            negs.append(m.group(1))
+            pos = m.end()
+            while True:  # 이어지는 나열은 노트로 색인된 단어일 때만 ("without rose and a fresh opening" 방지)
+                more = _NEG_EN_MORE.match(low, pos)
+                if not more or not self._resolve_term(more.group(1))[1]:
+                    break
+                negs.append(more.group(1))
+                pos = more.end()
+        negs += [m.group(1) for m in _NEG_KO.finditer(s)]
+        for term in negs:
+            excluded.add(term.strip().lower())
+            cats, notes = self._resolve_term(term)
+            c.exclude_notes += [t for t in notes if t not in c.exclude_notes]
+            # 노트로 색인되지 않은 단어만 카테고리 제외로 (e.g. "no floral")
+            if not notes:
+                c.exclude_categories += [t for t in cats if t not in c.exclude_categories]
+
+        # 명시적 카테고리 표현만 포함 필터 (부정된 단어는 제외). 그냥 언급된 어코드는 점수로만 반영
+        words = [m.group(1) for m in _INCLUDE_KO.finditer(low)]
+        words += [m.group(1) or m.group(2) for m in _INCLUDE_EN.finditer(low)]
+        for w in words:
+            w = w.lower()
+            if w in excluded:
+                continue
+            alias = CATEGORY_ALIASES.get(w) or (w if w in _CATEGORY_WORDS else None)
+            if alias and alias in self.categories and alias not in c.exclude_categories:
+                if alias not in c.categories:
+                    c.categories.append(alias)
+
+        for brand in self.brands:
+            if len(brand) >= 3 and re.search(r"(?<![0-9a-z])" + re.escape(brand) + r"(?![0-9a-z])", low):
+                c.brands.append(brand)
+        return c
+
+    # ---------- 마스크 ----------
+    def _union(self, table: Dict[str, np.ndarray], keys: Iterable[str]) -> np.ndarray:
+        m = np.zeros(self.n_docs, dtype=bool)
+        for k in keys:
+            ids = table.get(k)
+            if ids is not None:
+                m[ids] = True
+        return m
+
+    def mask(self, c: Optional[Constraints]) -> Optional[np.ndarray]:
+        """제약을 만족하는 문서 bool 마스크 (제약 없음 = None). 포함 조건이 0건이면 완화."""
+        if not c:
+            return None
+        m = np.ones(self.n_docs, dtype=bool)
+        if c.year_min is not None:
+            m &= self.years >= c.year_min
+        if c.year_max is not None:
+            m &= (self.years > 0) & (self.years <= c.year_max)
+        if c.exclude_notes:
+            m &= ~self._union(self.notes, c.exclude_notes)
+        if c.exclude_categories:
+            m &= ~self._union(self.categories, c.exclude_categories)
+
+        hard = m
+        if c.brands:
+            m = m & self._union(self.brands, c.brands)
+        if c.categories:
+            # 여러 카테고리 언급은 모두 만족(AND)이 기본, 0건이면 OR로 완화
+            both = m.copy()
+            for cat in c.categories:
+                both &= self._union(self.categories, [cat])
+            m = both if both.any() else (m & self._union(self.categories, c.categories))
+        if not m.any():
+            m = hard  # 포함 조건 때문에 비면 연도/제외 조건만 유지
+        return m
@@ -0,0 +1,126 @@
+# app/http_utils.py
+"""
+JSON/HTML 응답 경량화.
+  - OrjsonProvider: app.json 을 orjson 기반으로 (없으면 Flask 기본 구현)
+  - init_compression: 일정 크기 이상 JSON/HTML 응답을 br/gzip 으로 압축
+  - parse_fields / select_fields: ?fields=Brand,Name 처럼 응답 필드 선택 (잘못된 값은 무시)
+"""
+from __future__ import annotations
+import gzip
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except Exception:
+    orjson = None  # 미설치 시 표준 json 사용
+
+try:
+    import brotli
+except Exception:
+    brotli = None  # 미설치 시 gzip만 사용
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    orjson 으로 직렬화. 날짜/Decimal 등은 Flask 기본 규칙(self.default)을 그대로 따른다.
+    orjson 이 표현 못 하는 옵션(ensure_ascii, separators 등)이 오면 기본 구현으로 위임.
+    """
+
+    def _orjson_opts(self, kwargs: dict) -> int | None:
+        if orjson is None:
+            return None
+        opts = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        indent = kwargs.pop("indent", None)
+        if indent:
+            if indent != 2:
+                return None
+            opts |= orjson.OPT_INDENT_2
+        if kwargs.pop("sort_keys", False):
+            opts |= orjson.OPT_SORT_KEYS
+        kwargs.pop("default", None)
+        return None if kwargs else opts
+
+    def _dumps_bytes(self, obj, **kwargs) -> bytes | None:
+        opts = self._orjson_opts(dict(kwargs))
+        if opts is None:
+            return None
+        try:
+            return orjson.dumps(obj, default=self.default, option=opts)
+        except TypeError:
+            return None  # 키 정렬 불가(혼합 타입 키) 등은 기본 구현으로
+
+    def dumps(self, obj, **kwargs) -> str:
+        data = self._dumps_bytes(obj, **kwargs)
+        if data is None:
+            return super().dumps(obj, **kwargs)
+        return data.decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+        if self.sort_keys:
+            dump_args["sort_keys"] = True
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args["indent"] = 2
+        data = self._dumps_bytes(obj, **dump_args)
+        if data is None:
+            return super().response(obj)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def _accepted_encoding() -> str | None:
+    accept = request.accept_encodings
+    if brotli is not None and accept["br"]:
+        return "br"
+    if accept["gzip"]:
+        return "gzip"
+    return None
+
+
+def init_compression(app) -> None:
+    """after_request 훅 등록. 설정: COMPRESS_MIN_SIZE, COMPRESS_LEVEL, COMPRESS_MIMETYPES."""
+    min_size = int(app.config.get("COMPRESS_MIN_SIZE", 1024))
+    level = int(app.config.get("COMPRESS_LEVEL", 6))
+    mimetypes = set(app.config.get("COMPRESS_MIMETYPES", ("application/json", "text/html")))
+
+    @app.after_request
+    def _compress(resp):
+        if (resp.status_code < 200 or resp.status_code >= 300
+                or resp.direct_passthrough or resp.is_streamed
+                or resp.mimetype not in mimetypes
+                or "Content-Encoding" in resp.headers):
+            return resp
+        resp.vary.add("Accept-Encoding")
+        data = resp.get_data()
+        if len(data) < min_size:
+            return resp
+        encoding = _accepted_encoding()
+        if encoding is None:
+            return resp
+        if encoding == "br":
+            # br quality 는 0~11, gzip 레벨(1~9)과 비슷한 속도대로 맞춤
+            body = brotli.compress(data, quality=min(11, max(0, level - 1)))
+        else:
+            body = gzip.compress(data, compresslevel=level)
+        resp.set_data(body)
+        resp.headers["Content-Encoding"] = encoding
+        return resp
+
+
+def parse_fields(fields) -> list[str]:
+    """fields="Brand,Name" 또는 ["Brand", "Name"] -> 키 목록. 문자열이 아닌 값은 무시 (요청 본문 그대로 받음)."""
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    elif not isinstance(fields, list):
+        return []
+    return [f.strip() for f in fields if isinstance(f, str) and f.strip()]
+
+
+def select_fields(items: list[dict], fields) -> list[dict]:
+    """fields (parse_fields 형식) 에 있는 키만 남긴다. 비어 있거나 잘못된 값이면 그대로."""
+    keep = parse_fields(fields)
+    if not keep:
+        return items
+    return [{k: it[k] for k in keep if k in it} for it in items]
@@ -0,0 +1,249 @@
+# app/image_variants.py
+"""
+노트 이미지 썸네일 파이프라인 (오프라인 빌드 + 서빙용 manifest).
+
+  flask note-images build-variants [--size 160] [--quality 80]
+
+static/picture 원본을 작은 WEBP로 줄여 `<slug>.<해시>.webp` 로 저장하고,
+manifest.json 에 slug -> 해시 파일명 매핑을 기록한다.
+파일명이 내용 해시라서 /note-img/v/<파일명> 은 immutable 캐시가 가능하다.
+"""
+from __future__ import annotations
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .metrics import cache_event
+
+VARIANT_MANIFEST = "manifest.json"
+VARIANT_DEFAULT_SIZE = 160      # 팝업 썸네일(60px)의 고해상도 화면 대응 여유
+VARIANT_DEFAULT_QUALITY = 80
+
+
+def _encode_webp(src_path: str, size: int, quality: int) -> bytes:
+    from PIL import Image  # pip install Pillow (빌드 시에만 필요)
+
+    with Image.open(src_path) as im:
+        im.draft("RGB", (size, size))  # JPEG는 디코딩 단계에서 미리 축소
+        im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+        im.thumbnail((size, size))
+        buf = io.BytesIO()
+        im.save(buf, "WEBP", quality=quality, method=6)
+        return buf.getvalue()
+
+
+def build_note_variants(src_dir: str, out_dir: str,
+                        size: int = VARIANT_DEFAULT_SIZE,
+                        quality: int = VARIANT_DEFAULT_QUALITY) -> dict:
+    """
+    src_dir 의 노트 이미지를 썸네일 WEBP로 변환해 out_dir 에 저장하고 manifest를 리턴.
+    이미 같은 해시 파일이 있으면 건너뛰고, manifest에 없는 옛 변형은 삭제한다.
+    """
+    from .images import NoteImageIndex  # slug 규칙/중복 확장자 처리를 그대로 재사용
+
+    index = NoteImageIndex(src_dir, check_interval=float("inf"))
+    os.makedirs(out_dir, exist_ok=True)
+
+    sources = dict(index.slug_items())
+    sources["_placeholder"] = index.placeholder
+
+    variants: dict[str, dict] = {}
+    failed: list[str] = []
+    for slug, filename in sorted(sources.items()):
+        src_path = os.path.join(src_dir, filename)
+        try:
+            data = _encode_webp(src_path, size, quality)
+        except Exception:
+            failed.append(filename)  # 깨진 파일/미지원 포맷은 원본 서빙으로 남김
+            continue
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        out_name = f"{slug}.{digest}.webp"
+        out_path = os.path.join(out_dir, out_name)
+        if not os.path.exists(out_path):
+            with open(out_path, "wb") as f:
+                f.write(data)
+        variants[slug] = {"file": out_name, "src": filename, "bytes": len(data)}
+
+    keep = {v["file"] for v in variants.values()} | {VARIANT_MANIFEST}
+    for name in os.listdir(out_dir):
+        if name.endswith(".webp") and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+
+    manifest = {"size": size, "quality": quality, "variants": variants, "failed": failed}
+    tmp = os.path.join(out_dir, VARIANT_MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, os.path.join(out_dir, VARIANT_MANIFEST))
+    return manifest
+
+
+class VariantManifest:
+    """
+    빌드된 manifest.json 을 읽어 원본 파일명 -> 해시 파일명 매핑을 제공.
+    manifest 파일 mtime이 바뀌면(재빌드) 다시 읽는다.
+    """
+
+    def __init__(self, out_dir: str, check_interval: float = 5.0):
+        self.out_dir = out_dir
+        self.path = os.path.join(out_dir, VARIANT_MANIFEST)
+        self.check_interval = check_interval
+        self._by_src: dict[str, str] = {}
+        self._placeholder: str | None = None
+        self._mtime: float | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+            with open(self.path, encoding="utf-8") as f:
+                variants = json.load(f).get("variants") or {}
+        except (OSError, ValueError):
+            mtime, variants = None, {}
+        self._by_src = {v["src"]: v["file"] for k, v in variants.items() if k != "_placeholder"}
+        self._placeholder = (variants.get("_placeholder") or {}).get("file")
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+
+    def _refresh_if_stale(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                self._load()
+
+    def lookup(self, src_filename: str | None) -> str | None:
+        """원본 파일명(None이면 플레이스홀더)의 해시 변형 파일명. 빌드 전이면 None."""
+        self._refresh_if_stale()
+        if src_filename is None:
+            return self._placeholder
+        return self._by_src.get(src_filename)
+
+    def __bool__(self) -> bool:
+        self._refresh_if_stale()
+        return bool(self._by_src)
+
+
+# ---------------- 스프라이트 (카드 1장 = 요청 1번) ----------------
+SPRITE_TILE = 120               # 팝업 60px 의 2배 밀도
+SPRITE_MAX_COLS = 8
+SPRITE_DIR = "sprites"
+SPRITE_MAX_FILES = int(os.getenv("SPRITE_MAX_FILES", "2048"))  # 디스크 상한 (넘으면 오래 안 쓴 것부터 삭제)
+
+
+def build_sprite(paths: list[str], tile: int = SPRITE_TILE,
+                 quality: int = VARIANT_DEFAULT_QUALITY) -> tuple[bytes, int, int]:
+    """이미지들을 tile x tile 격자로 이어붙인 WEBP 바이트와 (cols, rows)."""
+    from PIL import Image
+
+    cols = max(1, min(SPRITE_MAX_COLS, len(paths)))
+    rows = max(1, -(-len(paths) // cols))
+    sheet = Image.new("RGBA", (cols * tile, rows * tile), (0, 0, 0, 0))
+    for i, path in enumerate(paths):
+        with Image.open(path) as im:
+            im = im.convert("RGBA")
+            im.thumbnail((tile, tile))
+            # 타일 중앙 정렬 (프론트는 object-fit: cover 대신 contain 처럼 보임)
+            x = (i % cols) * tile + (tile - im.width) // 2
+            y = (i // cols) * tile + (tile - im.height) // 2
+            sheet.paste(im, (x, y))
+    buf = io.BytesIO()
+    sheet.save(buf, "WEBP", quality=quality, method=4)
+    return buf.getvalue(), cols, rows
+
+
+class SpriteCache:
+    """
+    변형 파일명 집합 -> 스프라이트(디스크 + 메모리 LRU).
+    같은 노트 조합(같은 향수/자주 함께 나오는 노트)은 재생성 없이 재사용한다.
+    디스크도 max_files 개까지만: 쓸 때마다 mtime 을 갱신하고, 새로 만들어 상한을 넘으면
+    mtime 이 오래된 파일부터 90% 까지 지운다 (임의 조합 요청으로 디스크가 차지 않게).
+    """
+
+    def __init__(self, variants: VariantManifest, max_entries: int = 512,
+                 max_files: int = SPRITE_MAX_FILES):
+        self.variants = variants
+        self.dir = os.path.join(variants.out_dir, SPRITE_DIR)
+        self.max_entries = max_entries
+        self.max_files = max_files
+        self._lru: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, files: list[str]) -> dict:
+        """files(변형 파일명, 순서 유지) 의 스프라이트 메타 {file, tile, cols, rows}."""
+        key = hashlib.sha256("\n".join(files).encode("utf-8")).hexdigest()[:20]
+        with self._lock:
+            meta = self._lru.get(key)
+        name = f"{key}.webp"
+        path = os.path.join(self.dir, name)
+        if meta is not None and self._touch(path):  # 다른 워커가 지웠으면 다시 빌드
+            cache_event("sprite", True)
+            with self._lock:
+                self._lru[key] = meta
+                self._lru.move_to_end(key)
+            return meta
+        cache_event("sprite", False)
+
+        cols = max(1, min(SPRITE_MAX_COLS, len(files)))
+        rows = max(1, -(-len(files) // cols))
+        if not self._touch(path):
+            data, cols, rows = build_sprite(
+                [os.path.join(self.variants.out_dir, f) for f in files]
+            )
+            os.makedirs(self.dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._prune()
+
+        meta = {"file": name, "tile": SPRITE_TILE, "cols": cols, "rows": rows}
+        with self._lock:
+            self._lru[key] = meta
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+        return meta
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def _prune(self) -> None:
+        try:
+            entries = [e for e in os.scandir(self.dir) if e.name.endswith(".webp")]
+        except OSError:
+            return
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries[:len(entries) - int(self.max_files * 0.9)]:
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass  # 다른 워커가 먼저 지움
+
+    def read_base64(self, files: list[str]) -> dict[str, str]:
+        """변형 파일명 -> data URI (JSON 번들 모드)."""
+        out = {}
+        for f in files:
+            with open(os.path.join(self.variants.out_dir, f), "rb") as fh:
+                out[f] = "data:image/webp;base64," + base64.b64encode(fh.read()).decode("ascii")
+        return out
@@ -1,29 +1,45 @@
 # app/images.py
 from __future__ import annotations
+import json
 import os
+import re
+import threading
+import time
 import unicodedata
-from flask import Blueprint, current_app, send_from_directory
+import click
+from flask import (Blueprint, current_app, jsonify, redirect, request,
+                   send_from_directory, url_for)
 
-images_bp = Blueprint("images_bp", __name__)  # url_prefix 없음: /note-img/<slug>
+from .admission import admission
+from .image_variants import (SPRITE_DIR, VARIANT_DEFAULT_QUALITY, VARIANT_DEFAULT_SIZE,
+                             SpriteCache, VariantManifest, build_note_variants)
+
+# url_prefix 없음: /note-img/<slug>, CLI: flask note-images ...
+images_bp = Blueprint("images_bp", __name__, cli_group="note-images")
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365  # 1년
+BULK_MAX_SLUGS = 64                     # 카드 1장의 Top/Middle/Base 노트를 넉넉히 커버
 
 # 서버가 지원할 확장자 우선순위 (앞순위가 먼저 탐색)
 NOTE_IMG_EXTS = ("webp", "jpg", "jpeg", "png")
 
+# 플레이스홀더 후보 (앞순위 우선). 현재 폴더에는 확장자 없는 _placeholder 만 있음
+PLACEHOLDER_NAMES = ("_placeholder.jpg", "_placeholder.png", "_placeholder")
+PLACEHOLDER_URL = "/note-img/_placeholder"  # 인덱스에 없는 slug → 플레이스홀더 응답
 
-def _static_picture_dir() -> str:
-    """
-    이미지 폴더 경로를 반환.
-    기본값: <프로젝트>/static/picture
-    필요하다면 app.config['PICTURE_DIR'] 로 오버라이드 가능.
-    """
-    # current_app.static_folder == "<프로젝트>/static"
-    base = current_app.config.get("PICTURE_DIR")
-    if base:
-        return base
-    return os.path.join(current_app.static_folder, "picture")
+# 이미지가 없을 때 떼어 보는 앞 수식어 (산지/색/상태). 이 목록에 있는 단어만 뗀다
+# → "Blood Grapefruit" → Grapefruit, 하지만 "Frankincense resin" 은 resin 으로 가지 않음
+NOTE_MODIFIERS = frozenset("""
+    african american arabian bourbon brazilian bulgarian burmese calabrian california cambodian
+    chinese egyptian english florentine french haitian himalayan indian indonesian italian jamaican
+    japanese javanese madagascar mediterranean mexican moroccan mysore persian peruvian provencal
+    russian sicilian spanish sri lankan tahitian turkish tunisian virginia
+    black blue brown coral golden gray grey green pink purple red white yellow
+    bitter blood candied crushed dried exotic fresh frosted gum roasted smoked sweet toasted wild
+""".split())
 
 
-def _slugify(text: str) -> str:
+def slugify_note(text: str) -> str:
     """
     프론트와 동일한 규칙으로 슬러그화.
     (NFKD 정규화 -> ASCII 탈락 -> 소문자 -> 비영숫자 '-' 치환 -> 연속 '-' 정리)
@@ -38,48 +54,326 @@ def _slugify(text: str) -> str:
     return s
 
 
+class NoteImageIndex:
+    """
+    static/picture 의 slug -> 파일명 인덱스.
+    앱 시작 시 1회 스캔하고, 이후 요청은 dict 조회만 한다.
+    폴더 mtime이 바뀌면(파일 추가/삭제/이름변경) 다음 조회 때 다시 스캔.
+    manifest_path 가 있으면 스캔 결과를 JSON으로 저장/재사용한다.
+    """
+
+    def __init__(self, dir_path: str, manifest_path: str | None = None,
+                 check_interval: float = 5.0):
+        self.dir_path = dir_path
+        self.manifest_path = manifest_path
+        self.check_interval = check_interval
+        self._exact: dict[str, str] = {}   # 파일명 베이스(원문) -> 파일명
+        self._slugs: dict[str, str] = {}   # slugify_note(베이스) -> 파일명
+        self._placeholder = PLACEHOLDER_NAMES[0]
+        self._mtime: float | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._build()
+
+    # ---------- 빌드 ----------
+    def _dir_mtime(self) -> float | None:
+        try:
+            return os.stat(self.dir_path).st_mtime
+        except OSError:
+            return None
+
+    def _build(self) -> None:
+        mtime = self._dir_mtime()
+        data = self._load_manifest(mtime)
+        if data is None:
+            data = self._scan()
+            self._save_manifest(mtime, data)
+        self._exact = data["exact"]
+        self._slugs = data["slugs"]
+        self._placeholder = data["placeholder"]
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+
+    def _scan(self) -> dict:
+        try:
+            names = sorted(os.listdir(self.dir_path))
+        except FileNotFoundError:
+            names = []
+
+        rank = {ext: i for i, ext in enumerate(NOTE_IMG_EXTS)}
+        exact: dict[str, str] = {}
+        slugs: dict[str, str] = {}
+        best: dict[str, tuple] = {}
+        for name in names:
+            base, ext = os.path.splitext(name)
+            ext = ext.lstrip(".").lower()
+            if ext not in rank:
+                continue  # .html, 확장자 없는 파일 등은 제외
+            # 같은 베이스의 중복 확장자(Iso E Super.jpg/.png)는 NOTE_IMG_EXTS 순위로 선택
+            key = (rank[ext], name)
+            if base not in best or key < best[base]:
+                best[base] = key
+                exact[base] = name
+        for base in sorted(exact, key=lambda b: best[b]):
+            slugs.setdefault(slugify_note(base), exact[base])
+
+        placeholder = next(
+            (p for p in PLACEHOLDER_NAMES if p in names), PLACEHOLDER_NAMES[0]
+        )
+        return {"exact": exact, "slugs": slugs, "placeholder": placeholder}
+
+    # ---------- manifest ----------
+    def _load_manifest(self, mtime: float | None) -> dict | None:
+        if not self.manifest_path or mtime is None:
+            return None
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("dir_mtime") != mtime or data.get("dir_path") != self.dir_path:
+            return None
+        return data
+
+    def _save_manifest(self, mtime: float | None, data: dict) -> None:
+        if not self.manifest_path or mtime is None:
+            return
+        payload = dict(data, dir_mtime=mtime, dir_path=self.dir_path)
+        tmp = self.manifest_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp, self.manifest_path)
+        except OSError:
+            pass  # manifest는 선택 사항: 쓰기 실패해도 메모리 인덱스로 동작
+
+    # ---------- 조회 ----------
+    def refresh_if_stale(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            if self._dir_mtime() != self._mtime:
+                self._build()
+
+    def lookup(self, slug: str) -> str | None:
+        """slug에 해당하는 파일명(없으면 None)."""
+        self.refresh_if_stale()
+        return self._exact.get(slug) or self._slugs.get(slug.lower())
+
+    def slug_items(self):
+        """(slug, 파일명) 목록 — 썸네일 빌드 등 일괄 처리용."""
+        self.refresh_if_stale()
+        return list(self._slugs.items())
+
+    @property
+    def placeholder(self) -> str:
+        return self._placeholder
+
+
+def init_note_image_index(app) -> NoteImageIndex:
+    """
+    create_app()에서 호출: 인덱스를 1회 빌드해 app.extensions에 보관.
+    이미지 폴더 기본값: <프로젝트>/static/picture (app.config['PICTURE_DIR'] 로 오버라이드)
+    """
+    base = app.config.get("PICTURE_DIR") or os.path.join(app.static_folder, "picture")
+    index = NoteImageIndex(
+        base,
+        manifest_path=app.config.get("NOTE_IMAGE_MANIFEST") or None,
+        check_interval=float(app.config.get("NOTE_IMAGE_INDEX_CHECK_SECS", 5.0)),
+    )
+    app.extensions["note_image_index"] = index
+    variants = VariantManifest(_variants_dir(app), check_interval=index.check_interval)
+    app.extensions["note_image_variants"] = variants
+    app.extensions["note_image_sprites"] = SpriteCache(variants)
+    return index
+
+
+def _variants_dir(app) -> str:
+    return app.config.get("NOTE_IMAGE_VARIANTS_DIR") or os.path.join(
+        app.static_folder, "picture_variants"
+    )
+
+
+def note_image_resolver(app, vocab=None):
+    """
+    노트명 -> (slug, 이미지 URL) 함수. 카탈로그 로드 시 노트마다 1회 호출해
+    응답에 검증된 URL을 박아 두고, 이미지가 없으면 플레이스홀더 URL을 준다.
+    vocab(NoteVocab)이 있으면 같은 노트의 다른 표기 이미지도 찾는다 (Cardamon → Cardamom.jpg).
+    괄호 설명을 뗀 이름, NOTE_MODIFIERS 에 있는 앞 수식어를 뗀 이름 순으로 한 번 더 찾는다
+    ("Ambrette (Musk Mallow)" → Ambrette, "Blood Grapefruit" → Grapefruit).
+    """
+    index = app.extensions.get("note_image_index") or init_note_image_index(app)
+
+    def _candidates(name: str):
+        base = re.sub(r"\s*\([^)]*\)", "", name).strip()
+        words = base.split()
+        stripped = []
+        while len(words) > 1 and slugify_note(words[0]) in NOTE_MODIFIERS:
+            words = words[1:]
+            stripped.append(" ".join(words))
+        for n in [name, base] + stripped:
+            if n:
+                yield from (vocab.variants(n) if vocab is not None else (n,))
+
+    def resolve(name: str) -> tuple[str, str]:
+        for cand in _candidates(name):
+            slug = slugify_note(cand)
+            if slug and index.lookup(slug):
+                return slug, f"/note-img/{slug}"
+        return slugify_note(name), PLACEHOLDER_URL
+
+    return resolve
+
+
+def _note_image_index() -> NoteImageIndex:
+    index = current_app.extensions.get("note_image_index")
+    if index is None:
+        index = init_note_image_index(current_app)
+    return index
+
+
 def _resolve_note_image(slug: str) -> tuple[str, str]:
     """
     주어진 slug에 대해 실제 파일명을 찾아서 반환한다.
     (dir_path, filename) 튜플을 리턴. 없으면 플레이스홀더를 리턴.
     """
-    dir_path = _static_picture_dir()
-
-    # 1) 정확히 같은 이름의 파일부터 (확장자 우선순위대로)
-    for ext in NOTE_IMG_EXTS:
-        candidate = f"{slug}.{ext}"
-        full = os.path.join(dir_path, candidate)
-        if os.path.exists(full):
-            return dir_path, candidate
+    index = _note_image_index()
+    filename = index.lookup(slug)
+    return index.dir_path, (filename or index.placeholder)
 
-    # 2) 파일명 대소문자/유니코드 차이를 느슨하게 매칭
-    try:
-        names = os.listdir(dir_path)
-    except FileNotFoundError:
-        names = []
-
-    slug_lower = slug.lower()
-    for name in names:
-        base, ext = os.path.splitext(name)
-        if ext.lstrip(".").lower() in NOTE_IMG_EXTS and _slugify(base) == slug_lower:
-            return dir_path, name
 
-    # 3) 최종 플레이스홀더 (반드시 프로젝트에 두세요)
-    placeholder = "_placeholder.jpg"
-    return dir_path, placeholder
+def _variant_manifest() -> VariantManifest:
+    _note_image_index()  # 인덱스와 함께 초기화됨
+    return current_app.extensions["note_image_variants"]
 
 
 @images_bp.route("/note-img/<path:slug>")
 def note_img(slug: str):
     """
     프론트는 언제나 /note-img/<slug> 로만 요청.
-    서버가 확장자를 찾아서 1회 응답으로 보내며, 없으면 플레이스홀더(200).
+    썸네일 변형이 빌드돼 있으면 NOTE_IMAGE_VARIANT_MODE 에 따라
+      - redirect: 해시 URL(/note-img/v/...)로 302 (브라우저가 immutable 캐시)
+      - serve:    변형 WEBP를 바로 응답
+    아니면 원본 파일을 찾아서 1회 응답으로 보내며, 없으면 플레이스홀더(200).
     """
-    dir_path, filename = _resolve_note_image(slug)
+    index = _note_image_index()
+    filename = index.lookup(slug)
 
-    resp = send_from_directory(directory=dir_path, path=filename, conditional=True)
+    mode = current_app.config.get("NOTE_IMAGE_VARIANT_MODE", "redirect")
+    variants = _variant_manifest()
+    if mode in ("redirect", "serve") and variants:
+        variant = variants.lookup(filename)
+        if variant and mode == "redirect":
+            resp = redirect(url_for("images_bp.note_img_variant", filename=variant))
+            # slug -> 해시 매핑은 재빌드 시 바뀌므로 짧게만 캐시
+            resp.cache_control.public = True
+            resp.cache_control.max_age = 60 * 60 * 24
+            return resp
+        if variant:
+            return note_img_variant(variant)
+
+    resp = send_from_directory(
+        directory=index.dir_path, path=filename or index.placeholder,
+        conditional=True, max_age=IMMUTABLE_MAX_AGE,
+    )
     # 강한 캐시(이미지 교체가 거의 없다는 가정)
     resp.cache_control.public = True
-    resp.cache_control.max_age = 60 * 60 * 24 * 365  # 1년
     # ETag / Last-Modified는 send_from_directory가 세팅
     return resp
+
+
+@images_bp.route("/note-img/v/<filename>")
+def note_img_variant(filename: str):
+    """내용 해시 파일명의 썸네일: 내용이 바뀌면 URL도 바뀌므로 immutable."""
+    resp = send_from_directory(
+        directory=_variant_manifest().out_dir, path=filename,
+        mimetype="image/webp", conditional=True, max_age=IMMUTABLE_MAX_AGE,
+    )
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
+@images_bp.route("/note-img/bulk", methods=["POST"])
+@admission("note_bulk")
+def note_img_bulk():
+    """
+    카드 1장의 노트 이미지를 요청 1번으로.
+    요청 JSON: { "slugs": [str, ...], "format": "sprite" | "data" }
+    응답 JSON:
+      sprite → { "sprite": url, "tile": int, "cols": int, "rows": int,
+                 "map": { slug: [col, row] }, "urls": {...} }
+      data   → { "images": { slug: "data:image/webp;base64,..." }, "urls": {...} }
+    썸네일 변형이 없는 slug(빌드 전 포함)는 "urls" 에 /note-img/<slug> 로 남긴다.
+    """
+    js = request.get_json(silent=True) or {}
+    raw = js.get("slugs") or []
+    if not isinstance(raw, list) or not all(isinstance(x, str) for x in raw):
+        return jsonify(error="slugs는 문자열 배열입니다"), 400
+    slugs = list(dict.fromkeys(x for x in raw if x))[:BULK_MAX_SLUGS]
+    fmt = js.get("format") or "sprite"
+    if fmt not in ("sprite", "data"):
+        return jsonify(error="format은 sprite 또는 data 입니다"), 400
+
+    index = _note_image_index()
+    variants = _variant_manifest()
+    resolved: dict[str, str] = {}
+    if variants:
+        for slug in slugs:
+            variant = variants.lookup(index.lookup(slug))
+            if variant:
+                resolved[slug] = variant
+    urls = {slug: url_for("images_bp.note_img", slug=slug)
+            for slug in slugs if slug not in resolved}
+    if not resolved:
+        return jsonify(urls=urls)
+
+    sprites: SpriteCache = current_app.extensions["note_image_sprites"]
+    files = list(dict.fromkeys(resolved.values()))  # 플레이스홀더 등 중복 파일은 1칸
+    try:
+        if fmt == "data":
+            data = sprites.read_base64(files)
+            return jsonify(images={slug: data[f] for slug, f in resolved.items()}, urls=urls)
+        meta = sprites.get(files)
+    except ImportError:
+        # Pillow 미설치: 개별 URL로 폴백
+        urls.update({slug: url_for("images_bp.note_img", slug=slug) for slug in resolved})
+        return jsonify(urls=urls)
+
+    pos = {f: [i % meta["cols"], i // meta["cols"]] for i, f in enumerate(files)}
+    return jsonify(
+        sprite=url_for("images_bp.note_img_sprite", filename=meta["file"]),
+        tile=meta["tile"], cols=meta["cols"], rows=meta["rows"],
+        map={slug: pos[f] for slug, f in resolved.items()},
+        urls=urls,
+    )
+
+
+@images_bp.route("/note-img/s/<filename>")
+def note_img_sprite(filename: str):
+    """스프라이트 파일명도 내용(노트 조합) 해시 → immutable."""
+    resp = send_from_directory(
+        directory=os.path.join(_variant_manifest().out_dir, SPRITE_DIR), path=filename,
+        mimetype="image/webp", conditional=True, max_age=IMMUTABLE_MAX_AGE,
+    )
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
+@images_bp.cli.command("build-variants")
+@click.option("--size", default=VARIANT_DEFAULT_SIZE, show_default=True, help="썸네일 최대 변(px)")
+@click.option("--quality", default=VARIANT_DEFAULT_QUALITY, show_default=True, help="WEBP 품질")
+def build_variants_command(size: int, quality: int):
+    """static/picture → 썸네일 WEBP 변형 + manifest.json 생성 (Pillow 필요)."""
+    index = _note_image_index()
+    out_dir = _variants_dir(current_app)
+    manifest = build_note_variants(index.dir_path, out_dir, size=size, quality=quality)
+    total = sum(v["bytes"] for v in manifest["variants"].values())
+    click.echo(f"{len(manifest['variants'])} variants, {total / 1024:.0f} KiB -> {out_dir}")
+    if manifest["failed"]:
+        click.echo(f"skipped (decode failed): {', '.join(manifest['failed'])}")
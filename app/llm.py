@@ -0,0 +1,250 @@
+# app/llm.py
+"""
+Gemini 호출 전용 클라이언트 (AI 향수 생성).
+
+- 스레드당 1개의 requests.Session 을 재사용 (keep-alive, 매 요청 configure/모델 생성 없음.
+  Session 은 스레드 안전이 보장되지 않아 스레드 간에 공유하지 않음)
+- connect 타임아웃 + 읽기 공백 타임아웃 + 전체 데드라인(본문 조각마다 경과 시간 확인 → 초과 시 응답 닫기)
+- (카테고리, 노트 취향, 날씨 버킷, 정렬된 노트) 정규화 키로 결과 캐시
+- streamGenerateContent(SSE) 로 토큰 단위 스트리밍
+- GENAI_BASE_URL 로 로컬 목(mock) 서버를 가리킬 수 있음
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+import requests
+import urllib3
+
+from .weather_utils import weather_bucket
+from .metrics import cache_event, register_gauge
+
+GENAI_MODEL       = os.getenv("GENAI_MODEL", "gemini-2.5-flash")
+GENAI_BASE_URL    = os.getenv("GENAI_BASE_URL", "https://generativelanguage.googleapis.com")
+GENAI_CONNECT_TIMEOUT = float(os.getenv("GENAI_CONNECT_TIMEOUT", "3"))
+GENAI_READ_TIMEOUT = float(os.getenv("GENAI_READ_TIMEOUT", "5"))  # 바이트 사이 최대 공백(초)
+GENAI_DEADLINE    = float(os.getenv("GENAI_DEADLINE", "20"))      # 요청 1건 전체 상한(초, 벽시계)
+GENAI_CACHE_TTL   = float(os.getenv("GENAI_CACHE_TTL", "3600"))
+GENAI_CACHE_SIZE  = int(os.getenv("GENAI_CACHE_SIZE", "512"))
+GENAI_MAX_NOTES   = 40   # 프롬프트/캐시 키에 넣을 노트 후보 상한
+
+
+class LLMError(RuntimeError):
+    """키 없음/타임아웃/빈 응답 등 — 호출 측에서 폴백 처리."""
+
+
+def _norm(s: str) -> str:
+    return " ".join(str(s or "").lower().split())
+
+
+def canonical_notes(notes) -> List[str]:
+    """노트 후보 정규화: 중첩 리스트 평탄화, 소문자/공백 정리, 중복 제거, 정렬."""
+    flat = []
+    for n in notes or []:
+        if isinstance(n, (list, tuple)):
+            flat.extend(n)
+        else:
+            flat.append(n)
+    return sorted({_norm(n) for n in flat if _norm(n)})[:GENAI_MAX_NOTES]
+
+
+def cache_key(user_cat: str, user_note: str, weather: str, notes) -> str:
+    return json.dumps(
+        [_norm(user_cat), _norm(user_note), weather_bucket(weather), canonical_notes(notes)],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+
+
+def build_prompt(user_cat: str, user_note: str, weather: str, notes) -> str:
+    return f"""
+당신은 전문 조향사입니다. 아래 정보를 반영해 새로운 향수를 제안하세요.
+- 선호 카테고리: {user_cat}
+- 취향 노트: {user_note}
+- 현재 날씨: {weather}
+- 추천 목록에서 수집된 노트 후보: {canonical_notes(notes)}
+
+반드시 다음 JSON만 출력하세요 (코드펜스나 추가 설명 금지):
+{{
+  "name": "<짧은 한국어/영문 이름 1~2단어>",
+  "category": "<한국어 카테고리(예: 시트러스, 아로마틱, 우디, 플로럴, 머스크, 앰버리, 그린, 스파이시, 오리엔탈, 푸제르 등)>",
+  "mood": "<향의 분위기/컨셉(한국어)>",
+  "top": ["노트1","노트2","노트3"],
+  "middle": ["노트1","노트2","노트3"],
+  "base": ["노트1","노트2","노트3"],
+  "description": "<50~120자 정도 한국어 설명>"
+}}
+주의:
+- 가능한 한 제공된 notes에서 우선 선택하고, 부족하면 보완 노트를 소량 추가하세요.
+- top/middle/base는 각각 3~6개 사이.
+- 추가 설명 없이 JSON만 출력하세요.
+    """.strip()
+
+
+class _TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            expires, value = hit
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def _chunk_text(obj: dict) -> str:
+    parts = (((obj.get("candidates") or [{}])[0].get("content") or {}).get("parts") or [])
+    return "".join(p.get("text", "") for p in parts if isinstance(p, dict))
+
+
+class GeminiClient:
+    def __init__(self, api_key: str, model: str = GENAI_MODEL, base_url: str = GENAI_BASE_URL,
+                 deadline: float = GENAI_DEADLINE):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.deadline = deadline
+        self._local = threading.local()
+        self.cache = _TTLCache(GENAI_CACHE_SIZE, GENAI_CACHE_TTL)
+
+    @property
+    def session(self) -> requests.Session:
+        """이 스레드 전용 Session (keep-alive 연결 풀은 스레드마다)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _url(self, method: str) -> str:
+        return f"{self.base_url}/v1beta/models/{self.model}:{method}"
+
+    def _post(self, method: str, prompt: str, params: dict):
+        """본문은 아직 읽지 않은 응답 (stream=True) — 본문은 _chunks 로 데드라인 안에서 읽음."""
+        if not self.api_key:
+            raise LLMError("GENAI_API_KEY not set")
+        try:
+            resp = self.session.post(
+                self._url(method),
+                params=params,
+                headers={"x-goog-api-key": self.api_key},  # URL에 키를 남기지 않음(에러 메시지 노출 방지)
+                json={"contents": [{"parts": [{"text": prompt}]}]},
+                # read 타임아웃은 소켓 읽기 1회 상한일 뿐 → 전체 상한은 _chunks 에서 따로
+                timeout=(GENAI_CONNECT_TIMEOUT, min(GENAI_READ_TIMEOUT, self.deadline)),
+                stream=True,
+            )
+        except requests.RequestException as e:
+            raise LLMError(f"request failed: {e}") from e
+        if resp.status_code != 200:
+            resp.close()
+            raise LLMError(f"HTTP {resp.status_code}")
+        return resp
+
+    def _chunks(self, resp, started: float) -> Iterator[bytes]:
+        """
+        본문 조각을 읽을 때마다 경과 시간 확인 → 데드라인을 넘기면 응답을 닫고 LLMError.
+        조금씩 흘려보내는(slow-drip) 응답도 GENAI_DEADLINE (+ 읽기 1회 공백) 안에 끊긴다.
+        """
+        raw = resp.raw
+        if hasattr(raw, "read1"):  # urllib3 2.3+: 512 바이트를 채울 때까지 기다리지 않고 도착한 만큼 반환
+            pieces = iter(lambda: raw.read1(512, decode_content=True), b"")
+        else:
+            pieces = resp.iter_content(chunk_size=512)
+        try:
+            for chunk in pieces:
+                if time.monotonic() - started > self.deadline:
+                    raise LLMError("deadline exceeded")
+                yield chunk
+        except (requests.RequestException, urllib3.exceptions.HTTPError, OSError) as e:
+            raise LLMError(f"read failed: {e}") from e
+        finally:
+            resp.close()
+
+    def _lines(self, resp, started: float) -> Iterator[str]:
+        pending = b""
+        for chunk in self._chunks(resp, started):
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip(b"\r").decode("utf-8", "replace")
+        if pending:
+            yield pending.decode("utf-8", "replace")
+
+    def generate(self, prompt: str, key: Optional[str] = None) -> str:
+        """전체 응답 텍스트 (캐시 우선)."""
+        if key is not None:
+            hit = self.cache.get(key)
+            cache_event("llm", hit is not None)
+            if hit is not None:
+                return hit
+        started = time.monotonic()
+        resp = self._post("generateContent", prompt, params={})
+        body = b"".join(self._chunks(resp, started))
+        try:
+            text = _chunk_text(json.loads(body)).strip()
+        except ValueError as e:
+            raise LLMError("invalid JSON from model") from e
+        if not text:
+            raise LLMError("Empty model response")
+        if key is not None:
+            self.cache.set(key, text)
+        return text
+
+    def stream(self, prompt: str, key: Optional[str] = None) -> Iterator[str]:
+        """텍스트 조각을 도착하는 대로 yield. 끝까지 받으면 캐시에 저장."""
+        if key is not None:
+            hit = self.cache.get(key)
+            cache_event("llm", hit is not None)
+            if hit is not None:
+                yield hit
+                return
+        started = time.monotonic()
+        resp = self._post("streamGenerateContent", prompt, params={"alt": "sse"})
+        pieces = []
+        lines = self._lines(resp, started)
+        try:
+            for line in lines:
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    text = _chunk_text(json.loads(line[5:].strip()))
+                except ValueError:
+                    continue
+                if text:
+                    pieces.append(text)
+                    yield text
+        finally:
+            lines.close()  # 소비자가 중간에 끊어도 응답 닫기
+        full = "".join(pieces).strip()
+        if not full:
+            raise LLMError("Empty model response")
+        if key is not None:
+            self.cache.set(key, full)
+
+
+@lru_cache(maxsize=1)
+def get_llm_client() -> GeminiClient:
+    """프로세스당 1개 (결과 캐시 공유, Session 은 스레드별)."""
+    return GeminiClient(os.getenv("GENAI_API_KEY", ""))
+
+
+register_gauge("llm_cache_entries", "Entries in the in-process Gemini result cache",
+               lambda: len(get_llm_client().cache._data) if get_llm_client.cache_info().currsize else 0)
@@ -0,0 +1,217 @@
+# app/metrics.py
+"""
+가벼운 계측 레이어 + Prometheus 텍스트 포맷 /metrics.
+
+  with stage("faiss_search"): ...          # 구간 시간 히스토그램 (+ 예외 시 에러 카운터)
+  @timed("weather_api")                    # 함수 전체
+  cache_event("llm", hit=True)             # 캐시 적중률
+  register_gauge("model_loaded", fn)       # scrape 시점에 계산하는 게이지
+
+METRICS_ENABLED=0 이면 stage/timed/cache_event 는 아무것도 하지 않고(/metrics 는 404)
+계측 오버헤드는 전역 플래그 확인 1번뿐이다.
+값은 프로세스 단위 (워커가 여러 개면 워커별로 scrape).
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable, Dict, Tuple
+
+from flask import Blueprint, Response, g, request
+from flask.signals import got_request_exception
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+METRICS_PREFIX  = "perfume_"
+# 초 단위 버킷: 1ms ~ 10s (인코딩/검색은 ms, 번역/날씨/LLM은 초 단위)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(kv: dict) -> _Labels:
+    return tuple(sorted((k, str(v)) for k, v in kv.items()))
+
+
+def _fmt_labels(labels: _Labels, extra: str = "") -> str:
+    parts = ['%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, doc: str):
+        self.name, self.doc = name, doc
+        self._values: Dict[_Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, v in items:
+            yield f"{self.name}{_fmt_labels(labels)} {v:g}"
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, buckets=LATENCY_BUCKETS):
+        self.name, self.doc = name, doc
+        self.buckets = tuple(buckets)
+        # labels -> [버킷별 개수..., 합계, 개수]
+        self._values: Dict[_Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for labels, row in items:
+            acc = 0
+            for b, c in zip(self.buckets, row):
+                acc += c
+                le = _fmt_labels(labels, 'le="%g"' % b)
+                yield f"{self.name}_bucket{le} {acc}"
+            le = _fmt_labels(labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {row[-1]}"
+            yield f"{self.name}_sum{_fmt_labels(labels)} {row[-2]:.6f}"
+            yield f"{self.name}_count{_fmt_labels(labels)} {row[-1]}"
+
+
+STAGE_SECONDS  = Histogram(METRICS_PREFIX + "stage_seconds", "Latency of internal stages (seconds)")
+STAGE_ERRORS   = Counter(METRICS_PREFIX + "stage_errors_total", "Exceptions raised inside a stage")
+HTTP_SECONDS   = Histogram(METRICS_PREFIX + "http_request_seconds", "HTTP request latency by endpoint")
+HTTP_ERRORS    = Counter(METRICS_PREFIX + "http_exceptions_total", "Unhandled or logged exceptions by endpoint")
+CACHE_REQUESTS = Counter(METRICS_PREFIX + "cache_requests_total", "Cache lookups by cache and result")
+
+_METRICS = [STAGE_SECONDS, STAGE_ERRORS, HTTP_SECONDS, HTTP_ERRORS, CACHE_REQUESTS]
+_GAUGES: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def _observe_stage(name: str, started: float, failed: bool) -> None:
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+    if failed:
+        STAGE_ERRORS.inc(stage=name)
+
+
+@contextmanager
+def _stage(name: str):
+    # Exception 만 오류로: SSE 클라이언트가 끊겨 생기는 GeneratorExit 등은 시간만 기록
+    started, failed = time.perf_counter(), False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        _observe_stage(name, started, failed)
+
+
+def stage(name: str):
+    """구간 타이머 컨텍스트 매니저. 비활성화 시 nullcontext."""
+    return _stage(name) if METRICS_ENABLED else nullcontext()
+
+
+def timed(name: str):
+    """함수 전체를 stage(name) 으로 감싸는 데코레이터."""
+    def deco(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def cache_event(cache: str, hit: bool) -> None:
+    if METRICS_ENABLED:
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_error(where: str) -> None:
+    """logger.exception 으로 삼켜지는 예외도 카운트."""
+    if METRICS_ENABLED:
+        HTTP_ERRORS.inc(endpoint=where)
+
+
+def register_metric(metric):
+    """모듈별 Counter/Histogram 을 /metrics 출력에 추가하고 그대로 반환."""
+    _METRICS.append(metric)
+    return metric
+
+
+def register_gauge(name: str, doc: str, fn: Callable[[], float]) -> None:
+    """scrape 시점에 fn() 을 호출해 값을 얻는 게이지 (모델 로드 여부 등)."""
+    _GAUGES[METRICS_PREFIX + name] = (doc, fn)
+
+
+def render_metrics() -> str:
+    lines = []
+    for m in _METRICS:
+        lines.extend(m.render())
+    for name, (doc, fn) in _GAUGES.items():
+        try:
+            value = float(fn())
+        except Exception:
+            continue
+        lines += [f"# HELP {name} {doc}", f"# TYPE {name} gauge", f"{name} {value:g}"]
+    return "\n".join(lines) + "\n"
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    if not METRICS_ENABLED:
+        return Response("metrics disabled\n", status=404, mimetype="text/plain")
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app) -> None:
+    """요청 지연/예외 훅 + /metrics 등록."""
+    app.register_blueprint(metrics_bp)
+    if not METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(resp):
+        started = g.pop("_metrics_started", None)
+        if started is not None and request.endpoint != "metrics.metrics":
+            HTTP_SECONDS.observe(time.perf_counter() - started,
+                                 endpoint=request.endpoint or "unknown",
+                                 method=request.method, status=resp.status_code)
+        return resp
+
+    def _on_exception(sender, exception, **extra):
+        record_error(request.endpoint or "unknown")
+
+    got_request_exception.connect(_on_exception, app, weak=False)
@@ -20,3 +20,13 @@ class Recommendation(db.Model):
     results_json = db.Column(db.Text)
 
     user = db.relationship('User', backref='recommendations')
+
+class UserTaste(db.Model):
+    """사용자 취향 프로필 (app/taste.py 에서 EMA 로 갱신)."""
+    __tablename__ = 'user_tastes'
+    user_id    = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    vector     = db.Column(db.LargeBinary)   # float16 임베딩 (d,)
+    accords    = db.Column(db.Text)          # {"woody": 0.31, ...} 상위 N개
+    notes      = db.Column(db.Text)          # {"<NoteVocab id>": 0.12, ...} 상위 N개
+    updates    = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
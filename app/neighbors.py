@@ -0,0 +1,219 @@
+# app/neighbors.py
+"""
+향수별 "비슷한 향수" k-NN 테이블 (미리 계산, 조회는 O(1)).
+
+유사도 = W_NN_EMB * 임베딩 코사인
+       + W_NN_NOTE * 노트 가중 Jaccard (idf 가중)
+       + W_NN_ACCORD * 어코드(Categorys) 가중 Jaccard
+
+  flask neighbors build [--k 20]
+    → per_data.neighbors.ids.npy (N, k) int32, per_data.neighbors.scores.npy (N, k) float16,
+      per_data.neighbors.json (빌드 당시 CSV 지문/행 수/k/가중치)
+    런타임에는 mmap 으로 열어 행 하나만 읽는다. CSV 지문이 다르거나(내용이 바뀐 카탈로그) 파일이 없으면
+    테이블을 쓰지 않고 임베딩 코사인만으로 요청 행을 근사 (요청 경로에서 전체 노트/어코드 행렬은 만들지 않음).
+"""
+from __future__ import annotations
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import click
+import numpy as np
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+
+from .catalog import NOTE_POSITIONS
+
+NN_K        = int(os.getenv("NN_K", "20"))
+NN_CHUNK    = int(os.getenv("NN_CHUNK", "512"))
+W_NN_EMB    = float(os.getenv("W_NN_EMB", "0.6"))
+W_NN_NOTE   = float(os.getenv("W_NN_NOTE", "0.3"))
+W_NN_ACCORD = float(os.getenv("W_NN_ACCORD", "0.1"))
+
+
+def _binary_matrix(sets: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """집합 목록 -> (N, V) 0/1 float32 행렬과 idf 가중치 (V,)."""
+    vocab = {}
+    for s in sets:
+        for x in s:
+            vocab.setdefault(x, len(vocab))
+    m = np.zeros((len(sets), max(1, len(vocab))), dtype=np.float32)
+    for i, s in enumerate(sets):
+        ids = [vocab[x] for x in s]
+        if ids:
+            m[i, ids] = 1.0
+    df = m.sum(axis=0)
+    idf = np.log((1.0 + len(sets)) / (1.0 + df)) + 1.0
+    return m, idf.astype(np.float32)
+
+
+class SimilarityFeatures:
+    """kNN 계산용 행렬 묶음 (임베딩 + 노트/어코드 이진 행렬)."""
+
+    def __init__(self, embeddings: np.ndarray, note_sets, accord_sets):
+        self.emb = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.notes, self.note_w = _binary_matrix(note_sets)
+        self.accords, self.accord_w = _binary_matrix(accord_sets)
+        # 가중치를 미리 곱해 둔 전치 행렬: 교집합 = A[i] @ (w * A).T
+        self._notes_wT = np.ascontiguousarray((self.notes * self.note_w).T)
+        self._accords_wT = np.ascontiguousarray((self.accords * self.accord_w).T)
+        self._note_mass = self.notes @ self.note_w
+        self._accord_mass = self.accords @ self.accord_w
+
+    @classmethod
+    def from_recommender(cls, rec) -> "SimilarityFeatures":
+        note_sets = [
+            sorted({n.strip().lower() for p in NOTE_POSITIONS + ("flat",) for n in d.notes.get(p, []) if n.strip()})
+            for d in rec.docs
+        ]
+        accord_sets = [sorted({c.strip().lower() for c in d.categories if c.strip()}) for d in rec.docs]
+        return cls(rec.embeddings, note_sets, accord_sets)
+
+    def __len__(self) -> int:
+        return self.emb.shape[0]
+
+    @staticmethod
+    def _jaccard(inter: np.ndarray, mass_rows: np.ndarray, mass_all: np.ndarray) -> np.ndarray:
+        union = mass_rows[:, None] + mass_all[None, :] - inter
+        return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+    def score_rows(self, rows: np.ndarray) -> np.ndarray:
+        """rows (n,) 향수들과 전체 향수 간 유사도 (n, N). 자기 자신은 -inf."""
+        sim = W_NN_EMB * (self.emb[rows] @ self.emb.T)
+        sim += W_NN_NOTE * self._jaccard(self.notes[rows] @ self._notes_wT,
+                                         self._note_mass[rows], self._note_mass)
+        sim += W_NN_ACCORD * self._jaccard(self.accords[rows] @ self._accords_wT,
+                                           self._accord_mass[rows], self._accord_mass)
+        sim[np.arange(len(rows)), rows] = -np.inf
+        return sim
+
+    def topk_rows(self, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        sim = self.score_rows(rows)
+        k = min(k, sim.shape[1] - 1)
+        if k <= 0:
+            return np.zeros((len(rows), 0), np.int32), np.zeros((len(rows), 0), np.float32)
+        part = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(sim, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind="stable")
+        return (np.take_along_axis(part, order, axis=1).astype(np.int32),
+                np.take_along_axis(part_scores, order, axis=1))
+
+
+def build_neighbor_table(feats: SimilarityFeatures, k: int = NN_K, chunk: int = NN_CHUNK,
+                         workers: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """전체 kNN: 행 청크 단위 벡터화 + 스레드 병렬 (numpy 행렬곱은 GIL을 풀어 줌)."""
+    n = len(feats)
+    k = max(0, min(k, n - 1))
+    ids = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float16)
+
+    def run(start: int):
+        rows = np.arange(start, min(n, start + chunk))
+        i, s = feats.topk_rows(rows, k)
+        ids[rows] = i
+        scores[rows] = s.astype(np.float16)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as ex:
+        list(ex.map(run, range(0, n, chunk)))
+    return ids, scores
+
+
+class NeighborTable:
+    """
+    미리 계산된 (N, k) 테이블 (mmap). 없거나 CSV 지문이 다르면 ids=None →
+    embeddings 행 하나와의 코사인(W_NN_EMB 배)으로 근사 (행렬-벡터 곱 1회).
+    테이블 k 보다 큰 k 는 테이블 k 로 자른다.
+    """
+
+    def __init__(self, ids: Optional[np.ndarray], scores: Optional[np.ndarray],
+                 embeddings: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.scores = scores
+        self.embeddings = embeddings
+
+    @classmethod
+    def load(cls, prefix: str, n_docs: int, fingerprint: str,
+             embeddings: Optional[np.ndarray] = None) -> "NeighborTable":
+        try:
+            with open(prefix + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("csv") != fingerprint or meta.get("rows") != n_docs:
+                raise ValueError("neighbor table was built from a different catalog")
+            ids = np.load(prefix + ".ids.npy", mmap_mode="r")
+            scores = np.load(prefix + ".scores.npy", mmap_mode="r")
+            if ids.shape[0] != n_docs or ids.shape != scores.shape:
+                raise ValueError("neighbor table does not match catalog")
+        except (OSError, ValueError) as e:
+            if has_app_context():
+                current_app.logger.warning("neighbor table unavailable (%s); using embedding cosine only. "
+                                           "Run: flask neighbors build", e)
+            ids = scores = None
+        return cls(ids, scores, embeddings)
+
+    def similar(self, idx: int, k: int) -> List[Tuple[int, float]]:
+        if self.ids is not None:
+            k = min(k, self.ids.shape[1])
+            row_ids, row_scores = self.ids[idx, :k], self.scores[idx, :k]
+        elif self.embeddings is not None and len(self.embeddings) > 1:
+            emb = self.embeddings
+            sim = W_NN_EMB * (np.asarray(emb, dtype=np.float32) @ np.asarray(emb[idx], dtype=np.float32))
+            sim[idx] = -np.inf
+            k = min(k, len(sim) - 1)
+            part = np.argpartition(-sim, k - 1)[:k]
+            row_ids = part[np.argsort(-sim[part], kind="stable")]
+            row_scores = sim[row_ids]
+        else:
+            return []
+        return [(int(i), float(s)) for i, s in zip(row_ids, row_scores) if i >= 0]
+
+
+def _prefix(app) -> str:
+    csv_path = os.path.normpath(os.path.join(app.root_path, "..", "per_data.csv"))
+    return app.config.get("NEIGHBORS_PATH") or os.path.splitext(csv_path)[0] + ".neighbors"
+
+
+@lru_cache(maxsize=1)
+def get_neighbor_table() -> NeighborTable:
+    # 웹 워커에서 모델을 올리지 않는다: 행 수는 경량 item 목록, 폴백 임베딩은 mmap 파일에서
+    from .embeddings import EmbeddingStore, csv_fingerprint, embeddings_prefix
+    from .recommender import DEFAULT_MODEL, get_catalog_items, get_recommender
+    csv_path = os.path.normpath(os.path.join(current_app.root_path, "..", "per_data.csv"))
+    n_docs, fingerprint = len(get_catalog_items()), csv_fingerprint(csv_path)
+    if get_recommender.cache_info().currsize:
+        embeddings = get_recommender().embeddings
+    else:
+        embeddings = EmbeddingStore(embeddings_prefix(current_app)).load(n_docs, DEFAULT_MODEL, fingerprint)
+    return NeighborTable.load(_prefix(current_app), n_docs, fingerprint, embeddings=embeddings)
+
+
+neighbors_cli = AppGroup("neighbors", help="비슷한 향수 k-NN 테이블")
+
+
+@neighbors_cli.command("build")
+@click.option("--k", default=NN_K, show_default=True)
+@click.option("--chunk", default=NN_CHUNK, show_default=True)
+@click.option("--workers", default=0, help="스레드 수 (0 = CPU 코어 수)")
+def build_command(k: int, chunk: int, workers: int):
+    """카탈로그 임베딩/노트/어코드로 kNN 테이블 생성."""
+    from .embeddings import csv_fingerprint
+    from .recommender import get_recommender
+    t0 = time.perf_counter()
+    rec = get_recommender()
+    feats = SimilarityFeatures.from_recommender(rec)
+    t1 = time.perf_counter()
+    ids, scores = build_neighbor_table(feats, k=k, chunk=chunk, workers=workers or None)
+    t2 = time.perf_counter()
+    prefix = _prefix(current_app)
+    if os.path.exists(prefix + ".json"):
+        os.remove(prefix + ".json")  # 새 npy 를 쓰는 동안 이전 메타로 검증되지 않게
+    np.save(prefix + ".ids.npy", ids)
+    np.save(prefix + ".scores.npy", scores)
+    meta = {"csv": csv_fingerprint(rec.csv_path), "rows": len(feats), "k": int(ids.shape[1]),
+            "weights": {"emb": W_NN_EMB, "note": W_NN_NOTE, "accord": W_NN_ACCORD}}
+    with open(prefix + ".json", "w", encoding="utf-8") as f:  # npy 를 다 쓴 뒤에 메타
+        json.dump(meta, f)
+    click.echo(f"{len(feats)} perfumes x k={ids.shape[1]} in {t2 - t1:.1f}s "
+               f"(catalog load {t1 - t0:.1f}s) -> {prefix}.*.npy")
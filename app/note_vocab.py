@@ -0,0 +1,206 @@
+# app/note_vocab.py
+"""
+노트 표기 정규화(canonical vocabulary).
+
+카탈로그/notes.csv/static/picture 에는 같은 노트의 철자·표기 변형이 섞여 있다.
+  Cardamom / Cardamon, Vanilla / Vanille / Vanila, Cinnamon / Cinammon,
+  Myrrh / Myrhh, Sandalwood / Sandalowood, Clove / Cloves, Oakmoss / Oak moss
+이름들을 클러스터로 묶어 대표 표기 1개와 정수 id 를 부여한다.
+
+  1) 비교 키: NFKD → ASCII → 소문자 영숫자만 (공백/하이픈/대소문자 차이 제거, "CO2" → "co")
+  2) 복수형: 키가 s 로 끝나고 s 를 뗀 키가 따로 있으면 같은 노트
+  3) 오타: 키 길이 7 이상, 첫 글자 같고 편집거리(인접 전치 포함) 1 이면 같은 노트
+     (Heather/Leather, Cassia/Cassis 같은 다른 노트를 묶지 않기 위한 보수적 기준)
+  4) 짧거나 편집거리 2 라서 3) 으로 못 잡는 오타는 SPELLING_ALIASES 로 직접 지정
+대표 표기 = 카탈로그 빈도 최다(대소문자 무시 합산) → notes.csv 에 있음 → 짧은 순.
+
+카탈로그 로드(Doc.notes, BM25 토큰), 쿼리 토큰화, 노트 이미지 해석에 같은 사전을 쓴다.
+"""
+from __future__ import annotations
+import os
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from flask import current_app
+
+from .catalog import NOTE_POSITIONS, iter_catalog_rows, structure_notes
+
+# 키 기준 (오타 키 -> 대표 키). 편집거리 규칙으로 잡히지 않는 것만 둔다
+SPELLING_ALIASES: Dict[str, str] = {
+    "vanila": "vanilla", "myrhh": "myrrh", "whisky": "whiskey", "pralin": "praline",
+    "tiar": "tiare", "cinammon": "cinnamon",
+}
+FUZZY_MIN_LEN = 7
+
+
+def _words(text: str) -> List[str]:
+    """recommender._tokenize_ko_en 과 같은 단어 분리."""
+    return re.sub(r"[^0-9a-z\uac00-\ud7a3]+", " ", str(text).lower()).split()
+
+
+def note_key(name: str) -> str:
+    s = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii").lower()
+    key = "".join(ch for ch in s if ch.isalnum())
+    return key[:-1] if key.endswith("co2") else key
+
+
+def _within_one(a: str, b: str) -> bool:
+    """편집거리(삽입/삭제/치환/인접 전치) <= 1."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return (a[i + 1:] == b[i:]) if la > lb else (a[i:] == b[i + 1:])
+
+
+class NoteVocab:
+    """노트명 -> 대표 표기 / 정수 id. names[id] = 대표 표기."""
+
+    def __init__(self, names: List[str], key_to_id: Dict[str, int], members: List[List[str]]):
+        self.names = names
+        self._key_to_id = key_to_id
+        self.members = members  # id -> 변형 표기 (대표 표기 먼저, 빈도순)
+        # BM25/키워드 토큰 치환표: 한 단어짜리 변형 -> 한 단어짜리 대표 ("cardamon" -> "cardamom")
+        self.token_map: Dict[str, str] = {}
+        for canon, variants in zip(names, members):
+            ct = _words(canon)
+            if len(ct) != 1:
+                continue
+            for v in variants:
+                vt = _words(v)
+                if len(vt) == 1 and vt[0] != ct[0]:
+                    self.token_map[vt[0]] = ct[0]
+
+    @classmethod
+    def build(cls, counts: Counter, known: Iterable[str] = ()) -> "NoteVocab":
+        """counts: 카탈로그 노트 빈도, known: notes.csv/이미지 파일명 등 추가 표기."""
+        known = list(known)
+        in_list = set(known)
+        surface: Dict[str, Counter] = {}  # 키 -> 표기별 빈도
+        for name, c in counts.items():  # 카탈로그 빈도는 표기마다 한 번만
+            name = name.strip()
+            k = note_key(name)
+            if k:
+                surface.setdefault(k, Counter())[name] += c
+        for name in known:              # notes.csv/이미지에만 있는 표기는 빈도 0 으로 후보에만
+            name = name.strip()
+            k = note_key(name)
+            if k:
+                surface.setdefault(k, Counter()).setdefault(name, 0)
+
+        parent = {k: k for k in surface}
+
+        def find(k: str) -> str:
+            while parent[k] != k:
+                parent[k] = parent[parent[k]]
+                k = parent[k]
+            return k
+
+        def union(a: str, b: str) -> None:
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+
+        keys = sorted(surface)
+        for k in keys:
+            if k.endswith("s") and k[:-1] in surface:
+                union(k, k[:-1])
+            alias = SPELLING_ALIASES.get(k)
+            if alias in surface:
+                union(k, alias)
+        buckets: Dict[tuple, List[str]] = {}
+        for k in keys:
+            if len(k) >= FUZZY_MIN_LEN:
+                buckets.setdefault((k[0], len(k)), []).append(k)
+        for (first, n), group in buckets.items():
+            # 같은 길이(치환/전치) + 한 글자 긴 쪽(삽입)만 비교하면 모든 쌍이 한 번씩 검사된다
+            for k in group:
+                for other in buckets.get((first, n), ()) + buckets.get((first, n + 1), []):
+                    if other > k or len(other) > n:
+                        if _within_one(k, other):
+                            union(k, other)
+
+        clusters: Dict[str, List[str]] = {}
+        for k in keys:
+            clusters.setdefault(find(k), []).append(k)
+
+        def rank(name: str, total: Counter, folded: Counter):
+            # 대소문자만 다른 표기는 빈도를 합쳐 비교 ("Cotton Candy" 3 + "cotton candy" 1 > "Coton candy" 2)
+            return (-folded[name.lower()], -total[name], name not in in_list, len(name), name)
+
+        names, members, key_to_id = [], [], {}
+        for root in sorted(clusters):
+            total: Counter = Counter()
+            for k in clusters[root]:
+                total.update(surface[k])
+            folded: Counter = Counter()
+            for n, c in total.items():
+                folded[n.lower()] += c
+            ordered = sorted(total, key=lambda n: rank(n, total, folded))
+            nid = len(names)
+            names.append(ordered[0])
+            members.append(ordered)
+            for k in clusters[root]:
+                key_to_id[k] = nid
+        return cls(names, key_to_id, members)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id_of(self, name: str) -> int:
+        return self._key_to_id.get(note_key(name), -1)
+
+    def canonical(self, name: str) -> str:
+        """대표 표기 (사전에 없으면 원문)."""
+        nid = self.id_of(name)
+        return self.names[nid] if nid >= 0 else name
+
+    def canonical_token(self, token: str) -> str:
+        return self.token_map.get(token, token)
+
+    def variants(self, name: str) -> List[str]:
+        """같은 노트의 표기들 (대표 먼저). 사전에 없으면 [name]."""
+        nid = self.id_of(name)
+        return self.members[nid] if nid >= 0 else [name]
+
+    def canonical_notes(self, notes: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """structure_notes 결과를 대표 표기로 (위치 안 중복 제거)."""
+        return {pos: list(dict.fromkeys(self.canonical(n) for n in names)) for pos, names in notes.items()}
+
+
+def catalog_note_counts(csv_path: str) -> Counter:
+    counts: Counter = Counter()
+    for row in iter_catalog_rows(csv_path):
+        notes = structure_notes(row.get("Note"))
+        for pos in NOTE_POSITIONS + ("flat",):
+            counts.update(n.strip() for n in notes.get(pos, []) if n.strip())
+    return counts
+
+
+def load_note_vocab(catalog_csv: str, notes_csv: Optional[str] = None,
+                    picture_dir: Optional[str] = None) -> NoteVocab:
+    known: List[str] = []
+    if notes_csv and os.path.exists(notes_csv):
+        with open(notes_csv, encoding="utf-8") as f:
+            known += [line.strip() for i, line in enumerate(f) if i and line.strip()]  # 첫 줄 = 헤더
+    if picture_dir and os.path.isdir(picture_dir):
+        known += [os.path.splitext(f)[0] for f in os.listdir(picture_dir) if not f.startswith(("_", "."))]
+    return NoteVocab.build(catalog_note_counts(catalog_csv), known)
+
+
+@lru_cache(maxsize=1)
+def get_note_vocab() -> NoteVocab:
+    root = os.path.normpath(os.path.join(current_app.root_path, ".."))
+    picture_dir = current_app.config.get("PICTURE_DIR") or os.path.join(current_app.static_folder, "picture")
+    return load_note_vocab(os.path.join(root, "per_data.csv"), os.path.join(root, "notes.csv"), picture_dir)
@@ -1,11 +1,22 @@
 from flask import Blueprint, render_template, request, jsonify, current_app
 from flask_login import login_required, current_user
-import json, re
+import json
+from datetime import date
+
+from sqlalchemy.exc import IntegrityError
 
 from .models import Recommendation
 from .db import db
-from .weather_utils import get_weather_data, get_weather
-from .recommender import get_recommender
+from .weather_utils import get_weather_data, get_weather, weather_context
+from .recommender import W_TASTE, get_catalog_items, request_seed
+from .backends import get_backend
+from .http_utils import parse_fields, select_fields
+from .filters import Constraints
+from .metrics import record_error, stage
+from .admission import admission
+from .neighbors import NN_K, get_neighbor_table
+from .taste import load_taste, record_observation
+from .weather_snapshot import bucket_key, get_weather_snapshot, is_vague_query
 
 # ───────────────── 번역 유틸 (쿼리만 영어로) ─────────────────
 try:
@@ -22,7 +33,8 @@ def translate_query_to_english(text: str) -> str:
         return text
     try:
         # source='auto'로 한국어/영어 혼합도 안전 처리
-        return GoogleTranslator(source="auto", target="en").translate(text)
+        with stage("translate"):
+            return GoogleTranslator(source="auto", target="en").translate(text)
     except Exception:
         # 네트워크/쿼터/라이브러리 오류 시 원문 그대로 사용
         return text
@@ -43,17 +55,23 @@ def discover():
 
 @rec_bp.route('/recommend', methods=['POST'])
 @login_required
+@admission("recommend")
 def recommend():
     """
     입력:
       - 문장형: { "query": "...", "lat": float, "lon": float }
       - 또는:   { "user_cat": "...", "user_note": "...", "lat": float, "lon": float }
+      - 선택:   "filters": { "year_min", "year_max", "brands", "categories",
+                             "exclude_categories", "exclude_notes" }
+        (없어도 "2010년 이후", "패출리 없는" 같은 표현은 쿼리에서 자동 추출)
     """
     try:
         js = request.get_json() or {}
         query_ko = (js.get('query')     or '').strip()
         user_cat = (js.get('user_cat')  or '').strip()
         user_note= (js.get('user_note') or '').strip()
+        # ?fields=Brand,Name,Picture 로 필요한 필드만 (이력 저장은 전체). 이력 커밋 전에 해석해 둔다
+        fields = parse_fields(request.args.get('fields') or js.get('fields'))
 
         # 문장이 없으면 cat+note를 합쳐서 '한국어 원문' 쿼리 생성
         if not query_ko:
@@ -62,38 +80,39 @@ def recommend():
         # 날씨 정보
         lat = js.get('lat'); lon = js.get('lon')
         if lat is not None and lon is not None:
-            wj   = get_weather_data(lat, lon)
-            desc = ((wj or {}).get("weather") or [{}])[0].get("description", "")
-            wstr = get_weather(lat, lon)
+            with stage("weather"):
+                wj   = get_weather_data(lat, lon)
+                desc = ((wj or {}).get("weather") or [{}])[0].get("description", "")
+                temp = ((wj or {}).get("main") or {}).get("temp")
+                wstr = get_weather(lat, lon)
         else:
-            desc = ""
+            desc, temp = "", None
             wstr = "날씨 정보를 가져올 수 없습니다."
 
-        # ✅ 추천기는 '영문 쿼리'로 호출 (오직 쿼리만 번역)
-        query_en = translate_query_to_english(query_ko)
-        recsys = get_recommender()
-        recs = recsys.recommend(query=query_en, weather_desc=desc, k=10)
-
-        # ✅ any-매칭 필터는 '사용자 원문(한국어) 쿼리' 기준으로 우선 정렬
-        def _simple_tokens(s: str):
-            s = (s or "").lower()
-            s = re.sub(r"[^0-9a-zA-Z\uac00-\ud7a3]+", " ", s)
-            toks = [w for w in s.split() if w]
-            return list(dict.fromkeys(toks))
-
-        kws = _simple_tokens(query_ko)
-        if kws:
-            def _has_any(item):
-                blob = " ".join([
-                    str(item.get("Categorys") or "").lower(),
-                    str(item.get("Note") or "").lower()
-                ])
-                return any(kw in blob for kw in kws)
-
-            prioritized = [r for r in recs if _has_any(r)]
-            others      = [r for r in recs if not _has_any(r)]
-            if prioritized:
-                recs = (prioritized + others)[:5]
+        # 구조화 제약: 원문/번역문에서 추출 + 명시적 filters 병합 → 후보 검색 단계에서 적용 (백엔드 쪽에서)
+        # 원문(한국어) 키워드의 노트/카테고리 정확 일치는 엔진 점수(W_KEYWORD)로 반영 → 최종 k개만 받음
+        # 탐색 RNG: 사용자 + 날짜 + 쿼리 + 날씨 + 명시 필터로 시드 → 같은 날 같은 입력이면 같은 결과
+        filters = Constraints.from_dict(js.get('filters')).to_dict()
+        seed = request_seed(current_user.id, date.today().isoformat(), query_ko, desc, filters)
+        # 개인화: 저장된 취향 벡터로 점수 가산, 이번 결과는 관측값으로 받아 EMA 갱신
+        taste_row, taste = load_taste(current_user.id)
+        # 막연한 쿼리("오늘 날씨에 어울리는 향수", 빈 쿼리)는 날씨 버킷 스냅샷에서 (번역/검색 생략).
+        # 스냅샷은 개인화 전 결과라 취향 벡터가 있는 사용자는 전체 파이프라인으로 (W_TASTE 반영)
+        personalized = taste.vector is not None and W_TASTE > 0
+        snapshot_key = (bucket_key(desc, temp)
+                        if is_vague_query(query_ko) and not filters and not personalized else None)
+        result = get_weather_snapshot().get(snapshot_key) if snapshot_key else None
+        query_en = ""
+        if result is None:
+            snapshot_key = None
+            # ✅ 추천기는 '영문 쿼리'로 호출 (오직 쿼리만 번역), 날씨는 설명 + 기온 밴드
+            query_en = translate_query_to_english(query_ko)
+            with stage("recommend"):
+                result = get_backend().recommend(
+                    query=query_en, weather_desc=weather_context(desc, temp), keyword_query=query_ko,
+                    seed=seed, filters=filters,
+                    taste=taste.vector.tolist() if taste.vector is not None else None, observe=True)
+        recs, applied = result["items"], result.get("filters") or {}
 
         # 이력 저장(사용자에게 보이는 쿼리는 원문 유지)
         if query_ko and not user_cat:  user_cat  = query_ko
@@ -106,24 +125,80 @@ def recommend():
             weather_desc=desc,
             results_json=json.dumps(recs, ensure_ascii=False)
         )
-        db.session.add(rec)
-        db.session.commit()
-
-        return jsonify(
+        with stage("db_commit"):
+            db.session.add(rec)
+            record_observation(current_user.id, taste_row, taste, result.get("observation"))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # 같은 사용자의 첫 요청 두 개가 동시에 프로필 행을 만든 경우 → 이력만 저장
+                db.session.rollback()
+                db.session.add(rec)
+                db.session.commit()
+
+        payload = dict(
             weather=wstr,
             weather_description=desc,
-            response=recs,
-            meta={"query_used_en": query_en}  # 디버깅용: 서버가 사용한 영문 쿼리(원하면 제거)
-        ), 200
+            response=select_fields(recs, fields),
+        )
+        if applied:
+            payload["filters"] = applied  # 적용된 제약 (UI 칩 표시용)
+        if current_app.debug:
+            # 디버깅용: 서버가 사용한 영문 쿼리 / 스냅샷 버킷
+            payload["meta"] = {"query_used_en": query_en, "weather_snapshot": snapshot_key}
+        with stage("json_encode"):
+            resp = jsonify(payload)
+        return resp, 200
 
     except Exception as e:
         current_app.logger.exception("Error in /recommend")
+        record_error("recommend.recommend")
         return jsonify(error="recommend_failed", detail=str(e)), 500
 
 
+@rec_bp.route('/perfume/<int:pid>/similar', methods=['GET'])
+@login_required
+def similar(pid):
+    """
+    미리 계산된 k-NN 테이블에서 비슷한 향수 조회 (행 1개 읽기).
+    쿼리 파라미터: ?k=N (기본 10, 최대 NN_K), ?fields=Brand,Name
+    응답 JSON: { "perfume": {...}, "similar": [ {..., "score": float}, ... ] }
+    """
+    items = get_catalog_items()  # 모델 없이 CSV 만 (검색 서비스 분리 시에도 웹 워커는 가볍게)
+    if pid < 0 or pid >= len(items):
+        return jsonify(error="not_found"), 404
+    try:
+        k = max(1, min(NN_K, int(request.args.get('k', 10))))
+    except Exception:
+        k = 10
+
+    similar_items = []
+    for i, score in get_neighbor_table().similar(pid, k):
+        item = dict(items[i])
+        item["score"] = round(score, 4)
+        similar_items.append(item)
+
+    fields = request.args.get('fields')
+    return jsonify(
+        perfume=select_fields([items[pid]], fields)[0],
+        similar=select_fields(similar_items, fields),
+    ), 200
+
+
+def _note_text(notes) -> str:
+    """응답 Notes ({위치: ["이름" | {name, ...}]}) -> "이름, 이름, ..." (이력 화면용)."""
+    if not isinstance(notes, dict):
+        return ""
+    names = [n.get("name", "") if isinstance(n, dict) else str(n)
+             for entries in notes.values() for n in entries or []]
+    return ", ".join(n for n in names if n)
+
+
 @rec_bp.route('/history')
 @login_required
 def history():
+    # 원본 JSON 블록은 ?raw=1 일 때만 (행마다 전체 아이템을 덤프하면 페이지가 커짐)
+    show_raw = request.args.get('raw') == '1'
     rows = (Recommendation.query
             .filter_by(user_id=current_user.id)
             .order_by(Recommendation.queried_at.desc())
@@ -145,7 +220,7 @@ def history():
                 "name":      p.get("Name"),
                 "year":      p.get("Year"),
                 "categorys": p.get("Categorys"),
-                "note":      p.get("Note"),
+                "note":      _note_text(p.get("Notes")) or p.get("Note"),  # 구 이력은 원문 문자열
                 "picture":   p.get("Picture"),
             })
 
@@ -155,7 +230,7 @@ def history():
             "user_note":    r.user_note,
             "weather_desc": r.weather_desc,
             "items_list":   pretty_items,  # 템플릿에서 순회할 리스트
-            "raw_items":    items,         # 원본 JSON (옵션)
+            "raw_items":    items if show_raw else None,  # 원본 JSON (옵션)
         })
 
     return render_template('history.html', history=history_view)
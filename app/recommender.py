@@ -1,43 +1,98 @@
-import os, re, json, random
+import os, re, json, random, hashlib
 from functools import lru_cache
-from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, List, Dict, Tuple, Optional
 
 import numpy as np
-import pandas as pd
 
-# semantic
-from sentence_transformers import SentenceTransformer
-import faiss
+from flask import current_app, has_app_context
 
-# lexical
-from rank_bm25 import BM25Okapi
+# 무거운 의존성(torch/sentence-transformers, faiss, rank_bm25, pandas)은 카탈로그를 실제로
+# 로드할 때(_load)나 검색 시점에 import → 웹/CLI/마이그레이션은 이 모듈을 import 해도 빠르게 뜬다
+if TYPE_CHECKING:
+    import faiss
+    from rank_bm25 import BM25Okapi
+    from sentence_transformers import SentenceTransformer
 
-from flask import current_app
+from .weather_utils import weather_tags
+from .catalog import NOTE_POSITIONS, cell, doc_text, iter_catalog_rows, parse_categories, structure_notes
+from .filters import KO_ALIASES, Constraints, FilterIndex
+from .note_vocab import NoteVocab, load_note_vocab
+from .metrics import Counter, register_gauge, register_metric, stage
+from .encoder import BatchingEncoder, configure_torch_threads
+from .images import PLACEHOLDER_URL, slugify_note
 
 # ---------------- 설정 ----------------
 DEFAULT_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 FORCE_DEVICE  = os.getenv("EMBEDDING_DEVICE", "cpu")  # CPU 강제 (meta tensor 버그 회피)
+# 코퍼스 임베딩 저장 방식: flat(float32) | fp16 | int8(차원별 8bit 스칼라 양자화)
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "flat")
+RESCORE_FACTOR    = int(os.getenv("RESCORE_FACTOR", "3"))     # 양자화 시 topn x N 개를 받아 float32 로 재채점
 
+# 요청별 RNG 시드에 섞는 솔트 (전역 random 은 건드리지 않음)
 RANDOM_SEED = int(os.getenv("REC_RANDOM_SEED", "42"))
-random.seed(RANDOM_SEED)
-np.random.seed(RANDOM_SEED)
 
 # 가중치
 W_SEMANTIC = float(os.getenv("W_SEMANTIC", "0.6"))
 W_BM25     = float(os.getenv("W_BM25",     "0.25"))
 W_WEATHER  = float(os.getenv("W_WEATHER",  "0.15"))
+W_KEYWORD  = float(os.getenv("W_KEYWORD",  "0.3"))   # 쿼리 키워드가 노트/카테고리에 정확히 있는지
+W_TASTE    = float(os.getenv("W_TASTE",    "0.1"))   # 사용자 취향 벡터와의 내적 (app/taste.py)
 
 TOPN_CANDIDATES = int(os.getenv("TOPN_CANDIDATES", "30"))  # 1차 후보
 RETURN_K        = int(os.getenv("RETURN_K", "5"))          # 최종 개수
 MMR_LAMBDA      = float(os.getenv("MMR_LAMBDA", "0.7"))    # 다양화 강도
+EXPLORE_SLOTS   = int(os.getenv("EXPLORE_SLOTS", "1"))     # 하위 후보로 교체할 끝자리 개수 (0 = 끔)
+EXPLORE_POOL    = int(os.getenv("EXPLORE_POOL", "10"))     # 교체 후보: MMR 밖 상위 N개
+
+EXPLORE_SWAPS = register_metric(Counter("perfume_explore_swaps_total",
+                                        "Result slots replaced by the exploration stage"))
 
 # ---------------- 유틸 ----------------
-def _tokenize_ko_en(text: str) -> List[str]:
+def request_seed(*parts) -> int:
+    """
+    요청 입력(사용자 id, 날짜, 쿼리, 날씨 …) -> 결정적 64bit 시드.
+    같은 입력이면 같은 탐색 결과 → 결과 캐시/재현 가능.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    h.update(str(RANDOM_SEED).encode())
+    for p in parts:
+        h.update(b"\x1f" + str(p if p is not None else "").encode("utf-8"))
+    return int.from_bytes(h.digest(), "big")
+
+def _tokenize_ko_en(text: str, token_map: Optional[Dict[str, str]] = None) -> List[str]:
+    """token_map: 노트 표기 변형 -> 대표 토큰 (NoteVocab.token_map, "cardamon" -> "cardamom")."""
     t = (text or "").lower()
     t = re.sub(r"[^0-9a-zA-Z\uac00-\ud7a3]+", " ", t)
+    if token_map:
+        return [token_map.get(w, w) for w in t.split() if w]
     return [w for w in t.split() if w]
 
+def _doc_terms(notes: Dict[str, List[str]], categories: List[str],
+               token_map: Optional[Dict[str, str]] = None) -> frozenset:
+    """키워드 매칭용: 노트/카테고리 이름 전체 + 단어 토큰 (소문자)."""
+    names = [n for p in NOTE_POSITIONS + ("flat",) for n in notes.get(p, [])] + list(categories)
+    terms = set()
+    for n in names:
+        n = " ".join(_tokenize_ko_en(n, token_map))
+        if n:
+            terms.add(n)
+            terms.update(n.split())
+    return frozenset(terms)
+
+def _keyword_terms(*texts: str, token_map: Optional[Dict[str, str]] = None) -> List[str]:
+    """쿼리 키워드: 토큰 + 한국어 표기는 영문 노트/카테고리로 (조사가 붙은 '우디한' 등은 접두 일치)."""
+    out = []
+    for text in texts:
+        for tok in _tokenize_ko_en(text, token_map):
+            out.append(tok)
+            if tok in KO_ALIASES:
+                out.append(KO_ALIASES[tok])
+            elif re.match(r"[\uac00-\ud7a3]", tok):
+                for ko in sorted((k for k in KO_ALIASES if len(k) >= 2 and tok.startswith(k)), key=len, reverse=True)[:1]:
+                    out.append(KO_ALIASES[ko])
+    return list(dict.fromkeys(out))
+
 def _safe_normalize(mat: np.ndarray) -> np.ndarray:
     if mat is None or mat.size == 0:
         return mat
@@ -49,8 +104,13 @@ def _mmr(doc_embeddings: np.ndarray,
          query_embedding: np.ndarray,
          candidates_idx: List[int],
          top_k: int,
-         lambda_coef: float = 0.7) -> List[int]:
-    """Maximal Marginal Relevance (cosine + 강한 방어로직)."""
+         lambda_coef: float = 0.7,
+         relevance: Optional[np.ndarray] = None) -> List[int]:
+    """
+    Maximal Marginal Relevance (cosine + 강한 방어로직).
+    relevance: 후보별 관련도 (search 의 하이브리드 점수). 있으면 후보 내 min-max 로 [0, 1] 정규화해
+               쿼리 코사인 대신 사용 → 키워드/BM25/날씨/취향 점수가 상위 k 순서에 반영된다.
+    """
     if not candidates_idx:
         return []
     if len(candidates_idx) <= top_k:
@@ -77,6 +137,10 @@ def _mmr(doc_embeddings: np.ndarray,
         sim_to_query = (D @ q.T).ravel()
         sim_between  = (D @ D.T)
 
+    if relevance is not None and len(relevance) == len(candidates_idx):
+        rel = np.nan_to_num(np.asarray(relevance, dtype=np.float32), nan=0.0, posinf=0.0, neginf=0.0)
+        span = float(rel.max() - rel.min())
+        sim_to_query = (rel - rel.min()) / span if span > 1e-9 else np.ones_like(rel)
     sim_to_query = np.nan_to_num(sim_to_query, nan=0.0, posinf=0.0, neginf=0.0)
     sim_between  = np.nan_to_num(sim_between,  nan=0.0, posinf=0.0, neginf=0.0)
 
@@ -106,15 +170,13 @@ def _mmr(doc_embeddings: np.ndarray,
 
     return [candidates_idx[i] for i in selected[:top_k]]
 
+def _default_note_image(name: str) -> Tuple[str, str]:
+    """이미지 인덱스 없이 쓸 때: (slug, url) — 존재 여부는 검증하지 않음."""
+    slug = slugify_note(name)
+    return slug, f"/note-img/{slug}"
+
 def _weather_tags_kor(desc: str) -> List[str]:
-    d = (desc or "").lower()
-    tags = []
-    if any(k in d for k in ["rain", "비", "소나기", "drizzle"]): tags += ["clean", "fresh", "musk", "aquatic"]
-    if any(k in d for k in ["cloud", "구름", "overcast"]):     tags += ["powdery", "soft", "cozy"]
-    if any(k in d for k in ["sun", "맑", "clear"]):            tags += ["citrus", "green", "aromatic", "floral"]
-    if any(k in d for k in ["snow", "눈", "cold"]):            tags += ["amber", "woody", "spicy"]
-    if any(k in d for k in ["haze", "mist", "안개"]):          tags += ["herbal", "tea", "soft"]
-    return tags
+    return weather_tags(desc)
 
 def _weather_match_score(note_text: str, weather_desc: str) -> float:
     tags = _weather_tags_kor(weather_desc)
@@ -125,6 +187,29 @@ def _weather_match_score(note_text: str, weather_desc: str) -> float:
     return min(1.0, c / max(1, len(tags)))
 
 # ---------------- 데이터/인덱스 ----------------
+def build_index(emb: np.ndarray, storage: str = EMBEDDING_STORAGE) -> "faiss.Index":
+    """
+    코퍼스 임베딩 -> 내적 검색 인덱스. 벡터는 인덱스 안에만 저장된다.
+      flat: float32 그대로 / fp16: 1/2 / int8: 차원별 8bit 스칼라 양자화 1/4
+    (PQ 는 faiss IndexPQ 가 IDSelector 를 지원하지 않아 조건 검색과 함께 쓸 수 없음)
+    """
+    import faiss
+    emb = np.ascontiguousarray(emb, dtype="float32")
+    n, d = emb.shape
+    if storage == "flat":
+        index = faiss.IndexFlatIP(d)
+    elif storage in ("fp16", "int8"):
+        qtype = faiss.ScalarQuantizer.QT_fp16 if storage == "fp16" else faiss.ScalarQuantizer.QT_8bit
+        index = faiss.IndexScalarQuantizer(d, qtype, faiss.METRIC_INNER_PRODUCT)
+    else:
+        raise ValueError(f"EMBEDDING_STORAGE must be flat|fp16|int8, got {storage!r}")
+    if n:
+        if not index.is_trained:
+            index.train(emb)
+        index.add(emb)
+    return index
+
+
 @dataclass
 class Doc:
     idx: int
@@ -133,48 +218,56 @@ class Doc:
     year: Optional[int]
     text: str
     raw: Dict
+    notes: Dict[str, List[str]] = field(default_factory=dict)
+    categories: List[str] = field(default_factory=list)
+    item: Dict = field(default_factory=dict)  # /recommend 응답용 (로드 시 미리 생성)
+    terms: frozenset = frozenset()            # 키워드 매칭용 노트/카테고리 토큰
+    note_ids: Optional[np.ndarray] = None     # NoteVocab id (int32, 정렬/중복 없음)
 
 class Recommender:
-    def __init__(self, csv_path: str, model_name: str = DEFAULT_MODEL, device: str = FORCE_DEVICE):
+    def __init__(self, csv_path: str, model_name: str = DEFAULT_MODEL, device: str = FORCE_DEVICE,
+                 note_image: Optional[Callable[[str], Tuple[str, str]]] = None,
+                 embeddings_path: Optional[str] = None, storage: str = EMBEDDING_STORAGE,
+                 note_vocab: Optional[NoteVocab] = None):
         self.csv_path = csv_path
+        # 노트 표기 정규화 사전 (없으면 카탈로그 옆 notes.csv 로 생성)
+        self.note_vocab = note_vocab
+        self.storage = storage
+        # flask embeddings build 결과 접두어 (<prefix>.npy/.json). 일치하면 corpus encode 생략
+        self.embeddings_path = embeddings_path
         self.model_name = model_name
         self.device = device
-        self.model: Optional[SentenceTransformer] = None
+        # 노트명 -> (slug, 검증된 이미지 URL). 없는 이미지는 플레이스홀더 URL
+        self.note_image = note_image or _default_note_image
+        self.model: Optional["SentenceTransformer"] = None
         self.docs: List[Doc] = []
         self.embeddings: Optional[np.ndarray] = None
-        self.faiss: Optional[faiss.IndexFlatIP] = None
-        self.bm25: Optional[BM25Okapi] = None
+        self.faiss: Optional["faiss.Index"] = None
+        self.bm25: Optional["BM25Okapi"] = None
+        self.filters: Optional[FilterIndex] = None
+        # 동시 요청의 쿼리 인코딩을 한 번의 배치 encode 로 묶음 (self.model 은 호출 시점에 참조)
+        self.encoder = BatchingEncoder(self._encode_batch)
         self._load()
 
     def _load(self):
+        import faiss
+        import pandas as pd
+        from rank_bm25 import BM25Okapi
+        from sentence_transformers import SentenceTransformer
+
+        if self.note_vocab is None:
+            self.note_vocab = load_note_vocab(
+                self.csv_path, os.path.join(os.path.dirname(self.csv_path), "notes.csv"))
+        self.token_map = self.note_vocab.token_map
+
         df = pd.read_csv(self.csv_path)
         for col in list(df.columns):
             if col.startswith("Unnamed"):
                 df = df.drop(columns=[col])
 
-        def norm_list_or_json(val):
-            s = "" if (val is None or (isinstance(val, float) and np.isnan(val))) else str(val)
-            if s and (s.strip().startswith("{") or s.strip().startswith("[")):
-                try:
-                    v = json.loads(s)
-                    if isinstance(v, dict):
-                        bag = []
-                        for k in ("top","middle","base","middleNotes","baseNotes","topNotes","Categorys","Note"):
-                            if k in v and isinstance(v[k], list):
-                                bag += [str(x) for x in v[k]]
-                        if not bag:
-                            for _, vv in v.items():
-                                if isinstance(vv, list): bag += [str(x) for x in vv]
-                        return " ".join(bag)
-                    if isinstance(v, list):
-                        return " ".join([str(x) for x in v])
-                except Exception:
-                    pass
-            return s
-
-        cat_text  = df.get("Categorys", pd.Series([""]*len(df))).map(norm_list_or_json).fillna("")
-        note_text = df.get("Note", pd.Series([""]*len(df))).map(norm_list_or_json).fillna("")
-        full_text = (cat_text + " " + note_text).str.strip()
+        cats  = df["Categorys"] if "Categorys" in df else [""] * len(df)
+        notes = df["Note"] if "Note" in df else [""] * len(df)
+        full_text = [doc_text(c, n) for c, n in zip(cats, notes)]
 
         docs = []
         for i, row in df.iterrows():
@@ -187,10 +280,20 @@ class Recommender:
                 brand=str(row.get("Brand", "")) if pd.notna(row.get("Brand", "")) else "",
                 name=str(row.get("Name", "")) if pd.notna(row.get("Name", "")) else "",
                 year=year,
-                text=str(full_text.iloc[i]) if pd.notna(full_text.iloc[i]) else "",
+                text=full_text[i],
                 raw=row.to_dict(),
+                notes=self.note_vocab.canonical_notes(structure_notes(row.get("Note"))),
+                categories=parse_categories(row.get("Categorys")),
             ))
+        for d in docs:
+            d.item = build_item(d, self.note_image)
+            d.terms = _doc_terms(d.notes, d.categories, self.token_map)
+            d.note_ids = np.unique(np.fromiter(
+                (self.note_vocab.id_of(n) for p in NOTE_POSITIONS + ("flat",) for n in d.notes.get(p, [])),
+                dtype=np.int32))
         self.docs = docs
+        self.filters = FilterIndex.from_docs(docs, token_map=self.token_map)
+        self.term_vocab = frozenset().union(*(d.terms for d in docs)) if docs else frozenset()
 
         if not self.docs:
             self.embeddings = np.zeros((0, 384), dtype="float32")
@@ -198,42 +301,120 @@ class Recommender:
             self.bm25 = BM25Okapi([[]])
             return
 
-        self.model = SentenceTransformer(self.model_name, device=self.device)
-        corpus = [d.text for d in self.docs]
-        if corpus:
-            emb = self.model.encode(
-                corpus,
-                batch_size=64,
-                show_progress_bar=False,
-                normalize_embeddings=True
-            )
-            self.embeddings = np.asarray(emb, dtype="float32")
+        with stage("model_load"):
+            configure_torch_threads()
+            self.model = SentenceTransformer(self.model_name, device=self.device)
+        prebuilt = None
+        if self.embeddings_path:
+            from .embeddings import EmbeddingStore, csv_fingerprint
+            prebuilt = EmbeddingStore(self.embeddings_path).load(
+                len(self.docs), self.model_name, csv_fingerprint(self.csv_path))
+        if prebuilt is None:
+            with stage("corpus_encode"):
+                emb = self.model.encode(
+                    [d.text for d in self.docs],
+                    batch_size=64,
+                    show_progress_bar=False,
+                    normalize_embeddings=True
+                )
+            emb = np.asarray(emb, dtype="float32")
         else:
-            self.embeddings = np.zeros((0, 384), dtype="float32")
-
-        dim = self.embeddings.shape[1] if self.embeddings.size else 384
-        index = faiss.IndexFlatIP(dim)
-        if self.embeddings.size:
-            index.add(self.embeddings)
-        self.faiss = index
+            emb = prebuilt
+
+        # 벡터는 인덱스 한 곳에만: flat 이면 self.embeddings 는 인덱스 버퍼의 뷰,
+        # 양자화면 재채점/MMR 용 float32 원본은 빌드 파일 mmap (페이지 캐시, 워커 간 공유)
+        self.faiss = build_index(emb, self.storage)
+        if self.storage == "flat":
+            self.embeddings = faiss.rev_swig_ptr(self.faiss.get_xb(), self.faiss.ntotal * self.faiss.d) \
+                                   .reshape(self.faiss.ntotal, self.faiss.d)
+        elif prebuilt is not None:
+            self.embeddings = prebuilt
+        else:
+            self.embeddings = emb
+            if has_app_context():
+                current_app.logger.warning("EMBEDDING_STORAGE=%s without prebuilt embeddings: float32 copy "
+                                           "stays in RAM (run flask embeddings build)", self.storage)
 
-        tokenized = [_tokenize_ko_en(d.text) for d in self.docs]
+        tokenized = [_tokenize_ko_en(d.text, self.token_map) for d in self.docs]
         self.bm25 = BM25Okapi(tokenized if tokenized else [[]])
 
-    def search(self, query: str, weather_desc: str = "", topn: int = TOPN_CANDIDATES) -> List[Tuple[int, float]]:
+    def _encode_batch(self, texts):
+        return self.model.encode(list(texts), batch_size=max(1, len(texts)),
+                                 normalize_embeddings=True, show_progress_bar=False)
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """정규화된 쿼리 임베딩 (float32). 동시 호출은 BatchingEncoder 가 묶어 처리."""
+        with stage("query_encode"):
+            return np.asarray(self.encoder.encode(query), dtype="float32")
+
+    def _faiss_search(self, q_emb: np.ndarray, topn: int, allowed: Optional[np.ndarray]):
+        """allowed(bool 마스크)가 있으면 IDSelectorBitmap 으로 허용 문서만 검색."""
+        k = max(1, min(topn, len(self.docs)))
+        if allowed is None:
+            return self.faiss.search(q_emb.reshape(1, -1), k)
+        import faiss
+        bits = np.packbits(allowed, bitorder="little")  # 검색이 끝날 때까지 참조 유지
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(allowed), faiss.swig_ptr(bits)))
+        return self.faiss.search(q_emb.reshape(1, -1), k, params=params)
+
+    def semantic_candidates(self, q_emb: np.ndarray, topn: int,
+                            allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        의미 검색 후보 (점수, 인덱스). 양자화 인덱스면 topn x RESCORE_FACTOR 개를 받아
+        float32 원본 벡터로 정확히 재채점한 뒤 상위 topn 만 남긴다.
+        """
+        fetch = topn if self.storage == "flat" else topn * max(1, RESCORE_FACTOR)
+        with stage("faiss_search"):
+            D, I = self._faiss_search(q_emb, fetch, allowed)
+        sem_scores = D[0] if D.size else np.array([], dtype="float32")
+        sem_idx    = I[0] if I.size else np.array([], dtype=int)
+        keep = sem_idx >= 0  # 허용 문서가 fetch 보다 적으면 -1 로 채워짐
+        sem_scores, sem_idx = sem_scores[keep], sem_idx[keep]
+        if self.storage != "flat" and sem_idx.size:
+            with stage("rescore"):
+                sem_idx = np.sort(sem_idx)  # mmap 은 정렬된 행 순서로 읽는 편이 빠름
+                sem_scores = np.asarray(self.embeddings[sem_idx], dtype="float32") @ q_emb
+                top = np.argsort(-sem_scores, kind="stable")[:topn]
+                sem_scores, sem_idx = sem_scores[top], sem_idx[top]
+        return sem_scores, sem_idx
+
+    def index_nbytes(self) -> Dict[str, int]:
+        """프로세스 메모리 내 검색 구조 크기: index(벡터 코드), exact(인덱스와 별도로 RAM 에 둔 float32)."""
+        index = self.faiss.sa_code_size() * self.faiss.ntotal if self.faiss is not None else 0
+        exact = 0
+        if self.storage != "flat" and self.embeddings is not None and not isinstance(self.embeddings, np.memmap):
+            exact = self.embeddings.nbytes
+        return {"index": int(index), "exact": int(exact)}
+
+    def search(self, query: str, weather_desc: str = "", topn: int = TOPN_CANDIDATES,
+               constraints: Optional[Constraints] = None,
+               keyword_query: str = "", q_emb: Optional[np.ndarray] = None,
+               taste: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        하이브리드 점수 = 의미 + BM25 + 날씨 + 키워드 (+ 취향).
+        keyword_query: 번역 전 원문 등 — 노트/카테고리와 정확히 일치하는 키워드 비율을 가산.
+        q_emb: 이미 계산한 쿼리 임베딩 (recommend 에서 MMR 과 공유)
+        taste: 사용자 취향 벡터 (정규화 안 된 EMA) — 후보 임베딩과의 내적을 W_TASTE 로 가산.
+        """
         query = (query or "").strip()
         if not query or self.faiss is None or self.embeddings is None or self.bm25 is None:
             return []
 
-        q_emb = self.model.encode([query], normalize_embeddings=True, show_progress_bar=False)[0].astype("float32")
+        allowed = self.filters.mask(constraints) if self.filters is not None else None
+        if allowed is not None and not allowed.any():
+            return []
+
+        if q_emb is None:
+            q_emb = self.encode_query(query)
         if not np.isfinite(q_emb).all():
             return []
 
-        D, I = self.faiss.search(q_emb.reshape(1, -1), max(1, min(topn, len(self.docs))))
-        sem_scores = D[0] if D.size else np.array([])
-        sem_idx    = I[0] if I.size else np.array([], dtype=int)
+        sem_scores, sem_idx = self.semantic_candidates(q_emb, topn, allowed)
 
-        bm25_scores = self.bm25.get_scores(_tokenize_ko_en(query)) if len(self.docs) else np.array([])
+        with stage("bm25_scores"):
+            bm25_scores = self.bm25.get_scores(_tokenize_ko_en(query, self.token_map)) if len(self.docs) else np.array([])
+        if allowed is not None and bm25_scores.size:
+            bm25_scores = np.where(allowed, bm25_scores, 0.0)  # 정규화 최대값도 허용 문서 기준
         bm25_dict = {i: float(bm25_scores[i]) for i in range(len(self.docs))} if bm25_scores.size else {}
         bm25_max = max([v for v in bm25_dict.values()] + [1e-9])
         bm25_norm = {i: (bm25_dict.get(i, 0.0) / bm25_max) for i in range(len(self.docs))}
@@ -243,71 +424,207 @@ class Recommender:
             txt = self.docs[int(i)].text if int(i) < len(self.docs) else ""
             weather_norm[int(i)] = _weather_match_score(txt, weather_desc)
 
+        # 카탈로그 어휘에 있는 키워드만 ("향수", "추천" 같은 말은 분모에서 빠짐)
+        kws = [t for t in _keyword_terms(keyword_query, query, token_map=self.token_map) if t in self.term_vocab]
+        keyword_norm = {}
+        if kws:
+            for i in sem_idx:
+                terms = self.docs[int(i)].terms
+                keyword_norm[int(i)] = sum(1 for t in kws if t in terms) / len(kws)
+
+        taste_scores = np.zeros(len(sem_idx), dtype="float32")
+        if taste is not None and W_TASTE and sem_idx.size and taste.shape == (self.embeddings.shape[1],):
+            with stage("taste"):
+                taste_scores = np.asarray(self.embeddings[sem_idx], dtype="float32") @ taste
+
         scored = []
-        for i, s in zip(sem_idx, sem_scores):
+        for i, s, t in zip(sem_idx, sem_scores, taste_scores):
             i = int(i)
             hybrid = (
                 W_SEMANTIC * float(s) +
                 W_BM25     * float(bm25_norm.get(i, 0.0)) +
-                W_WEATHER  * float(weather_norm.get(i, 0.0))
+                W_WEATHER  * float(weather_norm.get(i, 0.0)) +
+                W_KEYWORD  * float(keyword_norm.get(i, 0.0)) +
+                W_TASTE    * float(t)
             )
             scored.append((i, hybrid))
 
         scored.sort(key=lambda x: x[1], reverse=True)
         return scored[:topn]
 
-    def rerank_mmr(self, query: str, candidates: List[Tuple[int, float]], k: int = RETURN_K) -> List[int]:
+    def rerank_mmr(self, query: str, candidates: List[Tuple[int, float]], k: int = RETURN_K,
+                   q_emb: Optional[np.ndarray] = None) -> List[int]:
+        """candidates 의 하이브리드 점수를 관련도로, 임베딩 코사인을 중복도로 써서 상위 k 선택."""
         if not candidates:
             return []
         idxs = [int(i) for i, _ in candidates]
-        q_emb = self.model.encode([query], normalize_embeddings=True, show_progress_bar=False)[0].astype("float32")
+        if q_emb is None:
+            q_emb = self.encode_query(query)
         if not np.isfinite(q_emb).all():
             return idxs[:k]
-        return _mmr(self.embeddings, q_emb, idxs, k, lambda_coef=MMR_LAMBDA)
+        relevance = np.array([float(score) for _, score in candidates], dtype="float32")
+        with stage("mmr"):
+            return _mmr(self.embeddings, q_emb, idxs, k, lambda_coef=MMR_LAMBDA, relevance=relevance)
+
+    def parse_constraints(self, *texts: str) -> Constraints:
+        """쿼리 문장(원문/번역문 등)에서 연도/브랜드/카테고리/제외 노트 제약 추출."""
+        c = Constraints()
+        if self.filters is None:
+            return c
+        for t in texts:
+            c = c.merge(self.filters.parse(t))
+        return c
+
+    def explore(self, final_idxs: List[int], candidates: List[Tuple[int, float]], k: int,
+                rng: random.Random, slots: Optional[int] = None, pool_size: Optional[int] = None) -> List[int]:
+        """
+        탐색 단계: 결과 끝자리 slots 개를 MMR 에 뽑히지 않은 상위 후보(pool_size 개)에서
+        rng 로 골라 교체. rng 가 요청별로 시드되므로 같은 입력이면 같은 결과.
+        """
+        slots = EXPLORE_SLOTS if slots is None else slots
+        pool_size = EXPLORE_POOL if pool_size is None else pool_size
+        if slots <= 0 or pool_size <= 0 or len(candidates) <= k:
+            return final_idxs
+        chosen = set(final_idxs)
+        pool = [int(i) for i, _ in candidates[k: k + pool_size] if int(i) not in chosen]
+        n = min(slots, len(pool), len(final_idxs))
+        if n <= 0:
+            return final_idxs
+        out = list(final_idxs)
+        out[len(out) - n:] = rng.sample(pool, n)
+        EXPLORE_SWAPS.inc(n)
+        return out
 
-    def recommend(self, query: str, weather_desc: str = "", k: int = RETURN_K) -> List[Dict]:
-        candidates = self.search(query, weather_desc, topn=TOPN_CANDIDATES)
+    def recommend(self, query: str, weather_desc: str = "", k: int = RETURN_K,
+                  constraints: Optional[Constraints] = None, keyword_query: str = "",
+                  seed: Optional[int] = None, q_emb: Optional[np.ndarray] = None,
+                  taste: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        seed: 탐색 단계 RNG 시드 (None 이면 쿼리/날씨로 결정적 시드).
+        q_emb: 미리 계산한 쿼리 임베딩 (recommend_batch 에서 여러 쿼리를 한 번에 encode)
+        taste: 사용자 취향 벡터 (search 참고)
+        """
+        query = (query or "").strip()
+        if not query or self.model is None:
+            return []
+        if q_emb is None:
+            q_emb = self.encode_query(query)  # 검색과 MMR 이 같은 임베딩을 공유 (encode 1회)
+        candidates = self.search(query, weather_desc, topn=TOPN_CANDIDATES,
+                                 constraints=constraints, keyword_query=keyword_query, q_emb=q_emb,
+                                 taste=taste)
         if not candidates:
             return []
 
-        mmr_idxs = self.rerank_mmr(query, candidates, k=k)
+        mmr_idxs = self.rerank_mmr(query, candidates, k=k, q_emb=q_emb)
         if not mmr_idxs:
             mmr_idxs = [i for i, _ in candidates[:k]]
 
-        final_idxs = list(mmr_idxs[:k])
-        if len(candidates) > k:
-            pool = [i for i, _ in candidates[k: min(len(candidates), k+10)]]
-            if pool:
-                pick = random.choice(pool)
-                final_idxs[-1] = int(pick)
+        rng = random.Random(request_seed(query, weather_desc, keyword_query) if seed is None else seed)
+        with stage("explore"):
+            final_idxs = self.explore(list(mmr_idxs[:k]), candidates, k, rng)
 
         out = []
         for i in final_idxs:
             if i < 0 or i >= len(self.docs):
                 continue
-            d = self.docs[int(i)]
-            row = d.raw
-
-            def _safe(val):
-                if val is None:
-                    return None
-                if isinstance(val, float) and (np.isnan(val) or np.isinf(val)):
-                    return None
-                return val
-
-            out.append({
-                "Brand":     _safe(d.brand),
-                "Name":      _safe(d.name),
-                "Year":      _safe(d.year),
-                "Picture":   _safe(row.get("Picture")),
-                "Categorys": _safe(row.get("Categorys")),
-                "Note":      _safe(row.get("Note")),
-            })
+            out.append(dict(self.docs[int(i)].item))
         return out
 
 
+def build_item(d: Doc, note_image: Callable[[str], Tuple[str, str]]) -> Dict:
+    """
+    응답용 dict. 노트는 위치별로 미리 파싱/이미지 해석해 두되, 응답을 작게 유지하려고
+    URL 은 싣지 않는다 (프론트가 /note-img/<slug> 로 조립, slug 규칙은 images.slugify_note).
+      "Rose"                          이미지가 slugify_note(이름) 에 있음
+      {"name": ..., "slug": ...}      다른 표기의 이미지 (Cardamon → cardamom)
+      {"name": ..., "ph": 1}          이미지 없음 → 플레이스홀더
+    빈 위치(top/middle/base/flat)는 생략.
+    """
+    def _safe(val):
+        if val is None:
+            return None
+        if isinstance(val, float) and (np.isnan(val) or np.isinf(val)):
+            return None
+        return val
+
+    def _entries(names: List[str]) -> List:
+        entries = []
+        for n in names:
+            slug, url = note_image(n)
+            if url == PLACEHOLDER_URL:
+                entries.append({"name": n, "ph": 1})
+            elif slug == slugify_note(n):
+                entries.append(n)
+            else:
+                entries.append({"name": n, "slug": slug})
+        return entries
+
+    return {
+        "id":        d.idx,  # /perfume/<id>/similar 등에서 쓰는 카탈로그 행 번호
+        "Brand":     _safe(d.brand),
+        "Name":      _safe(d.name),
+        "Year":      _safe(d.year),
+        "Picture":   _safe(d.raw.get("Picture")),
+        "Categorys": d.categories,
+        "Notes":     {pos: _entries(d.notes[pos]) for pos in NOTE_POSITIONS + ("flat",) if d.notes.get(pos)},
+    }
+
+
+def load_catalog_items(csv_path: str, note_vocab: NoteVocab,
+                       note_image: Callable[[str], Tuple[str, str]]) -> List[Dict]:
+    """
+    모델/pandas/인덱스 없이 CSV 만 읽어 응답용 item 목록 생성 (/similar 용).
+    Recommender._load 의 d.item 과 같은 값 (결측은 pandas 규칙대로 None / "").
+    """
+    items = []
+    for i, row in enumerate(iter_catalog_rows(csv_path)):
+        year = cell(row, "Year")
+        try:
+            year = int(float(year)) if year is not None else None
+        except ValueError:
+            year = None
+        d = Doc(
+            idx=i,
+            brand=cell(row, "Brand") or "",
+            name=cell(row, "Name") or "",
+            year=year,
+            text="",
+            raw={"Picture": cell(row, "Picture")},
+            notes=note_vocab.canonical_notes(structure_notes(cell(row, "Note"))),
+            categories=parse_categories(cell(row, "Categorys")),
+        )
+        items.append(build_item(d, note_image))
+    return items
+
+
 # 싱글턴 캐시
 @lru_cache(maxsize=1)
 def get_recommender() -> Recommender:
+    from .embeddings import embeddings_prefix
+    from .images import note_image_resolver
+    from .note_vocab import get_note_vocab
     csv_path = os.path.normpath(os.path.join(current_app.root_path, "..", "per_data.csv"))
-    return Recommender(csv_path, model_name=DEFAULT_MODEL, device=FORCE_DEVICE)
+    vocab = get_note_vocab()
+    return Recommender(csv_path, model_name=DEFAULT_MODEL, device=FORCE_DEVICE,
+                       note_image=note_image_resolver(current_app, vocab),
+                       embeddings_path=embeddings_prefix(current_app), note_vocab=vocab)
+
+
+@lru_cache(maxsize=1)
+def get_catalog_items() -> List[Dict]:
+    """
+    응답용 item 목록 (행 번호 = id). 이 워커에 Recommender 가 이미 떠 있으면 그 item 을 쓰고,
+    아니면 모델 없이 CSV 만 읽는다 — RETRIEVAL_URLS 로 검색을 분리한 웹 워커가 /similar 때문에
+    모델을 올리지 않도록.
+    """
+    if get_recommender.cache_info().currsize:
+        return [d.item for d in get_recommender().docs]
+    from .images import note_image_resolver
+    from .note_vocab import get_note_vocab
+    csv_path = os.path.normpath(os.path.join(current_app.root_path, "..", "per_data.csv"))
+    vocab = get_note_vocab()
+    return load_catalog_items(csv_path, vocab, note_image_resolver(current_app, vocab))
+
+
+register_gauge("model_loaded", "1 once the embedding model and catalog index are warm",
+               lambda: get_recommender.cache_info().currsize)
@@ -0,0 +1,117 @@
+# app/retrieval_service.py
+"""
+독립 검색 서비스: 모델/FAISS/BM25 를 이 프로세스 하나가 보유하고 웹 워커는 얇은 클라이언트만.
+
+  flask --app manage.py retrieval serve --bind unix:/tmp/perfume-retrieval.0.sock
+  flask --app manage.py retrieval serve --bind 127.0.0.1:8765
+  (replica 여러 개 = 서로 다른 bind 로 여러 번 실행, 웹은 RETRIEVAL_URLS 에 모두 나열)
+
+  POST /recommend        { query, weather_desc, k, keyword_query, seed, filters, taste, observe }
+                         -> { items, filters, observation? }
+  POST /recommend_batch  { requests: [ ... ] } -> { results: [ ... ] }
+  GET  /healthz          -> { ok, docs, pid }
+"""
+from __future__ import annotations
+import json
+import os
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+from flask.cli import AppGroup
+
+from .backends import recommend_batch
+
+try:
+    import orjson
+except Exception:
+    orjson = None  # 미설치 시 표준 json 사용
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def make_handler(rec):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive (클라이언트 연결 풀 재사용)
+
+        def _send(self, status: int, obj) -> None:
+            body = _dumps(obj)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/healthz":
+                return self._send(404, {"error": "not_found"})
+            self._send(200, {"ok": True, "docs": len(rec.docs), "pid": os.getpid()})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                req = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                return self._send(400, {"error": "bad_request", "detail": str(e)})
+            try:
+                if self.path == "/recommend":
+                    return self._send(200, recommend_batch(rec, [req])[0])
+                if self.path == "/recommend_batch":
+                    return self._send(200, {"results": recommend_batch(rec, req.get("requests") or [])})
+                self._send(404, {"error": "not_found"})
+            except Exception as e:
+                self._send(500, {"error": "retrieval_failed", "detail": str(e)})
+
+        def address_string(self):
+            return str(self.client_address[0]) if self.client_address else "unix"
+
+        def log_message(self, *args):
+            pass  # 요청 로그는 웹 쪽 /metrics 로 충분
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)  # 이전 실행이 남긴 소켓 파일
+        super().server_bind()
+        self.server_name, self.server_port = "localhost", 0
+
+
+def make_server(rec, bind: str):
+    """bind: "unix:/path.sock" 또는 "host:port"."""
+    handler = make_handler(rec)
+    if bind.startswith("unix:"):
+        return UnixHTTPServer(bind[len("unix:"):], handler)
+    host, _, port = bind.rpartition(":")
+    return ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+
+
+retrieval_cli = AppGroup("retrieval", help="독립 검색 서비스 (모델/인덱스 보유)")
+
+
+@retrieval_cli.command("serve")
+@click.option("--bind", default="unix:/tmp/perfume-retrieval.sock", show_default=True,
+              help="unix:/path.sock 또는 host:port")
+def serve_command(bind: str):
+    """카탈로그/모델을 로드한 뒤 요청 대기."""
+    from .recommender import get_recommender
+    t0 = time.perf_counter()
+    rec = get_recommender()
+    server = make_server(rec, bind)
+    click.echo(f"retrieval service: {len(rec.docs)} perfumes loaded in {time.perf_counter() - t0:.1f}s, "
+               f"listening on {bind} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if bind.startswith("unix:") and os.path.exists(bind[len("unix:"):]):
+            os.unlink(bind[len("unix:"):])
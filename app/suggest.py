@@ -0,0 +1,217 @@
+# app/suggest.py
+"""
+입력 자동완성: GET /suggest?q=바닐&k=8
+
+앱 시작 시 카탈로그(브랜드, 향수명, Categorys 어코드, 노트)와 notes.csv, 한국어 별칭(KO_ALIASES)으로
+접두어 인덱스를 1회 만든다. 구조 = 정렬된 키 배열 + bisect.
+  - 키: 표기 전체와 각 단어 시작 위치 ("acqua di parma", "di parma", "parma")
+  - 노트는 NoteVocab 대표 표기 + 철자 변형 키 ("vanille" → Vanilla)
+  - 순위: 표기 첫머리 일치 > 카탈로그 빈도 > 짧은 표기
+  - 후보가 많은 짧은 접두어("v", "ro")는 상위 결과를 미리 계산해 두어 조회가 항상 후보 수백 개 이하
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from flask import Blueprint, current_app, jsonify, request
+
+from .catalog import NOTE_POSITIONS, iter_catalog_rows, parse_categories, structure_notes
+from .filters import CATEGORY_ALIASES, NOTE_ALIASES
+from .metrics import stage
+
+SUGGEST_LIMIT    = 8     # 기본 개수
+SUGGEST_MAX      = 20    # ?k= 상한
+SUGGEST_SCAN_MAX = 256   # 이보다 후보가 많은 접두어는 결과를 미리 계산
+
+suggest_bp = Blueprint("suggest", __name__)
+
+
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def suggest_key(text: str) -> str:
+    """악센트 제거(é → e, 한글은 유지) + 소문자 + 영숫자/한글만, 공백 1칸."""
+    s = str(text).lower()
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = unicodedata.normalize("NFC", "".join(ch for ch in s if not unicodedata.combining(ch)))
+    return " ".join(_NON_WORD.sub(" ", s).split())
+
+
+class SuggestIndex:
+    """
+    entries[i] = {"text", "kind", "count", (+ "brand" | "en")}
+    keys/rows: 정렬된 (키, 행 id) — rank[row] 가 작을수록 앞 순위, entry_of[row] = 항목 id.
+    """
+
+    def __init__(self, entries: List[Dict], keyed: List[Tuple[str, int, bool]]):
+        self.entries = entries
+        # 행 순위: 첫머리 일치 먼저, 빈도 높은 순, 짧은 표기 순
+        order = sorted(range(len(keyed)), key=lambda r: (not keyed[r][2], -entries[keyed[r][1]]["count"],
+                                                         len(entries[keyed[r][1]]["text"]), keyed[r][1]))
+        self.rank = [0] * len(keyed)
+        for pos, r in enumerate(order):
+            self.rank[r] = pos
+        rows = sorted(range(len(keyed)), key=lambda r: keyed[r][0])
+        self.keys = [keyed[r][0] for r in rows]
+        self.entry_of = [keyed[r][1] for r in rows]
+        self.rank = [self.rank[r] for r in rows]
+        self.heads: Dict[str, List[int]] = {}
+        self._precompute_heads()
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + "￿")
+
+    def _top(self, lo: int, hi: int, k: int) -> List[int]:
+        best: Dict[int, int] = {}
+        for row in range(lo, hi):
+            e, r = self.entry_of[row], self.rank[row]
+            if r < best.get(e, 1 << 62):
+                best[e] = r
+        return sorted(best, key=best.__getitem__)[:k]
+
+    def _precompute_heads(self) -> None:
+        """후보가 SUGGEST_SCAN_MAX 보다 많은 접두어만, 짧은 것부터 길이를 늘려 가며."""
+        pending = [""]
+        while pending:
+            nxt = []
+            for parent in pending:
+                lo, hi = self._range(parent)
+                depth = len(parent) + 1
+                row = lo
+                while row < hi:
+                    key = self.keys[row]
+                    if len(key) < depth:
+                        row += 1
+                        continue
+                    prefix = key[:depth]
+                    _, end = self._range(prefix)
+                    if end - row > SUGGEST_SCAN_MAX:
+                        self.heads[prefix] = self._top(row, end, SUGGEST_MAX)
+                        nxt.append(prefix)
+                    row = end
+            pending = nxt
+
+    def suggest(self, q: str, k: int = SUGGEST_LIMIT) -> List[Dict]:
+        key = suggest_key(q)
+        if not key:
+            return []
+        ids = self.heads.get(key)
+        if ids is None:
+            ids = self._top(*self._range(key), k)
+        return [self.entries[i] for i in ids[:k]]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, catalog_csv: str, vocab=None, notes_csv_names: Optional[List[str]] = None) -> "SuggestIndex":
+        brands: Counter = Counter()
+        names: Dict[Tuple[str, str], int] = {}
+        accords: Counter = Counter()
+        raw_notes: Counter = Counter()
+        for row in iter_catalog_rows(catalog_csv):
+            brand, name = (row.get("Brand") or "").strip(), (row.get("Name") or "").strip()
+            if brand:
+                brands[brand] += 1
+            if name:
+                names.setdefault((name, brand), 0)
+            accords.update({c.strip().lower() for c in parse_categories(row.get("Categorys")) if c.strip()})
+            structured = structure_notes(row.get("Note"))
+            raw_notes.update({n.strip() for p in NOTE_POSITIONS + ("flat",) for n in structured.get(p, []) if n.strip()})
+        # 대표 표기로 합산은 서로 다른 표기마다 1회 (행마다 하면 빌드가 몇 배 느려짐)
+        notes: Counter = Counter()
+        for n, c in raw_notes.items():
+            notes[vocab.canonical(n) if vocab is not None else n] += c
+        for n in notes_csv_names or []:
+            notes.setdefault(vocab.canonical(n) if vocab is not None else n, 0)
+
+        entries: List[Dict] = []
+        keyed: List[Tuple[str, int, bool]] = []
+
+        def add(entry: Dict, *surfaces: str) -> None:
+            eid = len(entries)
+            entries.append(entry)
+            seen = set()
+            for surface in surfaces:
+                key = suggest_key(surface)
+                words = key.split(" ")
+                for i in range(len(words)):
+                    sub = " ".join(words[i:])
+                    if sub and sub not in seen:
+                        seen.add(sub)
+                        keyed.append((sub, eid, i == 0))
+
+        for b, c in brands.items():
+            add({"text": b, "kind": "brand", "count": c}, b)
+        for (n, b) in names:
+            add({"text": n, "kind": "perfume", "count": 1, "brand": b}, n)
+        for a, c in accords.items():
+            add({"text": a, "kind": "accord", "count": c}, a)
+        note_count = {suggest_key(n): c for n, c in notes.items()}
+        for n, c in notes.items():
+            variants = vocab.variants(n) if vocab is not None else [n]
+            add({"text": n, "kind": "note", "count": c}, n, *variants)
+        # 한국어 별칭: 입력은 한국어 그대로 (쿼리 파서/번역이 처리), 빈도는 대상 노트/어코드 기준
+        for ko, en in NOTE_ALIASES.items():
+            add({"text": ko, "kind": "note", "count": note_count.get(suggest_key(en), 0), "en": en}, ko)
+        for ko, en in CATEGORY_ALIASES.items():
+            add({"text": ko, "kind": "accord", "count": accords.get(en, 0), "en": en}, ko)
+        return cls(entries, keyed)
+
+
+_build_lock = threading.Lock()
+
+
+def _reset_build_lock() -> None:
+    # 프리포크 서버가 빌드 중(락 보유)에 fork 하면 자식은 영원히 잠긴 락을 물려받음 → 새 락으로
+    global _build_lock
+    _build_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_build_lock)
+
+
+def _ensure_index(app) -> SuggestIndex:
+    """첫 /suggest 요청에서 1회 빌드 (~0.3s). 동시에 온 요청은 빌드가 끝날 때까지 기다린다."""
+    with _build_lock:
+        index = app.extensions.get("suggest_index")
+        if index is not None:
+            return index
+        from .note_vocab import get_note_vocab
+        t0 = time.perf_counter()
+        root = os.path.normpath(os.path.join(app.root_path, ".."))
+        notes_csv = os.path.join(root, "notes.csv")
+        notes_csv_names = []
+        if os.path.exists(notes_csv):
+            with open(notes_csv, encoding="utf-8") as f:
+                notes_csv_names = [line.strip() for i, line in enumerate(f) if i and line.strip()]  # 첫 줄 = 헤더
+        with app.app_context():
+            vocab = get_note_vocab()
+        index = SuggestIndex.build(os.path.join(root, "per_data.csv"), vocab, notes_csv_names)
+        app.extensions["suggest_index"] = index
+        app.logger.debug("suggest index: %d entries, %d keys in %.0f ms", len(index), len(index.keys),
+                         (time.perf_counter() - t0) * 1000)
+        return index
+
+
+@suggest_bp.route("/suggest", methods=["GET"])
+def suggest():
+    """?q=접두어&k=N → {"q", "suggestions": [{text, kind, count, brand?, en?}]}"""
+    q = (request.args.get("q") or "")[:64]
+    try:
+        k = max(1, min(SUGGEST_MAX, int(request.args.get("k", SUGGEST_LIMIT))))
+    except ValueError:
+        k = SUGGEST_LIMIT
+    index = current_app.extensions.get("suggest_index") or _ensure_index(current_app._get_current_object())
+    with stage("suggest"):
+        items = index.suggest(q, k)
+    resp = jsonify(q=q, suggestions=items)
+    resp.headers["Cache-Control"] = "public, max-age=300"  # 카탈로그 기준이라 브라우저 캐시 허용
+    return resp
@@ -0,0 +1,231 @@
+# app/taste.py
+"""
+사용자 취향 프로필 (개인화).
+
+추천 이력이 저장될 때마다 지수이동평균(EMA)으로 조금씩 갱신한다 — 요청마다 이력 전체의
+results_json 을 읽어 다시 계산하지 않는다.
+  vector  ← (1-α)·vector  + α·(이번 추천 결과 임베딩 평균)       float16 blob (d=384 → 768 byte)
+  accords ← (1-α)·accords + α·(결과 중 어코드별 비율)            상위 TASTE_TOP_TERMS 개만 JSON
+  notes   ← (1-α)·notes   + α·(결과 중 노트별 비율, NoteVocab id)  〃
+
+vector 는 0 에서 시작하고 정규화하지 않는다 → 이력이 적거나 취향이 흩어진 사용자는 |vector| 가
+작아 가산점도 작고, 일관된 사용자일수록 |vector| → 1.
+검색 점수: hybrid += W_TASTE · (후보 임베딩 · vector)  (후보당 내적 1회, recommender.search)
+
+  flask taste backfill [--workers 0] [--batch 200]
+    기존 Recommendation 이력으로 사용자별 프로필을 처음부터 다시 계산.
+    results_json 파싱은 워커 프로세스(spawn)에서 병렬, 벡터 계산/저장은 부모 하나만.
+"""
+from __future__ import annotations
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import click
+import numpy as np
+from flask.cli import AppGroup
+
+from .db import db
+from .models import Recommendation, UserTaste
+
+TASTE_ALPHA     = float(os.getenv("TASTE_ALPHA", "0.2"))     # EMA 갱신 비율 (클수록 최근 이력 위주)
+TASTE_TOP_TERMS = int(os.getenv("TASTE_TOP_TERMS", "32"))    # 어코드/노트 히스토그램 유지 개수
+
+
+@dataclass
+class TasteProfile:
+    vector: Optional[np.ndarray] = None          # float32 (d,), 아직 갱신 전이면 None
+    accords: Dict[str, float] = field(default_factory=dict)
+    notes: Dict[int, float] = field(default_factory=dict)
+    updates: int = 0
+
+    def update(self, obs: Dict, alpha: float = TASTE_ALPHA) -> None:
+        """관측 1건({vector, accords, notes}) 반영."""
+        v = np.asarray(obs.get("vector") or [], dtype=np.float32)
+        if v.size:
+            if self.vector is None or self.vector.shape != v.shape:
+                self.vector = np.zeros_like(v)  # 첫 관측 또는 임베딩 모델 변경
+            self.vector = (1.0 - alpha) * self.vector + alpha * v
+        self.accords = _ema_hist(self.accords, obs.get("accords") or {}, alpha)
+        self.notes = _ema_hist(self.notes, {int(k): w for k, w in (obs.get("notes") or {}).items()}, alpha)
+        self.updates += 1
+
+
+def _ema_hist(old: Dict, new: Dict, alpha: float, top: int = TASTE_TOP_TERMS) -> Dict:
+    merged = {k: (1.0 - alpha) * w for k, w in old.items()}
+    for k, w in new.items():
+        merged[k] = merged.get(k, 0.0) + alpha * float(w)
+    kept = sorted(merged.items(), key=lambda kv: -kv[1])[:top]
+    return {k: round(w, 4) for k, w in kept if w >= 1e-4}
+
+
+def observe(rec, idxs: Iterable[int]) -> Optional[Dict]:
+    """추천 결과(카탈로그 행 번호들) -> 관측 {vector, accords, notes}. 유효한 행이 없으면 None."""
+    idxs = [int(i) for i in idxs if 0 <= int(i) < len(rec.docs)]
+    if not idxs or rec.embeddings is None:
+        return None
+    mean = np.asarray(rec.embeddings[np.sort(idxs)], dtype=np.float32).mean(axis=0)
+    norm = float(np.linalg.norm(mean))
+    accords: Counter = Counter()
+    notes: Counter = Counter()
+    for i in idxs:
+        d = rec.docs[i]
+        accords.update(set(d.categories))
+        if d.note_ids is not None:
+            notes.update(int(n) for n in d.note_ids if n >= 0)
+    n = len(idxs)
+    return {
+        "vector": (mean / norm if norm > 0 else mean).tolist(),
+        "accords": {a: c / n for a, c in accords.items()},
+        "notes": {str(k): c / n for k, c in notes.items()},  # JSON 키 = 문자열
+    }
+
+
+# ---------------- DB 행 <-> 프로필 ----------------
+def to_profile(row: Optional[UserTaste]) -> TasteProfile:
+    if row is None:
+        return TasteProfile()
+    vector = np.frombuffer(row.vector, dtype=np.float16).astype(np.float32) if row.vector else None
+    return TasteProfile(vector=vector,
+                        accords=json.loads(row.accords or "{}"),
+                        notes={int(k): w for k, w in json.loads(row.notes or "{}").items()},
+                        updates=row.updates or 0)
+
+
+def store_profile(row: UserTaste, profile: TasteProfile) -> UserTaste:
+    row.vector = profile.vector.astype(np.float16).tobytes() if profile.vector is not None else None
+    row.accords = json.dumps(profile.accords, ensure_ascii=False, separators=(",", ":"))
+    row.notes = json.dumps({str(k): w for k, w in profile.notes.items()}, separators=(",", ":"))
+    row.updates = profile.updates
+    row.updated_at = datetime.utcnow()
+    return row
+
+
+def load_taste(user_id: int) -> Tuple[Optional[UserTaste], TasteProfile]:
+    """(DB 행 또는 None, 프로필). 기본키 조회 1회."""
+    row = db.session.get(UserTaste, user_id)
+    return row, to_profile(row)
+
+
+def record_observation(user_id: int, row: Optional[UserTaste], profile: TasteProfile,
+                       obs: Optional[Dict]) -> None:
+    """관측을 EMA 로 반영해 세션에 추가 (커밋은 호출 측 — 추천 이력과 같은 트랜잭션)."""
+    if not obs:
+        return
+    profile.update(obs)
+    if row is None:
+        row = UserTaste(user_id=user_id)
+        db.session.add(row)
+    store_profile(row, profile)
+
+
+# ---------------- 백필 ----------------
+def _item_keys(results_json: Optional[str]) -> List[Tuple[Optional[int], str, str]]:
+    try:
+        items = json.loads(results_json or "[]") or []
+    except ValueError:
+        return []
+    keys = []
+    for it in items:
+        if isinstance(it, dict):
+            pid = it.get("id")
+            keys.append((pid if isinstance(pid, int) else None, str(it.get("Brand") or ""), str(it.get("Name") or "")))
+    return keys
+
+
+def _parse_histories(rows: List[Tuple[int, Optional[str]]]) -> List[Tuple[int, List]]:
+    """워커: [(user_id, results_json)] (시간순) -> [(user_id, [(id, brand, name), ...])]."""
+    return [(uid, _item_keys(rj)) for uid, rj in rows]
+
+
+def _resolve(rec, by_name: Dict[Tuple[str, str], int], keys) -> List[int]:
+    """이력의 아이템 -> 현재 카탈로그 행 번호. id 가 있어도 이름이 다르면(카탈로그 변경) 이름으로."""
+    out = []
+    for pid, brand, name in keys:
+        if pid is not None and 0 <= pid < len(rec.docs) and rec.docs[pid].name == name:
+            out.append(pid)
+        elif (brand, name) in by_name:
+            out.append(by_name[(brand, name)])
+    return out
+
+
+def backfill_tastes(rec, batch: int = 200, workers: int = 0, progress=None) -> Dict:
+    """
+    모든 사용자의 프로필을 이력으로 다시 계산해 저장. 사용자 batch 명 단위로 이력을 읽어
+    워커에 파싱을 맡기고(동시에 workers x 2 배치까지), 결과가 오는 대로 EMA 계산 + 커밋.
+    progress(done_users, total_users) 콜백.
+    """
+    by_name = {(d.brand, d.name): d.idx for d in rec.docs}
+    user_ids = [uid for (uid,) in (Recommendation.query.with_entities(Recommendation.user_id)
+                                   .distinct().order_by(Recommendation.user_id))]
+    batches = [user_ids[i:i + batch] for i in range(0, len(user_ids), batch)]
+    workers = workers or (os.cpu_count() or 1)
+    stats = {"users": 0, "rows": 0}
+
+    def rows_of(ids: List[int]) -> List[Tuple[int, Optional[str]]]:
+        return (Recommendation.query
+                .with_entities(Recommendation.user_id, Recommendation.results_json)
+                .filter(Recommendation.user_id.in_(ids))
+                .order_by(Recommendation.user_id, Recommendation.queried_at, Recommendation.id)
+                .all())
+
+    def finish(parsed: List[Tuple[int, List]]) -> None:
+        profiles: Dict[int, TasteProfile] = {}
+        for uid, keys in parsed:
+            obs = observe(rec, _resolve(rec, by_name, keys))
+            if obs:
+                profiles.setdefault(uid, TasteProfile()).update(obs)
+        existing = {r.user_id: r for r in UserTaste.query.filter(UserTaste.user_id.in_(list(profiles)))}
+        for uid, profile in profiles.items():
+            row = existing.get(uid)
+            if row is None:
+                row = UserTaste(user_id=uid)
+                db.session.add(row)
+            store_profile(row, profile)
+        db.session.commit()
+        stats["users"] += len({uid for uid, _ in parsed})
+        stats["rows"] += len(parsed)
+        if progress:
+            progress(stats["users"], len(user_ids))
+
+    t0 = time.perf_counter()
+    if workers == 1 or len(batches) <= 1:
+        for ids in batches:
+            finish(_parse_histories(rows_of(ids)))
+    else:
+        # 사용자 단위로 나눠 배치 간 순서는 상관없음. DB 읽기/쓰기는 부모만 (SQLite 잠금 회피)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as ex:
+            inflight = set()
+            for ids in batches:
+                inflight.add(ex.submit(_parse_histories, [tuple(r) for r in rows_of(ids)]))
+                if len(inflight) >= workers * 2:
+                    finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        finish(fut.result())
+            for fut in wait(inflight).done:
+                finish(fut.result())
+    return dict(stats, seconds=time.perf_counter() - t0)
+
+
+taste_cli = AppGroup("taste", help="사용자 취향 프로필 (개인화)")
+
+
+@taste_cli.command("backfill")
+@click.option("--batch", default=200, show_default=True, help="한 번에 읽을 사용자 수")
+@click.option("--workers", default=0, help="results_json 파싱 프로세스 수 (0 = CPU 코어 수)")
+def backfill_command(batch: int, workers: int):
+    """기존 추천 이력으로 모든 사용자의 취향 벡터/히스토그램을 다시 계산."""
+    from .recommender import get_recommender
+    rec = get_recommender()
+
+    def progress(done: int, total: int) -> None:
+        click.echo(f"  {done}/{total} users")
+
+    stats = backfill_tastes(rec, batch=batch, workers=workers, progress=progress)
+    click.echo(f"{stats['users']} users / {stats['rows']} recommendations in {stats['seconds']:.1f}s")
@@ -0,0 +1,188 @@
+# app/weather_snapshot.py
+"""
+"오늘 날씨 향수" 스냅샷: 막연한 쿼리("오늘 날씨에 어울리는 향수", 빈 쿼리)는 결과가 사실상
+날씨로만 정해지므로, 날씨 버킷별 결과를 미리 계산해 두고 /recommend 에서 dict 조회로 응답한다.
+
+  버킷 = 날씨 상태(rain/snow/cloud/clear/haze/none) x 기온 밴드(cold/cool/mild/hot/any) = 30개
+  각 버킷: 대표 날씨 문자열(weather_context)로 전체 파이프라인(검색 → MMR → 탐색) 실행,
+           탐색 시드 = 날짜+버킷 → 하루 동안 같은 결과, 날마다 끝자리가 바뀜
+
+  flask weather-snapshot build              1회 빌드 → per_data.weather.json
+  flask weather-snapshot run --every 3600   주기적으로 다시 빌드 (스케줄러 프로세스 1개)
+
+스냅샷은 취향 벡터 없이 계산되므로 취향 프로필이 있는 사용자(W_TASTE > 0)에게는 쓰지 않는다
+(첫 방문/이력 없는 사용자용). 그 사용자들의 막연한 쿼리는 전체 파이프라인에서 취향이 반영된다.
+
+웹 워커는 파일 mtime 이 바뀌면 다시 읽고(WEATHER_SNAPSHOT_CHECK_SECS 마다 확인),
+WEATHER_SNAPSHOT_MAX_AGE 보다 오래된 스냅샷은 쓰지 않고 전체 파이프라인으로 처리한다.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .metrics import cache_event
+from .weather_utils import TEMP_BANDS, WEATHER_BUCKETS, temp_band, weather_bucket, weather_context
+
+WEATHER_SNAPSHOT_CHECK_SECS = float(os.getenv("WEATHER_SNAPSHOT_CHECK_SECS", "30"))
+WEATHER_SNAPSHOT_MAX_AGE    = float(os.getenv("WEATHER_SNAPSHOT_MAX_AGE", "21600"))  # 6시간
+WEATHER_SNAPSHOT_EVERY      = float(os.getenv("WEATHER_SNAPSHOT_EVERY", "3600"))
+
+# 스냅샷 빌드에 쓰는 대표 쿼리 (원문 / 번역문)
+SNAPSHOT_QUERY_KO = "오늘 날씨에 어울리는 향수"
+SNAPSHOT_QUERY_EN = "a perfume that suits today's weather"
+
+# 막연한 쿼리 판정: 모든 토큰이 아래 어간으로 시작하면 (조사 붙은 "날씨에", "어울리는" 포함)
+VAGUE_STEMS_KO = ("오늘", "지금", "요즘", "날씨", "어울", "추천", "해줘", "알려",
+                  "좋은", "괜찮", "무난", "아무", "뭐", "뿌릴", "쓸만", "하나", "좀")
+# 향/향수는 접두 일치하면 "향신료", "향나무" 까지 걸리므로 단어 전체(+ 조사)만
+VAGUE_WORDS_KO = frozenset({"향", "향수"})
+_PARTICLE_KO = re.compile(r"(?:으로|로|이|가|은|는|을|를|도|요)$")
+VAGUE_WORDS_EN = frozenset({"today", "todays", "s", "weather", "perfume", "perfumes", "fragrance", "scent",
+                            "recommend", "recommendation", "suggest", "suit", "suits", "for", "the", "a",
+                            "any", "good", "nice", "me", "some", "that", "with", "this"})
+
+
+def is_vague_query(text: str) -> bool:
+    """빈 쿼리이거나 날씨/추천 관용어로만 이루어진 쿼리."""
+    tokens = re.sub(r"[^0-9a-z가-힣]+", " ", (text or "").lower()).split()
+    return all(t in VAGUE_WORDS_EN or t in VAGUE_WORDS_KO or _PARTICLE_KO.sub("", t) in VAGUE_WORDS_KO
+               or t.startswith(VAGUE_STEMS_KO) for t in tokens)
+
+
+def bucket_key(desc: str, temp=None) -> str:
+    """"rain:cold" 형식. 설명/기온을 모르면 none / any."""
+    return f"{weather_bucket(desc) or 'none'}:{temp_band(temp) or 'any'}"
+
+
+def snapshot_buckets() -> Dict[str, str]:
+    """버킷 키 -> 파이프라인에 넣을 대표 날씨 문자열."""
+    conditions = [(name, keys[0]) for name, keys, _ in WEATHER_BUCKETS] + [("none", "")]
+    bands = [(band, band) for band, _, _, _ in TEMP_BANDS] + [("any", "")]
+    return {f"{c}:{b}": weather_context(desc, band=band) for c, desc in conditions for b, band in bands}
+
+
+def build_snapshot(backend, day: Optional[str] = None) -> Dict:
+    """모든 버킷을 한 번의 recommend_batch 로 계산 (쿼리가 같아 encode 도 1회)."""
+    from .recommender import request_seed
+    day = day or date.today().isoformat()
+    buckets = snapshot_buckets()
+    requests = [dict(query=SNAPSHOT_QUERY_EN, weather_desc=desc, keyword_query=SNAPSHOT_QUERY_KO,
+                     seed=request_seed("weather-snapshot", day, key), observe=True)
+                for key, desc in buckets.items()]
+    results = backend.recommend_batch(requests)
+    out = {}
+    for (key, desc), r in zip(buckets.items(), results):
+        obs = r.get("observation")
+        if obs and obs.get("vector"):
+            obs = dict(obs, vector=[round(float(x), 4) for x in obs["vector"]])
+        out[key] = {"weather": desc, "items": r["items"], "filters": r.get("filters") or {},
+                    "observation": obs}
+    return {"built_at": time.time(), "date": day, "buckets": out}
+
+
+def write_snapshot(path: str, snap: Dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snap, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)  # 읽는 쪽이 반쯤 쓰인 파일을 보지 않게
+
+
+class WeatherSnapshot:
+    """스냅샷 파일의 메모리 사본. 조회는 dict 조회 1회, 파일이 바뀌면 다음 조회 때 다시 읽음."""
+
+    def __init__(self, path: str, check_interval: float = WEATHER_SNAPSHOT_CHECK_SECS,
+                 max_age: float = WEATHER_SNAPSHOT_MAX_AGE):
+        self.path = path
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._buckets: Dict[str, Dict] = {}
+        self._built_at = 0.0
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _reload(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != self._mtime:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self._buckets, self._built_at = data.get("buckets") or {}, float(data.get("built_at") or 0)
+            except (OSError, ValueError):
+                pass  # 쓰는 중/깨진 파일 → 이전 사본 유지
+        elif mtime is None:
+            self._buckets, self._built_at = {}, 0.0
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+
+    def refresh_if_stale(self) -> None:
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.check_interval:
+                self._reload()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """버킷 결과 {weather, items, filters, observation}. 없거나 오래됐으면 None."""
+        self.refresh_if_stale()
+        entry = self._buckets.get(key)
+        if entry is not None and time.time() - self._built_at > self.max_age:
+            entry = None
+        cache_event("weather_snapshot", entry is not None)
+        return entry
+
+
+def snapshot_path(app) -> str:
+    csv_path = os.path.normpath(os.path.join(app.root_path, "..", "per_data.csv"))
+    return app.config.get("WEATHER_SNAPSHOT_PATH") or os.path.splitext(csv_path)[0] + ".weather.json"
+
+
+@lru_cache(maxsize=1)
+def get_weather_snapshot() -> WeatherSnapshot:
+    return WeatherSnapshot(snapshot_path(current_app))
+
+
+weather_snapshot_cli = AppGroup("weather-snapshot", help="날씨 버킷별 추천 스냅샷")
+
+
+def _build_once(path: str) -> None:
+    from .backends import get_backend
+    t0 = time.perf_counter()
+    snap = build_snapshot(get_backend())
+    write_snapshot(path, snap)
+    empty = sum(1 for b in snap["buckets"].values() if not b["items"])
+    click.echo(f"{len(snap['buckets'])} buckets ({empty} empty) in {time.perf_counter() - t0:.1f}s -> {path}")
+
+
+@weather_snapshot_cli.command("build")
+def build_command():
+    """모든 날씨 버킷의 추천 결과를 계산해 스냅샷 파일로 저장."""
+    _build_once(snapshot_path(current_app))
+
+
+@weather_snapshot_cli.command("run")
+@click.option("--every", default=WEATHER_SNAPSHOT_EVERY, show_default=True, help="재빌드 주기(초)")
+def run_command(every: float):
+    """스케줄러: 주기적으로 스냅샷을 다시 빌드 (날짜가 바뀌면 탐색 시드도 바뀜)."""
+    path = snapshot_path(current_app)
+    while True:
+        started = time.monotonic()
+        try:
+            _build_once(path)
+        except Exception as e:  # 한 번 실패해도 다음 주기에 다시 시도 (이전 스냅샷은 그대로)
+            click.echo(f"snapshot build failed: {e}", err=True)
+        time.sleep(max(1.0, every - (time.monotonic() - started)))
@@ -2,9 +2,12 @@ import os
 import requests
 from dotenv import load_dotenv
 
+from .metrics import timed
+
 load_dotenv()
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
 
+@timed("weather_api")
 def get_weather_data(lat, lon):
     """OpenWeatherMap 원본 JSON 반환"""
     url = (
@@ -24,3 +27,61 @@ def get_weather(lat, lon):
     desc = data["weather"][0]["description"]
     temp = data["main"]["temp"]
     return f"{name}의 현재 날씨는 {desc}이며, 기온은 {temp}°C 입니다."
+
+# 날씨 버킷: (이름, 설명 키워드, 어울리는 향 태그). 앞 순위가 대표 버킷으로 우선
+WEATHER_BUCKETS = (
+    ("rain",  ("rain", "비", "소나기", "drizzle"), ("clean", "fresh", "musk", "aquatic")),
+    ("snow",  ("snow", "눈", "cold"),              ("amber", "woody", "spicy")),
+    ("cloud", ("cloud", "구름", "overcast"),       ("powdery", "soft", "cozy")),
+    ("clear", ("sun", "맑", "clear"),              ("citrus", "green", "aromatic", "floral")),
+    ("haze",  ("haze", "mist", "안개"),            ("herbal", "tea", "soft")),
+)
+_TAG_ORDER = ("rain", "cloud", "clear", "snow", "haze")  # 태그 나열 순서(기존 추천 점수와 동일)
+
+# 기온 밴드 (OpenWeather main.temp, °C): (이름, 상한(미만, None=없음), 설명 문구, 어울리는 향 태그)
+# 추천기에는 날씨 설명 뒤에 문구를 붙여 넘긴다 (weather_context) → weather_tags 가 태그로 변환
+TEMP_BANDS = (
+    ("cold", 5,    "추운 날",   ("amber", "vanilla", "woody")),
+    ("cool", 15,   "쌀쌀한 날", ("woody", "aromatic", "powdery")),
+    ("mild", 24,   "온화한 날", ("floral", "green")),
+    ("hot",  None, "더운 날",   ("citrus", "aquatic", "fresh")),
+)
+
+def temp_band(temp):
+    """기온(°C) -> 밴드 이름 (없거나 숫자가 아니면 "")."""
+    try:
+        t = float(temp)
+    except (TypeError, ValueError):
+        return ""
+    for band, upper, _, _ in TEMP_BANDS:
+        if upper is None or t < upper:
+            return band
+    return ""
+
+def weather_context(desc, temp=None, band=None):
+    """추천기에 넘길 날씨 문자열: 설명 + 기온 밴드 문구 ("맑음 더운 날")."""
+    band = band if band is not None else temp_band(temp)
+    phrase = next((p for b, _, p, _ in TEMP_BANDS if b == band), "")
+    return " ".join(x for x in [(desc or "").strip(), phrase] if x)
+
+def weather_bucket(desc):
+    """날씨 설명 -> 대표 버킷 (캐시 키 등에서 "약한 비"/"비" 를 같은 값으로 묶는 용도)."""
+    d = (desc or "").lower()
+    for bucket, keys, _ in WEATHER_BUCKETS:
+        if any(k in d for k in keys):
+            return bucket
+    return ""
+
+def weather_tags(desc):
+    """날씨 설명에 해당하는 모든 버킷의 향 태그."""
+    d = (desc or "").lower()
+    table = {b: (keys, tags) for b, keys, tags in WEATHER_BUCKETS}
+    tags = []
+    for b in _TAG_ORDER:
+        keys, bucket_tags = table[b]
+        if any(k in d for k in keys):
+            tags += list(bucket_tags)
+    for _, _, phrase, band_tags in TEMP_BANDS:
+        if phrase in d:
+            tags += [t for t in band_tags if t not in tags]
+    return tags
@@ -0,0 +1,14 @@
+"""
+추천 스택 벤치마크.
+
+  python -m bench micro  [--out FILE] [--baseline FILE] [--threshold 0.2]
+  python -m bench load   [--url URL] [--concurrency 8] [--requests 200] [--out FILE] [--baseline FILE]
+  python -m bench imports [--budget-ms 1500]      # create_app() import 시간 + 무거운 모듈 유입 검사
+  python -m bench storage [--doc-queries 200]   # flat/fp16/int8 임베딩 저장: 메모리, recall@TOPN, 지연
+  python -m bench sqlite [--threads 8] [--ops 4000] [--write-ratio 0.2]  # SQLite 폴백: default vs tuned 프로필
+  python -m bench compare NEW.json BASELINE.json [--threshold 0.2]
+
+날씨/번역은 로컬 스텁으로 대체 (네트워크 없이 재현 가능), DB 는 임시 sqlite.
+결과는 커밋/환경 메타와 함께 JSON 으로 저장되고, --baseline 을 주면
+임계값(기본 20%) 이상 느려진 항목이 있을 때 종료 코드 1.
+"""
@@ -0,0 +1,159 @@
+# bench/__main__.py
+"""python -m bench {micro,load,imports,eval,storage,sqlite,compare} — 사용법은 bench/__init__.py 참고."""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+
+from .common import check_baseline, env_meta, write_result
+
+
+def _add_result_args(p):
+    p.add_argument("--out", help="결과 JSON 경로 (기본 bench/results/<kind>-<commit>.json)")
+    p.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    p.add_argument("--threshold", type=float, default=0.2, help="허용 회귀 비율 (기본 0.2 = 20%%)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="추천 스택 벤치마크")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_micro = sub.add_parser("micro", help="핫패스 마이크로벤치")
+    p_micro.add_argument("--min-time", type=float, default=0.5, help="항목당 최소 측정 시간(초)")
+    _add_result_args(p_micro)
+
+    p_load = sub.add_parser("load", help="/recommend 부하 테스트")
+    p_load.add_argument("--url", help="대상 서버 (없으면 스텁 앱을 직접 띄움)")
+    p_load.add_argument("--concurrency", type=int, default=8)
+    p_load.add_argument("--requests", type=int, default=200)
+    p_load.add_argument("--seed", type=int, default=0)
+    p_load.add_argument("--fields", help="?fields= 값 (응답 축소 효과 측정)")
+    p_load.add_argument("--fragrance", action="store_true",
+                        help="/generate-custom-fragrance 도 측정 (로컬 Gemini 목 서버 사용)")
+    _add_result_args(p_load)
+
+    p_imp = sub.add_parser("imports", help="create_app() import 시간/무거운 모듈 점검 (-X importtime)")
+    p_imp.add_argument("--runs", type=int, default=3)
+    p_imp.add_argument("--budget-ms", type=float, default=None, help="허용 import 시간 (기본 IMPORT_BUDGET_MS=1500)")
+    _add_result_args(p_imp)
+
+    p_seed = sub.add_parser("eval-seed", help="Recommendation 이력으로 평가 쿼리/라벨 생성")
+    p_seed.add_argument("--limit", type=int, default=500)
+    p_seed.add_argument("--out", default=None, help="기본 bench/eval_queries.jsonl")
+
+    p_eval = sub.add_parser("eval", help="랭킹 품질 평가 + 노브 스윕 (Pareto 리포트)")
+    p_eval.add_argument("--queries", help="eval-seed 결과 JSONL (없으면 내장 쿼리 믹스)")
+    p_eval.add_argument("--grid", help='스윕 격자 JSON (예: \'{"MMR_LAMBDA": [0.5, 0.9]}\')')
+    p_eval.add_argument("--workers", type=int, default=0, help="프로세스 수 (0 = CPU 코어 수)")
+    p_eval.add_argument("--out", help="결과 JSON 경로 (기본 bench/results/eval-<commit>.json)")
+
+    p_sto = sub.add_parser("storage", help="EMBEDDING_STORAGE(flat/fp16/int8) 메모리/recall/지연 비교")
+    p_sto.add_argument("--doc-queries", type=int, default=200, help="쿼리로 쓸 카탈로그 문서 수")
+    p_sto.add_argument("--out", help="결과 JSON 경로 (기본 bench/results/storage-<commit>.json)")
+
+    p_sql = sub.add_parser("sqlite", help="SQLite 폴백 DB 동시 읽기/쓰기: default vs tuned 프로필")
+    p_sql.add_argument("--threads", type=int, default=8)
+    p_sql.add_argument("--ops", type=int, default=4000, help="프로필당 전체 연산 수")
+    p_sql.add_argument("--write-ratio", type=float, default=0.2)
+    p_sql.add_argument("--users", type=int, default=50)
+    p_sql.add_argument("--rows-per-user", type=int, default=20, help="미리 채울 사용자당 이력 수")
+    _add_result_args(p_sql)
+
+    p_cmp = sub.add_parser("compare", help="두 결과 JSON 비교")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("--threshold", type=float, default=0.2)
+
+    a = parser.parse_args(argv)
+
+    if a.cmd == "compare":
+        with open(a.new, encoding="utf-8") as f:
+            new = json.load(f)
+        return check_baseline(new, a.baseline, a.threshold)
+
+    if a.cmd == "eval-seed":
+        from app import create_app
+        from app.recommend import translate_query_to_english
+        from app.recommender import get_recommender
+        from .evaluate import DEFAULT_QUERIES, default_queries, history_queries, label_queries
+        app = create_app()  # 실제 DB 의 이력 사용
+        with app.app_context():
+            queries = history_queries(app, a.limit) or default_queries()
+            labeled = label_queries(get_recommender(), queries, translate=translate_query_to_english)
+        out = a.out or DEFAULT_QUERIES
+        with open(out, "w", encoding="utf-8") as f:
+            for q in labeled:
+                f.write(json.dumps(q, ensure_ascii=False) + "\n")
+        print(f"{len(labeled)} queries -> {out}")
+        return 0
+
+    result = {"meta": env_meta()}
+    if a.cmd == "eval":
+        from .common import make_app
+        from .evaluate import DEFAULT_GRID, DEFAULT_QUERIES, format_report, load_queries, run_eval
+        path = a.queries or (DEFAULT_QUERIES if os.path.exists(DEFAULT_QUERIES) else None)
+        grid = dict(DEFAULT_GRID, **(json.loads(a.grid) if a.grid else {}))
+        result["eval"] = run_eval(make_app(), load_queries(path) if path else [], grid,
+                                  workers=a.workers or None)
+        print(format_report(result["eval"]))
+        print(f"saved: {write_result(result, a.out, 'eval')}")
+        return 0
+
+    if a.cmd == "storage":
+        from .common import make_app
+        from .storage import format_storage, run_storage
+        result["storage"] = run_storage(make_app(), doc_queries=a.doc_queries)
+        print(format_storage(result["storage"]))
+        print(f"saved: {write_result(result, a.out, 'storage')}")
+        return 0
+
+    if a.cmd == "sqlite":
+        from .sqlite import format_sqlite, run_sqlite
+        result["sqlite"] = run_sqlite(a.threads, a.ops, a.write_ratio, a.users, a.rows_per_user)
+        print(format_sqlite(result["sqlite"]))
+        print(f"saved: {write_result(result, a.out, 'sqlite')}")
+        return check_baseline(result, a.baseline, a.threshold)
+
+    if a.cmd == "imports":
+        from .imports import IMPORT_BUDGET_MS, check_imports, run_imports
+        result["imports"] = run_imports(a.runs)
+        print(json.dumps(result["imports"], ensure_ascii=False, indent=2))
+        print(f"saved: {write_result(result, a.out, 'imports')}")
+        problems = check_imports(result["imports"], a.budget_ms or IMPORT_BUDGET_MS)
+        for p in problems:
+            print("FAIL", p)
+        return max(1 if problems else 0, check_baseline(result, a.baseline, a.threshold))
+
+    if a.cmd == "micro":
+        from .common import make_app
+        from .micro import run_micro
+        result["micro"] = run_micro(make_app(), min_time=a.min_time)
+    else:
+        from .load import run_load, serve_in_thread
+        base_url, server = a.url, None
+        if a.fragrance and not a.url:
+            # 앱 import 전에 지정해야 GeminiClient 기본값에 반영됨
+            from . import mock_gemini
+            mock = mock_gemini.start()
+            os.environ["GENAI_BASE_URL"] = f"http://127.0.0.1:{mock.server_port}"
+            os.environ.setdefault("GENAI_API_KEY", "bench")
+        if not base_url:
+            from .common import make_app
+            base_url, server = serve_in_thread(make_app())
+        result["meta"]["url"] = a.url or "in-process"
+        try:
+            result["load"] = run_load(base_url, a.concurrency, a.requests, a.seed,
+                                      fields=a.fields, fragrance=a.fragrance)
+        finally:
+            if server is not None:
+                server.shutdown()
+
+    path = write_result(result, a.out, a.cmd)
+    print(json.dumps(result.get(a.cmd), ensure_ascii=False, indent=2))
+    print(f"saved: {path}")
+    return check_baseline(result, a.baseline, a.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# bench/common.py
+"""앱 생성(임시 DB + 날씨/번역 스텁), 통계 요약, 결과 저장/비교."""
+from __future__ import annotations
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from .queries import LOCATIONS, stub_translate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+# 결과 메타에 함께 기록할 튜닝 노브 (커밋 간 비교 시 설정 차이 확인용)
+KNOBS = ("TOPN_CANDIDATES", "RETURN_K", "MMR_LAMBDA", "W_SEMANTIC", "W_BM25", "W_WEATHER",
+         "W_KEYWORD", "EMBEDDING_MODEL", "EMBEDDING_DEVICE")
+
+
+# ---------------- 스텁 ----------------
+def _stub_weather_data(lat, lon):
+    lat, lon = float(lat), float(lon)
+    _, _, desc = min(LOCATIONS, key=lambda l: (l[0] - lat) ** 2 + (l[1] - lon) ** 2)
+    return {"name": "Bench", "weather": [{"description": desc}], "main": {"temp": 20.0}}
+
+
+def _stub_weather(lat, lon):
+    d = _stub_weather_data(lat, lon)
+    return f"{d['name']}의 현재 날씨는 {d['weather'][0]['description']}이며, 기온은 {d['main']['temp']}°C 입니다."
+
+
+def install_stubs() -> None:
+    """외부 호출(OpenWeatherMap, Google 번역)을 로컬 함수로 교체."""
+    from app import api, recommend, weather_utils
+    for mod in (weather_utils, recommend, api):
+        if hasattr(mod, "get_weather_data"):
+            mod.get_weather_data = _stub_weather_data
+        if hasattr(mod, "get_weather"):
+            mod.get_weather = _stub_weather
+    recommend.translate_query_to_english = stub_translate
+
+
+def make_app(db_path: Optional[str] = None):
+    """임시 sqlite DB 를 쓰는 앱 (테이블 생성까지)."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import config
+    db_path = db_path or os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+    config.Config.SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+    from app import create_app
+    from app.db import db
+    install_stubs()
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+# ---------------- 통계 ----------------
+def _pct(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+def summarize(samples: List[float], unit: str = "us") -> Dict[str, float]:
+    """초 단위 샘플 -> {n, mean, median, p95, p99, min} (unit: us | ms)."""
+    scale = 1e6 if unit == "us" else 1e3
+    vals = sorted(s * scale for s in samples)
+    if not vals:
+        return {"n": 0}
+    return {
+        "n": len(vals),
+        f"mean_{unit}": round(sum(vals) / len(vals), 3),
+        f"median_{unit}": round(_pct(vals, 0.5), 3),
+        f"p95_{unit}": round(_pct(vals, 0.95), 3),
+        f"p99_{unit}": round(_pct(vals, 0.99), 3),
+        f"min_{unit}": round(vals[0], 3),
+    }
+
+
+# ---------------- 결과 ----------------
+def env_meta() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "knobs": {k: os.environ[k] for k in KNOBS if k in os.environ},
+    }
+
+
+def write_result(result: Dict, out: Optional[str], kind: str) -> str:
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{kind}-{result['meta']['commit'] or 'local'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return out
+
+
+def _lower_is_better(metric: str) -> Optional[bool]:
+    if metric.startswith(("median_", "p95_")):
+        return True
+    if metric in ("rps",):
+        return False
+    return None  # 나머지(min/mean/p99/n)는 비교하지 않음 (잡음이 크거나 의미 없음)
+
+
+def compare(new: Dict, base: Dict, threshold: float) -> List[str]:
+    """base 대비 threshold(비율) 이상 나빠진 항목 설명 목록."""
+    regressions = []
+    for section in ("micro", "load", "imports", "sqlite"):
+        for name, stats in (new.get(section) or {}).items():
+            old = (base.get(section) or {}).get(name)
+            if not isinstance(stats, dict) or not isinstance(old, dict):
+                continue
+            for metric, value in stats.items():
+                lower = _lower_is_better(metric)
+                ref = old.get(metric)
+                if lower is None or not isinstance(ref, (int, float)) or ref <= 0:
+                    continue
+                change = (value - ref) / ref if lower else (ref - value) / ref
+                if change > threshold:
+                    regressions.append(f"{section}.{name}.{metric}: {ref:g} -> {value:g} ({change:+.0%})")
+    return regressions
+
+
+def check_baseline(result: Dict, baseline: Optional[str], threshold: float) -> int:
+    """baseline 파일과 비교해 회귀를 출력하고 종료 코드(0/1) 반환."""
+    if not baseline:
+        return 0
+    with open(baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    regressions = compare(result, base, threshold)
+    for r in regressions:
+        print("REGRESSION", r)
+    if not regressions:
+        print(f"no regressions vs {baseline} (threshold {threshold:.0%})")
+    return 1 if regressions else 0
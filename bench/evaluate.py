@@ -0,0 +1,273 @@
+# bench/evaluate.py
+"""
+오프라인 랭킹 품질 평가 + 성능 노브 스윕.
+
+  python -m bench eval-seed [--limit 500] [--out bench/eval_queries.jsonl]
+      Recommendation 이력에서 쿼리를 익명화(사용자/시각 제거, 이메일·숫자열 마스킹, 중복 제거)해
+      라벨 파일 생성. 이력이 없으면 bench/queries.py 의 쿼리 믹스 사용.
+  python -m bench eval [--queries FILE] [--grid JSON] [--workers N] [--out FILE]
+      각 설정으로 recall@k, nDCG@k, 다양성, 지연, 메모리를 재고 Pareto 프런트를 보고.
+
+라벨(등급 관련도)은 사람이 적은 쿼리 의도(INTENTS: 어코드/노트/연도/브랜드/제외 노트)를
+카탈로그 원본 속성으로 채점해 만든다. 랭커의 키워드 추출·어휘·제약 파서를 거치지 않으므로
+W_KEYWORD 등 랭커 특징을 바꿨을 때 지표가 제 자신을 재는 순환이 없다.
+  등급 = 의도 어코드마다 (문서 어코드 목록 상위 3위 안이면 2, 그 밖이면 1) + 의도 노트가 있으면 1, 최대 3
+  year_min/brand/exclude_notes 를 어기면 0
+의도가 없는 쿼리(이력에서 뽑은 새 쿼리 등)는 "intent": {} 로 저장되고 평가에서 빠진다 —
+라벨 파일은 JSONL 이라 사람이 intent 나 relevant 를 직접 채워 넣으면 된다.
+"""
+from __future__ import annotations
+import itertools
+import json
+import math
+import os
+import re
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .common import ROOT, summarize
+from .queries import LOCATIONS, QUERY_MIX, stub_translate
+
+EVAL_K = 5
+MAX_GRADE = 3
+DEFAULT_QUERIES = os.path.join(ROOT, "bench", "eval_queries.jsonl")
+# 스윕 기본 격자 (--grid '{"MMR_LAMBDA": [0.5, 0.9]}' 로 일부만 덮어쓰기)
+DEFAULT_GRID = {
+    "W_SEMANTIC": [0.5, 0.6, 0.7],
+    "W_BM25": [0.15, 0.25, 0.35],
+    "W_WEATHER": [0.05, 0.15],
+    "W_KEYWORD": [0.0, 0.3],
+    "TOPN_CANDIDATES": [10, 30, 60],
+    "MMR_LAMBDA": [0.5, 0.7, 0.9],
+}
+
+# 쿼리 믹스(bench/queries.py)의 의도. 어코드는 카탈로그 Categorys 값, 노트는 노트명 단어
+INTENTS: Dict[str, Dict] = {
+    "상큼한 시트러스 향수 추천해줘": {"accords": ["citrus", "fresh"]},
+    "비 오는 날 어울리는 머스크": {"accords": ["musky"], "notes": ["musk"]},
+    "우디하고 따뜻한 겨울 향수": {"accords": ["woody", "warm spicy", "amber"]},
+    "플로럴 계열 데일리 향수": {"accords": ["floral", "white floral"]},
+    "바닐라 달달한 향": {"accords": ["vanilla", "sweet"], "notes": ["vanilla"]},
+    "2010년 이후 나온 우디 향수": {"accords": ["woody"], "year_min": 2010},
+    "패출리 없는 플로럴": {"accords": ["floral", "white floral"], "exclude_notes": ["patchouli"]},
+    "출근할 때 뿌리기 좋은 깨끗한 향": {"accords": ["fresh", "musky", "soapy", "aldehydic"]},
+    "장미 향이 강한 향수": {"accords": ["rose"], "notes": ["rose"]},
+    "바다 느낌 아쿠아틱": {"accords": ["aquatic", "marine", "ozonic"]},
+    "스파이시하고 묵직한 향": {"accords": ["warm spicy", "amber", "leather", "oud"]},
+    "샤넬 향수 중에 시트러스": {"accords": ["citrus"], "brand": "chanel"},
+}
+
+_PII = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+|\d{6,}")
+
+
+# ---------------- 라벨 ----------------
+def anonymize(text: str) -> str:
+    return " ".join(_PII.sub("*", text or "").split())
+
+
+def history_queries(app, limit: int = 500) -> List[Dict]:
+    """앱 DB 의 Recommendation 이력 -> [{query, weather}] (익명화, 중복 제거)."""
+    from app.models import Recommendation
+    seen, out = set(), []
+    with app.app_context():
+        rows = (Recommendation.query
+                .with_entities(Recommendation.user_cat, Recommendation.user_note, Recommendation.weather_desc)
+                .order_by(Recommendation.queried_at.desc())
+                .limit(limit * 4)
+                .all())
+    for cat, note, weather in rows:
+        parts = [p for p in dict.fromkeys([(cat or "").strip(), (note or "").strip()]) if p]
+        q = anonymize(" ".join(parts))
+        if not q or q in seen:
+            continue
+        seen.add(q)
+        out.append({"query": q, "weather": weather or ""})
+        if len(out) >= limit:
+            break
+    return out
+
+
+def _has_word(names: List[str], word: str) -> bool:
+    pat = re.compile(rf"\b{re.escape(word.lower())}\b")
+    return any(pat.search(n.lower()) for n in names)
+
+
+def grade(doc, intent: Dict) -> int:
+    """카탈로그 원본 속성(Categorys 순서, Note, Year, Brand)만으로 의도 적합도 0..MAX_GRADE."""
+    from app.catalog import structure_notes
+    notes = [n for names in structure_notes(doc.raw.get("Note")).values() for n in names]
+    if intent.get("year_min") and (doc.year is None or doc.year < intent["year_min"]):
+        return 0
+    if intent.get("brand") and intent["brand"].lower() not in (doc.brand or "").lower():
+        return 0
+    if any(_has_word(notes, n) for n in intent.get("exclude_notes", [])):
+        return 0
+    accords = [c.lower() for c in doc.categories]
+    g = sum((2 if accords.index(a) < 3 else 1) for a in intent.get("accords", []) if a in accords)
+    if any(_has_word(notes, n) for n in intent.get("notes", [])):
+        g += 1
+    return min(g, MAX_GRADE)
+
+
+def label_queries(rec, queries: List[Dict], translate=stub_translate) -> List[Dict]:
+    """[{query, weather, intent?}] -> [{query, query_en, weather, intent, relevant: {doc_id: grade}}]."""
+    labeled = []
+    for q in queries:
+        query_en = q.get("query_en") or translate(q["query"])
+        intent = q.get("intent") or INTENTS.get(q["query"]) or {}
+        relevant = {}
+        if intent.get("accords") or intent.get("notes"):
+            for d in rec.docs:
+                g = grade(d, intent)
+                if g:
+                    relevant[str(d.idx)] = g
+        labeled.append({"query": q["query"], "query_en": query_en, "weather": q.get("weather", ""),
+                        "intent": intent, "relevant": relevant})
+    return labeled
+
+
+def default_queries() -> List[Dict]:
+    return [{"query": q, "weather": LOCATIONS[i % len(LOCATIONS)][2]} for i, (q, _) in enumerate(QUERY_MIX)]
+
+
+def load_queries(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ---------------- 지표 ----------------
+def ndcg_at_k(ranked: List[int], relevant: Dict[int, int], k: int) -> float:
+    dcg = sum((2 ** relevant.get(i, 0) - 1) / math.log2(r + 2) for r, i in enumerate(ranked[:k]))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2 ** g - 1) / math.log2(r + 2) for r, g in enumerate(ideal))
+    return dcg / idcg if idcg > 0 else 0.0
+
+
+def recall_at_k(ranked: List[int], relevant: Dict[int, int], k: int) -> float:
+    """상위 k 중 관련 문서 수 / min(k, 관련 문서 수)."""
+    if not relevant:
+        return 0.0
+    return sum(1 for i in ranked[:k] if i in relevant) / min(k, len(relevant))
+
+
+def diversity(ranked: List[int], embeddings: np.ndarray) -> float:
+    """1 - 결과 간 평균 코사인 유사도 (임베딩은 정규화 상태)."""
+    if len(ranked) < 2:
+        return 0.0
+    e = embeddings[ranked]
+    sim = e @ e.T
+    n = len(ranked)
+    return float(1.0 - (sim.sum() - np.trace(sim)) / (n * (n - 1)))
+
+
+# ---------------- 스윕 (프로세스 병렬) ----------------
+class _CachedEncoder:
+    """부모에서 미리 계산한 쿼리 임베딩만 돌려주는 인코더 (워커에서 모델/torch 미사용)."""
+
+    def __init__(self, table: Dict[str, np.ndarray]):
+        self.table = table
+
+    def encode(self, texts, **kwargs):
+        return np.stack([self.table[t] for t in texts])
+
+
+_REC = None
+_QUERIES: List[Dict] = []
+
+
+def _evaluate_config(config: Dict) -> Dict:
+    from app import recommender as R
+    for key, value in config.items():
+        setattr(R, key, type(getattr(R, key))(value))  # 모듈 전역 노브를 이 프로세스에서만 교체
+    rec = _REC
+    recalls, ndcgs, divs, lat = [], [], [], []
+    for q in _QUERIES:
+        relevant = {int(i): g for i, g in q["relevant"].items()}
+        t0 = time.perf_counter()
+        items = rec.recommend(q["query_en"], q.get("weather", ""), k=EVAL_K,
+                              constraints=rec.parse_constraints(q["query"], q["query_en"]),
+                              keyword_query=q["query"], seed=0)  # 탐색 슬롯을 설정 간 동일하게
+        lat.append(time.perf_counter() - t0)
+        ranked = [it["id"] for it in items]
+        recalls.append(recall_at_k(ranked, relevant, EVAL_K))
+        ndcgs.append(ndcg_at_k(ranked, relevant, EVAL_K))
+        divs.append(diversity(ranked, rec.embeddings))
+    stats = summarize(lat, "ms")
+    return {
+        "config": config,
+        f"recall@{EVAL_K}": round(float(np.mean(recalls)), 4),
+        f"ndcg@{EVAL_K}": round(float(np.mean(ndcgs)), 4),
+        "diversity": round(float(np.mean(divs)), 4),
+        "median_ms": stats.get("median_ms", 0.0),
+        "p95_ms": stats.get("p95_ms", 0.0),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def expand_grid(grid: Dict[str, list]) -> List[Dict]:
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def pareto_front(rows: List[Dict]) -> List[Dict]:
+    """nDCG/recall/다양성은 높게, p95 지연은 낮게 — 다른 설정에 모두 지지 않는 행."""
+    keys_max = (f"ndcg@{EVAL_K}", f"recall@{EVAL_K}", "diversity")
+
+    def dominates(a, b):
+        ge = all(a[k] >= b[k] for k in keys_max) and a["p95_ms"] <= b["p95_ms"]
+        gt = any(a[k] > b[k] for k in keys_max) or a["p95_ms"] < b["p95_ms"]
+        return ge and gt
+
+    return [r for r in rows if not any(dominates(o, r) for o in rows if o is not r)]
+
+
+def run_eval(app, queries: List[Dict], grid: Dict[str, list], workers: Optional[int] = None) -> Dict:
+    """
+    부모에서 카탈로그/인덱스/쿼리 임베딩을 한 번 만든 뒤 fork 한 워커들이 설정을 나눠 평가.
+    (워커는 copy-on-write 로 인덱스를 공유하고 모델을 돌리지 않음)
+    """
+    global _REC, _QUERIES
+    import multiprocessing as mp
+    from app.recommender import get_recommender
+
+    with app.app_context():
+        rec = get_recommender()
+        if not queries or any("relevant" not in q for q in queries):
+            queries = label_queries(rec, queries or default_queries())
+        texts = sorted({q["query_en"] for q in queries if q["query_en"].strip()})
+        emb = rec.model.encode(texts, normalize_embeddings=True, show_progress_bar=False) if texts else []
+        rec.model = _CachedEncoder({t: np.asarray(e, dtype="float32") for t, e in zip(texts, emb)})
+    # 라벨 없는 쿼리는 평가에서 제외 (recall/nDCG 가 0 으로 섞이지 않게)
+    _REC, _QUERIES = rec, [q for q in queries if q["query_en"].strip() and q["relevant"]]
+
+    configs = expand_grid(grid)
+    ctx = mp.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=ctx) as ex:
+        rows = list(ex.map(_evaluate_config, configs))
+
+    front = pareto_front(rows)
+    front.sort(key=lambda r: -r[f"ndcg@{EVAL_K}"])
+    return {
+        "queries": len(queries),
+        "labeled": len(_QUERIES),
+        "configs": len(rows),
+        "index_mb": round(sum(rec.index_nbytes().values()) / 2 ** 20, 1),
+        "pareto": front,
+        "all": rows,
+    }
+
+
+def format_report(result: Dict) -> str:
+    lines = [f"queries={result['queries']} (labeled {result['labeled']}), configs={result['configs']}, "
+             f"index={result['index_mb']}MB",
+             "", "Pareto front (ndcg/recall/diversity ↑, p95 ↓):",
+             f"{'ndcg':>7} {'recall':>7} {'div':>6} {'p50ms':>7} {'p95ms':>7}  config"]
+    for r in result["pareto"]:
+        cfg = " ".join(f"{k}={v}" for k, v in r["config"].items())
+        lines.append(f"{r[f'ndcg@{EVAL_K}']:>7.4f} {r[f'recall@{EVAL_K}']:>7.4f} {r['diversity']:>6.3f} "
+                     f"{r['median_ms']:>7.2f} {r['p95_ms']:>7.2f}  {cfg}")
+    return "\n".join(lines)
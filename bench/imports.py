@@ -0,0 +1,73 @@
+# bench/imports.py
+"""
+앱 기동 import 비용 점검 (python -X importtime).
+
+create_app() 까지를 새 프로세스에서 여러 번 실행해 전체 import 시간과 가장 무거운 모듈을
+기록하고, 추천 엔진 전용 무거운 의존성이 웹 기동 경로에 끌려 들어오면 실패로 본다.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+from .common import ROOT, summarize
+
+# 웹/CLI/마이그레이션 기동 시 import 되면 안 되는 모듈 (추천 엔진이 처음 쓰일 때 로드)
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "faiss", "rank_bm25",
+                 "pandas", "sklearn")
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))  # -X importtime 계측 오버헤드 포함
+
+_SNIPPET = (
+    "import sys, json\n"
+    "from app import create_app\n"
+    "create_app()\n"
+    "print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))\n"
+)
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_once() -> Dict:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _SNIPPET.format(heavy=HEAVY_MODULES)],
+                          cwd=ROOT, env=env, capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "create_app failed")
+    total_us, top = 0, []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if indent <= 1:  # 최상위 import 만 합산 (하위는 누적치에 포함)
+            total_us += cumulative
+        top.append((cumulative, name))
+    top.sort(reverse=True)
+    heavy = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"total_s": total_us / 1e6, "top": top[:15], "heavy": heavy}
+
+
+def run_imports(runs: int = 3) -> Dict[str, Dict]:
+    samples: List[float] = []
+    last: Dict = {}
+    for _ in range(runs):
+        last = profile_once()
+        samples.append(last["total_s"])
+    stats = summarize(samples, "ms")
+    stats.update({
+        "heavy_imported": last["heavy"],
+        "top_modules_ms": {name: round(us / 1000, 1) for us, name in last["top"]},
+    })
+    return {"create_app": stats}
+
+
+def check_imports(result: Dict[str, Dict], budget_ms: float = IMPORT_BUDGET_MS) -> List[str]:
+    stats = result["create_app"]
+    problems = []
+    if stats["heavy_imported"]:
+        problems.append("heavy modules imported at startup: " + ", ".join(stats["heavy_imported"]))
+    if stats.get("median_ms", 0) > budget_ms:
+        problems.append(f"create_app import time {stats['median_ms']:.0f}ms > budget {budget_ms:.0f}ms")
+    return problems
@@ -0,0 +1,95 @@
+# bench/load.py
+"""
+/recommend 부하 생성기.
+
+--url 이 없으면 앱(스텁 날씨/번역, 임시 DB)을 같은 프로세스의 스레드 서버로 띄운다.
+워커마다 계정을 만들어 로그인한 세션으로 요청하며, 쿼리 순서는 seed 로 고정.
+"""
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import requests
+
+from .common import summarize
+from .queries import sample_queries
+
+
+def serve_in_thread(app):
+    """앱을 임의 포트로 띄우고 (base_url, server) 반환."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass  # 요청마다 찍히는 액세스 로그가 측정을 방해하지 않도록
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def _login(base_url: str, n: int) -> requests.Session:
+    s = requests.Session()
+    cred = {"email": f"bench{n}@bench.local", "password": "bench-password"}
+    s.post(f"{base_url}/auth/register", data=cred, allow_redirects=False, timeout=30)
+    s.post(f"{base_url}/auth/login", data=cred, allow_redirects=False, timeout=30)
+    return s
+
+
+def _drive(sessions, url: str, payloads) -> Dict:
+    """payloads 를 세션 수만큼 스레드로 나눠 보내고 지연/처리량 요약."""
+    concurrency = len(sessions)
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def worker(w: int):
+        nonlocal errors
+        s = sessions[w]
+        for body in payloads[w::concurrency]:
+            t0 = time.perf_counter()
+            try:
+                resp = s.post(url, json=body, timeout=60)
+                ok = resp.status_code == 200
+                resp.content  # 스트리밍 응답도 끝까지 읽음
+            except requests.RequestException:
+                ok = False
+            dt = time.perf_counter() - t0
+            with lock:
+                latencies.append(dt)
+                errors += 0 if ok else 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+
+    stats = summarize(latencies, "ms")
+    stats.update({"rps": round(len(latencies) / wall, 2), "errors": errors,
+                  "concurrency": concurrency, "wall_s": round(wall, 3)})
+    return stats
+
+
+def run_load(base_url: str, concurrency: int = 8, total: int = 200, seed: int = 0,
+             warmup: int = 5, fields: Optional[str] = None, fragrance: bool = False) -> Dict[str, Dict]:
+    """
+    /recommend 부하. fragrance=True 면 /generate-custom-fragrance 도 같은 쿼리 믹스로
+    (GENAI_BASE_URL 을 bench.mock_gemini 로 지정해 두어야 외부 호출이 없다).
+    """
+    sessions = [_login(base_url, i) for i in range(concurrency)]
+    url = f"{base_url}/recommend" + (f"?fields={fields}" if fields else "")
+
+    # 첫 요청은 모델/인덱스 로드를 포함하므로 측정에서 제외
+    for q, lat, lon in sample_queries(warmup, seed + 1):
+        sessions[0].post(url, json={"query": q, "lat": lat, "lon": lon}, timeout=300)
+
+    plan = sample_queries(total, seed)
+    results = {"recommend": _drive(sessions, url,
+                                   [{"query": q, "lat": lat, "lon": lon} for q, lat, lon in plan])}
+    if fragrance:
+        results["generate_custom_fragrance"] = _drive(
+            sessions, f"{base_url}/generate-custom-fragrance",
+            [{"user_cat": q, "user_note": q, "weather": "맑음", "notes": ["Musk", "Rose"]}
+             for q, _, _ in plan])
+    return results
@@ -0,0 +1,103 @@
+# bench/micro.py
+"""
+핫패스 마이크로벤치: 토크나이저, BM25, FAISS, MMR, 날씨 매칭, TF-IDF 코사인, 노트 이미지 해석.
+실제 카탈로그(per_data.csv)와 실제 Recommender 인덱스를 쓴다.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+from .common import ROOT, summarize
+from .queries import QUERY_MIX, stub_translate
+
+
+def bench(fn: Callable[[], object], min_time: float = 0.5, warmup: int = 3, max_n: int = 20000) -> Dict:
+    """fn 을 최소 min_time 초 동안 반복 측정."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline and len(samples) < max_n:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, "us")
+
+
+def concurrent_encode(encoder, queries, threads: int = 8, per_thread: int = 25) -> Dict:
+    """threads 개 스레드가 동시에 encoder.encode(q) — 호출당 지연과 전체 처리량."""
+    samples, lock = [], threading.Lock()
+
+    def worker(w: int):
+        local = []
+        for j in range(per_thread):
+            t0 = time.perf_counter()
+            encoder.encode(queries[(w * per_thread + j) % len(queries)])
+            local.append(time.perf_counter() - t0)
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    ts = [threading.Thread(target=worker, args=(w,)) for w in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    stats = summarize(samples, "us")
+    stats["rps"] = round(len(samples) / (time.perf_counter() - started), 2)
+    return stats
+
+
+def run_micro(app, min_time: float = 0.5) -> Dict[str, Dict]:
+    from app import recommender as R
+    from app.images import _resolve_note_image
+
+    results: Dict[str, Dict] = {}
+    queries_en = [stub_translate(q) for q, _ in QUERY_MIX]
+    with app.app_context():
+        rec = R.get_recommender()
+        n = len(rec.docs)
+        q = queries_en[0]
+        q_tokens = R._tokenize_ko_en(q)
+        q_emb = rec.model.encode([q], normalize_embeddings=True, show_progress_bar=False)[0].astype("float32")
+        cands = [i for i, _ in rec.search(q, "약한 비", topn=R.TOPN_CANDIDATES)]
+        texts = [d.text for d in rec.docs[:200]]
+        slugs = [rec.note_image(n)[0] for d in rec.docs[:50] for n in d.notes.get("flat", [])][:200] or ["rose"]
+
+        it = iter(range(10 ** 9))
+        results["tokenize_ko_en"] = bench(lambda: [R._tokenize_ko_en(t) for t in texts[:20]], min_time)
+        results["bm25_get_scores"] = bench(lambda: rec.bm25.get_scores(q_tokens), min_time)
+        results["query_encode"] = bench(
+            lambda: rec.model.encode([q], normalize_embeddings=True, show_progress_bar=False), min_time)
+        # 동시 쿼리 인코딩: 마이크로 배칭 vs 락 직렬화 (같은 모델, 서로 다른 쿼리)
+        from app.encoder import BatchingEncoder
+        uniq = [f"{t} {i}" for i in range(50) for t in queries_en]
+        for name, window in (("encode_concurrent_batched", None), ("encode_concurrent_direct", 0)):
+            enc = BatchingEncoder(rec._encode_batch) if window is None else \
+                BatchingEncoder(rec._encode_batch, window_ms=window)
+            concurrent_encode(enc, uniq, threads=2, per_thread=3)  # 워밍업
+            results[name] = concurrent_encode(enc, uniq)
+        results["faiss_search"] = bench(
+            lambda: rec.faiss.search(q_emb.reshape(1, -1), min(R.TOPN_CANDIDATES, n)), min_time)
+        results["mmr"] = bench(
+            lambda: R._mmr(rec.embeddings, q_emb, cands, R.RETURN_K, R.MMR_LAMBDA), min_time)
+        results["weather_match_score"] = bench(
+            lambda: [R._weather_match_score(t, "약한 비") for t in texts[:20]], min_time)
+        results["resolve_note_image"] = bench(
+            lambda: _resolve_note_image(slugs[next(it) % len(slugs)]), min_time)
+        results["search"] = bench(
+            lambda: rec.search(queries_en[next(it) % len(queries_en)], "맑음"), min_time)
+        results["recommend"] = bench(
+            lambda: rec.recommend(queries_en[next(it) % len(queries_en)], "맑음"), min_time)
+
+        # 구 TF-IDF 경로 (scikit-learn 필요, 없으면 건너뜀)
+        try:
+            from app import cos_sim
+            df = cos_sim.load_perfume_data(os.path.join(ROOT, "per_data.csv"))
+            results["calculate_cosine_similarity"] = bench(
+                lambda: cos_sim.calculate_cosine_similarity("woody", "musk vanilla", df, "rain"), min_time)
+        except ImportError as e:
+            results["calculate_cosine_similarity"] = {"skipped": str(e)}
+    return results
@@ -0,0 +1,67 @@
+# bench/mock_gemini.py
+"""
+로컬 Gemini 목 서버 (generateContent / streamGenerateContent?alt=sse).
+
+  python -m bench.mock_gemini --port 18999 --latency 0.3
+  GENAI_BASE_URL=http://127.0.0.1:18999 GENAI_API_KEY=x flask run
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOCK_TEXT = json.dumps({
+    "name": "Bench Mist", "category": "우디", "mood": "차분한 오후",
+    "top": ["Bergamot", "Lemon", "Pink Pepper"],
+    "middle": ["Rose", "Iris", "Lavender"],
+    "base": ["Musk", "Cedarwood", "Amber"],
+    "description": "벤치마크용 고정 응답입니다.",
+}, ensure_ascii=False)
+
+
+def _chunk(text: str) -> bytes:
+    return json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode("utf-8")
+
+
+def make_handler(latency: float = 0.0, chunk_delay: float = 0.02, chunk_size: int = 24):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(latency)  # 첫 토큰까지의 지연 흉내
+            if "streamGenerateContent" in self.path:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for i in range(0, len(MOCK_TEXT), chunk_size):
+                    self.wfile.write(b"data: " + _chunk(MOCK_TEXT[i:i + chunk_size]) + b"\r\n\r\n")
+                    self.wfile.flush()
+                    time.sleep(chunk_delay)
+                return
+            body = _chunk(MOCK_TEXT)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start(port: int = 0, latency: float = 0.0) -> ThreadingHTTPServer:
+    """백그라운드 스레드로 띄우고 서버 반환 (server.server_port 로 포트 확인)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Gemini mock server")
+    p.add_argument("--port", type=int, default=18999)
+    p.add_argument("--latency", type=float, default=0.0)
+    a = p.parse_args()
+    ThreadingHTTPServer(("127.0.0.1", a.port), make_handler(a.latency)).serve_forever()
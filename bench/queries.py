@@ -0,0 +1,55 @@
+# bench/queries.py
+"""부하 테스트용 한국어 쿼리 믹스 (가중치 = 실제 입력 비율 근사) + 스텁 번역 사전."""
+import random
+
+# (쿼리, 가중치)
+QUERY_MIX = [
+    ("상큼한 시트러스 향수 추천해줘", 8),
+    ("비 오는 날 어울리는 머스크", 6),
+    ("우디하고 따뜻한 겨울 향수", 6),
+    ("플로럴 계열 데일리 향수", 5),
+    ("바닐라 달달한 향", 4),
+    ("2010년 이후 나온 우디 향수", 3),
+    ("패출리 없는 플로럴", 3),
+    ("출근할 때 뿌리기 좋은 깨끗한 향", 3),
+    ("장미 향이 강한 향수", 2),
+    ("바다 느낌 아쿠아틱", 2),
+    ("스파이시하고 묵직한 향", 2),
+    ("샤넬 향수 중에 시트러스", 1),
+    ("향수", 1),
+]
+
+# 스텁 번역: 자주 나오는 한국어 단어만 영어로 (나머지는 그대로)
+KO_EN = {
+    "상큼한": "fresh", "시트러스": "citrus", "향수": "perfume", "추천해줘": "recommend",
+    "비": "rain", "오는": "", "날": "day", "어울리는": "suitable", "머스크": "musk",
+    "우디하고": "woody", "우디": "woody", "따뜻한": "warm", "겨울": "winter",
+    "플로럴": "floral", "계열": "", "데일리": "daily", "바닐라": "vanilla",
+    "달달한": "sweet", "향": "scent", "2010년": "2010", "이후": "after", "나온": "released",
+    "패출리": "patchouli", "없는": "without", "출근할": "work", "때": "", "뿌리기": "wear",
+    "좋은": "good", "깨끗한": "clean", "장미": "rose", "향이": "scent", "강한": "strong",
+    "바다": "sea", "느낌": "feel", "아쿠아틱": "aquatic", "스파이시하고": "spicy",
+    "묵직한": "heavy", "샤넬": "chanel", "중에": "among",
+}
+
+# (lat, lon, 스텁 날씨 설명)
+LOCATIONS = [
+    (37.57, 126.98, "맑음"),
+    (35.18, 129.08, "약한 비"),
+    (33.50, 126.53, "구름 많음"),
+    (37.46, 126.70, "눈"),
+    (36.35, 127.38, "안개"),
+]
+
+
+def stub_translate(text: str) -> str:
+    words = [KO_EN.get(w, w) for w in (text or "").split()]
+    return " ".join(w for w in words if w)
+
+
+def sample_queries(n: int, seed: int = 0):
+    """재현 가능한 (쿼리, lat, lon) n개."""
+    rng = random.Random(seed)
+    queries, weights = zip(*QUERY_MIX)
+    picks = rng.choices(queries, weights=weights, k=n)
+    return [(q, *rng.choice(LOCATIONS)[:2]) for q in picks]
@@ -0,0 +1,133 @@
+# bench/sqlite.py
+"""
+SQLite 폴백 DB 동시 읽기/쓰기: 기본 설정(default) vs 운영 프로필(tuned, app/db.py).
+
+프로필마다 새 임시 DB 에 사용자/이력을 채운 뒤, 스레드 N 개가 같은 연산 순서를 실행:
+  read  = 요청 1회 상당: user_loader + /history 조회 (사용자 이력 전체, 최신순)
+  write = /recommend 저장 상당: user_loader + Recommendation INSERT + COMMIT
+연산마다 app_context 를 열고 닫아 요청처럼 세션/연결을 풀에 반납한다.
+"""
+from __future__ import annotations
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from .common import summarize
+
+SQLITE_PROFILES = ("default", "tuned")
+
+
+def _seed(app, users: int, rows_per_user: int, payload: str) -> List[int]:
+    from app.db import db
+    from app.models import Recommendation, User
+    with app.app_context():
+        objs = [User(email=f"bench{i}@example.com", password="x") for i in range(users)]
+        db.session.add_all(objs)
+        db.session.flush()
+        ids = [u.id for u in objs]
+        db.session.add_all(Recommendation(user_id=uid, user_cat="bench", user_note="bench",
+                                          weather_desc="맑음", results_json=payload)
+                           for uid in ids for _ in range(rows_per_user))
+        db.session.commit()
+    return ids
+
+
+def _run_profile(profile: str, threads: int, ops: int, write_ratio: float, users: int,
+                 rows_per_user: int, seed: int) -> Dict:
+    import config
+    from .common import make_app
+    saved = {k: getattr(config.Config, k) for k in ("SQLITE_PROFILE", "SESSION_USER_TTL")}
+    config.Config.SQLITE_PROFILE = profile
+    # default = 기존 동작 (요청마다 사용자 조회), tuned = 설정값 그대로
+    config.Config.SESSION_USER_TTL = 0 if profile == "default" else (saved["SESSION_USER_TTL"] or 10)
+    db_path = os.path.join(tempfile.mkdtemp(prefix=f"bench-sqlite-{profile}-"), "bench.db")
+    try:
+        app = make_app(db_path)
+    finally:
+        for k, v in saved.items():
+            setattr(config.Config, k, v)
+
+    from sqlalchemy import text
+    from app.db import db
+    from app.models import Recommendation
+    payload = json.dumps([{"Brand": "Bench", "Name": f"Perfume {i}", "Notes": {"flat": ["rose", "musk"]}}
+                          for i in range(20)], ensure_ascii=False)  # 실제 results_json 과 비슷한 크기
+    ids = _seed(app, users, rows_per_user, payload)
+    load_user = app.login_manager._user_callback
+    rng = random.Random(seed)
+    plan = [("write" if rng.random() < write_ratio else "read", rng.choice(ids)) for _ in range(ops)]
+    samples: Dict[str, List[float]] = {"read": [], "write": []}
+    errors: List[str] = []
+    lock = threading.Lock()
+    cursor = iter(plan)
+
+    def worker():
+        local = {"read": [], "write": []}
+        while True:
+            with lock:
+                op = next(cursor, None)
+            if op is None:
+                break
+            kind, uid = op
+            t0 = time.perf_counter()
+            try:
+                with app.app_context():
+                    user = load_user(str(uid))
+                    if kind == "read":
+                        (Recommendation.query.filter_by(user_id=user.id)
+                         .order_by(Recommendation.queried_at.desc()).all())
+                    else:
+                        db.session.add(Recommendation(user_id=user.id, user_cat="bench", user_note="bench",
+                                                      weather_desc="맑음", results_json=payload))
+                        db.session.commit()
+            except Exception as e:  # "database is locked" 등
+                with lock:
+                    errors.append(type(e).__name__)
+                continue
+            local[kind].append(time.perf_counter() - t0)
+        with lock:
+            for k, v in local.items():
+                samples[k].extend(v)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    with app.app_context():
+        journal = db.session.execute(text("PRAGMA journal_mode")).scalar()
+        db.session.remove()
+        db.engine.dispose()
+    return {
+        "read": summarize(samples["read"], "ms"),
+        "write": summarize(samples["write"], "ms"),
+        "total": {"rps": round((len(samples["read"]) + len(samples["write"])) / elapsed, 1),
+                  "errors": len(errors), "journal": journal},
+    }
+
+
+def run_sqlite(threads: int = 8, ops: int = 4000, write_ratio: float = 0.2, users: int = 50,
+               rows_per_user: int = 20, seed: int = 0, profiles=SQLITE_PROFILES) -> Dict[str, Dict]:
+    """{"<profile>_read": {...ms}, "<profile>_write": {...}, "<profile>_total": {rps, errors, journal}}"""
+    out: Dict[str, Dict] = {}
+    for profile in profiles:
+        r = _run_profile(profile, threads, ops, write_ratio, users, rows_per_user, seed)
+        for name, stats in r.items():
+            out[f"{profile}_{name}"] = stats
+    return out
+
+
+def format_sqlite(results: Dict[str, Dict]) -> str:
+    lines = [f"{'':18} {'median_ms':>10} {'p95_ms':>10} {'p99_ms':>10}"]
+    for name, s in results.items():
+        if name.endswith("_total"):
+            lines.append(f"{name:18} rps={s['rps']} errors={s['errors']} journal={s['journal']}")
+        elif s.get("n"):
+            lines.append(f"{name:18} {s['median_ms']:>10} {s['p95_ms']:>10} {s['p99_ms']:>10}")
+    return "\n".join(lines)
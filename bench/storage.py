@@ -0,0 +1,87 @@
+# bench/storage.py
+"""
+임베딩 저장 방식(EMBEDDING_STORAGE) 비교: 메모리 vs 검색 품질 vs 지연.
+
+같은 카탈로그 float32 벡터로 flat/fp16/int8 인덱스를 각각 만들고,
+flat(정확) 의미 후보 대비 recall@TOPN (재채점 전/후)과 최종 추천 top-k 일치율을 잰다.
+쿼리 = 내장 쿼리 믹스 + 카탈로그 문서 텍스트 샘플 (ANN 평가 관례).
+"""
+from __future__ import annotations
+import copy
+import os
+import random
+import tempfile
+from typing import Dict
+
+import numpy as np
+
+from .micro import bench
+from .queries import QUERY_MIX, stub_translate
+
+STORAGE_MODES = ("flat", "fp16", "int8")
+
+
+def _recall(approx: np.ndarray, exact: np.ndarray) -> float:
+    return len(set(approx.tolist()) & set(exact.tolist())) / max(1, len(exact))
+
+
+def run_storage(app, modes=STORAGE_MODES, doc_queries: int = 200, seed: int = 0,
+                min_time: float = 0.3) -> Dict[str, Dict]:
+    from app import recommender as R
+
+    with app.app_context():
+        base = R.get_recommender()
+    rng = random.Random(seed)
+    texts = [stub_translate(q) for q, _ in QUERY_MIX]
+    texts += [base.docs[i].text for i in rng.sample(range(len(base.docs)), min(doc_queries, len(base.docs)))]
+    texts = [t for t in texts if t.strip()]
+    q_embs = np.asarray(base._encode_batch(texts), dtype="float32")
+    exact_vecs = np.ascontiguousarray(base.embeddings, dtype="float32")  # 기준(flat) 벡터
+    # 양자화 모드의 재채점용 원본은 운영과 같이 mmap (flask embeddings build 결과에 해당)
+    npy = os.path.join(tempfile.mkdtemp(prefix="bench-storage-"), "emb.npy")
+    np.save(npy, exact_vecs)
+    exact_mmap = np.load(npy, mmap_mode="r")
+    topn, k = R.TOPN_CANDIDATES, R.RETURN_K
+
+    # 기준: flat 정확 검색 후보와 최종 추천
+    truth = [base.semantic_candidates(q, topn)[1] for q in q_embs]
+    final_truth = [base.recommend(t, k=k, seed=seed) for t in texts]
+
+    results: Dict[str, Dict] = {}
+    for mode in modes:
+        rec = copy.copy(base)  # 문서/BM25/모델은 공유, 인덱스만 교체
+        rec.storage = mode
+        rec.faiss = R.build_index(exact_vecs, mode)
+        rec.embeddings = exact_mmap if mode != "flat" else base.embeddings
+        raw, rescored, overlap = [], [], []
+        for q, t, text, ft in zip(q_embs, truth, texts, final_truth):
+            _, I = rec._faiss_search(q, topn, None)
+            raw.append(_recall(I[0][I[0] >= 0], t))
+            rescored.append(_recall(rec.semantic_candidates(q, topn)[1], t))
+            got = rec.recommend(text, k=k, seed=seed)
+            overlap.append(sum(1 for d in got if d in ft) / max(1, len(ft)))
+        nbytes = rec.index_nbytes()
+        q0 = q_embs[0]
+        results[mode] = {
+            "index_mb": round((nbytes["index"] + nbytes["exact"]) / 2 ** 20, 2),
+            f"recall@{topn}_raw": round(float(np.mean(raw)), 4),
+            f"recall@{topn}_rescored": round(float(np.mean(rescored)), 4),
+            f"top{k}_overlap": round(float(np.mean(overlap)), 4),
+            "semantic_candidates": bench(lambda: rec.semantic_candidates(q0, topn), min_time),
+        }
+    flat_mb = results.get("flat", {}).get("index_mb")
+    for r in results.values():
+        if flat_mb:
+            r["memory_ratio"] = round(flat_mb / max(1e-9, r["index_mb"]), 2)
+    os.unlink(npy)
+    return results
+
+
+def format_storage(results: Dict[str, Dict]) -> str:
+    lines = []
+    for mode, r in results.items():
+        rest = {k: v for k, v in r.items() if k != "semantic_candidates"}
+        lat = r["semantic_candidates"]
+        lines.append(f"{mode:>5}: " + " ".join(f"{k}={v}" for k, v in rest.items())
+                     + f" search_median_us={lat.get('median_us')}")
+    return "\n".join(lines)
@@ -38,6 +38,17 @@ class Config:
     PICTURE_DIR = PICTURE_DIR
     NOTE_IMAGE_ALLOWED_EXTS = ["webp", "jpg", "jpeg", "png"]  # 프론트와 일치
     NOTE_IMAGE_PLACEHOLDER = os.path.join(PICTURE_DIR, "_placeholder.jpg")
+    # slug -> 파일명 인덱스: manifest 경로(빈 값이면 메모리만), 폴더 mtime 재확인 주기(초)
+    NOTE_IMAGE_MANIFEST = os.getenv("NOTE_IMAGE_MANIFEST", "")
+    NOTE_IMAGE_INDEX_CHECK_SECS = float(os.getenv("NOTE_IMAGE_INDEX_CHECK_SECS", "5"))
+    # 썸네일 변형(flask note-images build-variants) 위치와 서빙 방식(redirect | serve | off)
+    NOTE_IMAGE_VARIANTS_DIR = os.path.join(STATIC_DIR, "picture_variants")
+    NOTE_IMAGE_VARIANT_MODE = os.getenv("NOTE_IMAGE_VARIANT_MODE", "redirect")
+
+    # --- 응답 압축 (JSON/HTML, 이 크기(byte) 미만은 그대로) ---
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_MIMETYPES = ["application/json", "text/html"]
 
     # --- DB 연결 (MySQL 우선, 실패 시 SQLite 폴백) ---
     _MYSQL_URI = _build_mysql_uri()
@@ -52,10 +63,29 @@ class Config:
         "pool_recycle": 280,
     }
 
+    # SQLite 폴백 프로필: tuned(WAL, synchronous=NORMAL, busy_timeout, mmap, 풀 재사용) | default
+    SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+    # 로그인 사용자 행 캐시(초, 프로세스별, SQLite tuned 프로필에서만). 0 이면 요청마다 DB 조회.
+    # 다른 워커의 로그아웃/계정 변경은 최대 이 시간만큼 늦게 보임
+    SESSION_USER_TTL = float(os.getenv("SESSION_USER_TTL", "10"))
+
     # (선택) 로그 보기 원하면 .env에 SQLALCHEMY_ECHO=1
     SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "0") in ("1", "true", "True")
 
     # --- 외부 API 키(있는 경우에만 사용) ---
     # 예: GENAI_API_KEY, WEATHER_API_KEY 등
     GENAI_API_KEY = os.getenv("GENAI_API_KEY", "")
+    # AI 향수 생성: fallback(LLM 실패 시 로컬 조합기) | fast(항상 로컬) | off(고정 목업 폴백)
+    FRAGRANCE_COMPOSER = os.getenv("FRAGRANCE_COMPOSER", "fallback")
+    COMPOSER_STATS_PATH = os.getenv("COMPOSER_STATS_PATH", "")  # 비우면 per_data.composer.npz
+    # 비슷한 향수 k-NN 테이블 경로 접두어 (비우면 per_data.neighbors.{ids,scores}.npy)
+    NEIGHBORS_PATH = os.getenv("NEIGHBORS_PATH", "")
+    # 카탈로그 임베딩 파일 접두어 (비우면 per_data.embeddings.{npy,json}, flask embeddings build)
+    EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", "")
+    # 독립 검색 서비스 주소(쉼표 구분, unix:/path.sock | http://host:port). 비우면 워커 내 추천기
+    RETRIEVAL_URLS = os.getenv("RETRIEVAL_URLS", "")
+    # 날씨 버킷별 추천 스냅샷 파일 (비우면 per_data.weather.json, flask weather-snapshot build|run)
+    WEATHER_SNAPSHOT_PATH = os.getenv("WEATHER_SNAPSHOT_PATH", "")
+    # 입장 제어 공유 상태(SQLite, 워커 간 공유). 비우면 instance/admission.sqlite
+    ADMISSION_DB = os.getenv("ADMISSION_DB", "")
     WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
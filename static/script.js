@@ -93,14 +93,8 @@ function appendRecommendations(query, all) {
       const brand = p.Brand || p.brand || "Unknown";
       const name = p.Name || p.name || "Untitled";
       const year = (p.Year ?? p.year ?? "") || "";
-      const noteRaw = p.Note || p.note || "";
-      const notes = parseNotes(noteRaw);
-      const popHTML = `
-        ${notes.top.length||notes.middle.length||notes.base.length
-          ? (noteRows("Top Notes", notes.top) + noteRows("Middle Notes", notes.middle) + noteRows("Base Notes", notes.base))
-          : noteRows("Notes", notes.flat)
-        }
-      `;
+      const notes = notesOf(p);
+      const popHTML = notesPopupHTML(notes);
       const el = document.createElement("div");
       el.className = "perf-card perf-card--compact";
       el.innerHTML = `
@@ -121,6 +115,7 @@ function appendRecommendations(query, all) {
         });
         a.addEventListener("mouseleave", hidePop);
       });
+      attachNoteSprite(el, notes);
       list.appendChild(el);
     });
     shown += slice.length;
@@ -134,12 +129,12 @@ function appendRecommendations(query, all) {
   btn.onclick = () => addCards(5);
 }
 
-/* ====== 슬러그 유틸 ====== */
+/* ====== 슬러그 유틸 (서버 app/images.py slugify_note 와 같은 규칙) ====== */
 function slugifyNote(n){
   return String(n || "")
-    .toLowerCase()
     .normalize('NFKD')
-    .replace(/[\u0300-\u036f]/g, '')     // 결합문자 제거
+    .replace(/[^\x00-\x7f]/g, '')        // ASCII 밖(결합문자 포함) 탈락
+    .toLowerCase()
     .replace(/[^a-z0-9]+/g, '-')         // 비영숫자 -> -
     .replace(/^-+|-+$/g,'');             // 앞/뒤 -
 }
@@ -149,6 +144,34 @@ function imgUrlForNote(slug){
   // 서버가 확장자 해결하므로 1회 요청, 404 없음(플레이스홀더로 200 반환)
   return `/note-img/${slug}`;
 }
+const NOTE_PLACEHOLDER_URL = "/note-img/_placeholder";
+
+/* ====== 응답 노트: 서버가 파싱/이미지 해석한 Notes 우선, 없으면(옛 이력 등) 원문 파싱 ====== */
+function notesOf(p){
+  const n = p && p.Notes;
+  if(n && typeof n === "object"){
+    return { top:n.top||[], middle:n.middle||[], base:n.base||[], flat:n.flat||[] };  // 빈 위치는 생략돼 옴
+  }
+  return parseNotes((p && (p.Note || p.note)) || "");
+}
+
+// 노트 항목 통일: 서버 "이름" | {name, slug}(다른 표기 이미지) | {name, ph:1}(이미지 없음)
+// (옛 이력은 {name, slug, img})
+function noteEntry(n){
+  if(n && typeof n === "object"){
+    const name = String(n.name || "");
+    const slug = n.slug || slugifyNote(name);
+    return { name, slug, ph:!!n.ph, img: n.img || (n.ph ? NOTE_PLACEHOLDER_URL : imgUrlForNote(slug)) };
+  }
+  const slug = slugifyNote(n);
+  return { name:String(n), slug, ph:false, img:imgUrlForNote(slug) };
+}
+
+// AI 향수 생성용 노트명 목록
+function noteNamesOf(p){
+  const n = notesOf(p);
+  return [...n.top, ...n.middle, ...n.base, ...n.flat].map(x=> noteEntry(x).name);
+}
 
 /* ====== 노트 파서: JSON 또는 콤마 텍스트 모두 지원 ====== */
 function parseNotes(raw){
@@ -199,15 +222,28 @@ document.addEventListener("scroll", hidePop);
 document.addEventListener("click", e=>{ if(!_pop.contains(e.target)) hidePop(); });
 
 /* ====== 노트 섹션 HTML (이미지 포함) ====== */
-function noteRows(title, arr){
+// sprite: /note-img/bulk 응답(있으면 스프라이트 타일, 없으면 개별 <img>)
+const NOTE_IMG_PX = 60;
+function noteImgHTML(e, sprite){
+  const pos = sprite && sprite.sprite && sprite.map ? sprite.map[e.slug] : null;
+  if(pos){
+    const s = NOTE_IMG_PX;
+    return `<div class="note-img note-img--sprite" role="img" aria-label="${e.name}" style="`
+      + `background-image:url('${sprite.sprite}');`
+      + `background-size:${sprite.cols*s}px ${sprite.rows*s}px;`
+      + `background-position:-${pos[0]*s}px -${pos[1]*s}px"></div>`;
+  }
+  return `<img class="note-img" src="${e.img}" alt="${e.name}">`;
+}
+
+function noteRows(title, arr, sprite){
   if(!arr || !arr.length) return "";
   const items = arr.map(n=>{
-    const slug = slugifyNote(n);
-    const src  = imgUrlForNote(slug);
+    const e = noteEntry(n);
     return `
       <div class="note-card">
-        <img class="note-img" src="${src}" alt="${n}">
-        <div class="note-name">${n}</div>
+        ${noteImgHTML(e, sprite)}
+        <div class="note-name">${e.name}</div>
       </div>
     `;
   }).join("");
@@ -219,14 +255,49 @@ function noteRows(title, arr){
   `;
 }
 
+/* 카드 팝업 HTML (Top/Middle/Base 또는 단일 Notes) */
+function notesPopupHTML(notes, sprite){
+  return (notes.top.length || notes.middle.length || notes.base.length)
+    ? (noteRows("Top Notes", notes.top, sprite)
+      + noteRows("Middle Notes", notes.middle, sprite)
+      + noteRows("Base Notes", notes.base, sprite))
+    : noteRows("Notes", notes.flat, sprite);
+}
+
+/* ====== 노트 스프라이트: 카드 1장 = 이미지 요청 1번 ====== */
+const _spriteRequests = new Map();
+function fetchNoteSprite(slugs){
+  const key = slugs.join("|");
+  if(!_spriteRequests.has(key)){
+    _spriteRequests.set(key, fetch("/note-img/bulk", {
+      method:"POST",
+      headers:{ "Content-Type":"application/json" },
+      body: JSON.stringify({ slugs, format:"sprite" })
+    }).then(r=> r.ok ? r.json() : null).catch(()=> null));
+  }
+  return _spriteRequests.get(key);
+}
+
+// 카드 렌더 직후 호출: 스프라이트가 준비되면 팝업 HTML을 스프라이트 버전으로 교체
+function attachNoteSprite(el, notes){
+  const all = [...notes.top, ...notes.middle, ...notes.base, ...notes.flat];
+  const slugs = [...new Set(all.map(noteEntry).filter(e=> e.slug && !e.ph).map(e=> e.slug))];
+  if(!slugs.length) return;
+  fetchNoteSprite(slugs).then(sprite=>{
+    if(!sprite || !sprite.sprite) return;
+    const html = encodeURIComponent(notesPopupHTML(notes, sprite));
+    el.querySelectorAll(".hover-note").forEach(a=>{ a.dataset.pop = html; });
+  });
+}
+
 /* 팝업 전체(섹션들을 세로로 쌓음) — noteRows() 사용으로 수정 */
-function buildNotePopup(notes){
+function buildNotePopup(notes, sprite){
   // notes = {top:[], middle:[], base:[]} 형태라고 가정
   return `
     <div class="note-sections">
-      ${noteRows("Top Notes", notes.top)}
-      ${noteRows("Middle Notes", notes.middle)}
-      ${noteRows("Base Notes", notes.base)}
+      ${noteRows("Top Notes", notes.top, sprite)}
+      ${noteRows("Middle Notes", notes.middle, sprite)}
+      ${noteRows("Base Notes", notes.base, sprite)}
     </div>
   `;
 }
@@ -252,16 +323,10 @@ function renderRecommendations(all){
       const brand = p.Brand || p.brand || "Unknown";
       const name  = p.Name  || p.name  || "Untitled";
       const year  = (p.Year ?? p.year ?? "") || "";
-      const noteRaw = p.Note || p.note || "";
-      const notes = parseNotes(noteRaw);
+      const notes = notesOf(p);
 
       // 팝업용 HTML (Top/Middle/Base 또는 단일 Notes)
-      const popHTML = `
-        ${notes.top.length||notes.middle.length||notes.base.length
-          ? (noteRows("Top Notes", notes.top) + noteRows("Middle Notes", notes.middle) + noteRows("Base Notes", notes.base))
-          : noteRows("Notes", notes.flat)
-        }
-      `;
+      const popHTML = notesPopupHTML(notes);
 
       const el = document.createElement("div");
       el.className = "perf-card perf-card--compact";
@@ -289,6 +354,7 @@ function renderRecommendations(all){
         });
         a.addEventListener("mouseleave", hidePop);
       });
+      attachNoteSprite(el, notes);
 
       list.appendChild(el);
     });
@@ -339,7 +405,7 @@ async function searchFragranceSentence(){
       appendRecommendations(q, data.response || []);
 
       // 필요 시 AI 향수 생성 호출 유지
-      const notes = (data.response || []).map(p=>p.Note || p.note);
+      const notes = (data.response || []).flatMap(noteNamesOf);
       generateCustomFragrance(q, q, data.weather_description, notes);
     }catch(err){
       console.error(err);
@@ -350,27 +416,69 @@ async function searchFragranceSentence(){
   }, err=>{ showError(err); hideLoading(); });
 }
 
-/* ====== AI 향수 생성 (기존 로직 유지) ====== */
-function generateCustomFragrance(user_cat, user_note, weather_desc, notes){
-  fetch("/generate-custom-fragrance",{
+/* ====== AI 향수 생성: 응답 문자열 → 객체 (코드펜스/느슨한 JSON 허용, 실패 시 null) ====== */
+function parseGeneratedNote(raw){
+  raw = String(raw || "").trim().replace(/```(?:json)?\s*([\s\S]*?)\s*```/i, "$1").trim();
+  const s=raw.indexOf("{"), e=raw.lastIndexOf("}");
+  let jc = (s!==-1 && e!==-1) ? raw.slice(s,e+1) : raw;
+  jc = jc.replace(/(\w+)\s*:/g,'"$1":').replace(/"\s+/g,'"')
+         .replace(/[\u2018\u2019]/g,"'").replace(/[\u201C\u201D]/g,'"')
+         .replace(/'/g,'"').replace(/,\s*([}\]])/g,"$1");
+  try{ return JSON.parse(jc); }catch(_){ return null; }
+}
+
+/* ====== 서버 혼잡(429 요청 과다 / 503 대기열 초과) 안내 ====== */
+function busyMessage(res){
+  const secs = parseInt(res.headers.get("Retry-After") || "1", 10);
+  return res.status === 429
+    ? `요청이 너무 잦습니다. ${secs}초 뒤에 다시 시도해 주세요.`
+    : `요청이 많아 처리하지 못했습니다. ${secs}초 뒤에 다시 시도해 주세요.`;
+}
+
+/* ====== AI 향수 생성: SSE 스트리밍 (조각이 올 때마다 onDelta(누적 텍스트)) ====== */
+async function streamCustomFragrance(payload, onDelta){
+  const res = await fetch("/generate-custom-fragrance?stream=1", {
     method:"POST",
-    headers:{ "Content-Type":"application/json" },
-    body: JSON.stringify({ user_cat, user_note, weather: weather_desc, notes })
+    headers:{ "Content-Type":"application/json", "Accept":"text/event-stream" },
+    body: JSON.stringify(payload)
+  });
+  if(res.status === 429 || res.status === 503) throw new Error(busyMessage(res));
+  if(!res.body || !res.body.getReader) return { generated_note: await res.text() };
+
+  const reader = res.body.getReader();
+  const dec = new TextDecoder();
+  let buf = "", text = "", done = null;
+  for(;;){
+    const { value, done: end } = await reader.read();
+    if(end) break;
+    buf += dec.decode(value, { stream:true });
+    let i;
+    while((i = buf.indexOf("\n\n")) !== -1){
+      const block = buf.slice(0, i); buf = buf.slice(i + 2);
+      let ev = "message", data = "";
+      block.split("\n").forEach(l=>{
+        if(l.startsWith("event:")) ev = l.slice(6).trim();
+        else if(l.startsWith("data:")) data += l.slice(5).trim();
+      });
+      if(!data) continue;
+      const obj = JSON.parse(data);
+      if(ev === "delta"){ text += obj.text || ""; if(onDelta) onDelta(text); }
+      else if(ev === "done"){ done = obj; }
+    }
+  }
+  return done || { generated_note: text };
+}
+
+/* ====== AI 향수 생성 (스트리밍 중에는 원문을, 완료되면 카드로) ====== */
+function generateCustomFragrance(user_cat, user_note, weather_desc, notes){
+  const container=document.getElementById("custom_note_result");
+  streamCustomFragrance({ user_cat, user_note, weather: weather_desc, notes }, text=>{
+    if(container) container.innerHTML=`<pre style="white-space:pre-wrap">${text}</pre>`;
   })
-  .then(r=>r.json())
   .then(d=>{
-    const container=document.getElementById("custom_note_result");
-    let raw=(d.generated_note||"").trim();
-    raw=raw.replace(/```(?:json)?\s*([\s\S]*?)\s*```/i, "$1").trim();
-    const s=raw.indexOf("{"), e=raw.lastIndexOf("}");
-    let jc = (s!==-1 && e!==-1) ? raw.slice(s,e+1) : raw;
-    jc = jc.replace(/(\w+)\s*:/g,'"$1":').replace(/"\s+/g,'"')
-           .replace(/[\u2018\u2019]/g,"'").replace(/[\u201C\u201D]/g,'"')
-           .replace(/'/g,'"').replace(/,\s*([}\]])/g,"$1");
-
-    let obj=null;
-    try{ obj=JSON.parse(jc); }
-    catch(_){ container.innerHTML=`<pre style="white-space:pre-wrap">${raw}</pre>`; return; }
+    const raw=(d.generated_note||"").trim();
+    const obj=parseGeneratedNote(raw);
+    if(!obj){ container.innerHTML=`<pre style="white-space:pre-wrap">${raw}</pre>`; return; }
 
     const safeJoin = a => Array.isArray(a)? a.join(", ") : "";
     container.innerHTML = `